@@ -1,7 +1,6 @@
 """Rest API for Home Assistant."""
 import asyncio
 from contextlib import suppress
-import json
 import logging
 
 from aiohttp import web
@@ -35,7 +34,7 @@ from homeassistant.const import (
 import homeassistant.core as ha
 from homeassistant.exceptions import ServiceNotFound, TemplateError, Unauthorized
 from homeassistant.helpers import template
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps, json_dumps_list, json_loads
 from homeassistant.helpers.network import NoURLAvailableError, get_url
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.system_info import async_get_system_info
@@ -120,7 +119,7 @@ class APIEventStream(HomeAssistantView):
             if event.event_type == EVENT_HOMEASSISTANT_STOP:
                 data = stop_obj
             else:
-                data = json.dumps(event, cls=JSONEncoder)
+                data = json_dumps(event)
 
             await to_write.put(data)
 
@@ -225,7 +224,11 @@ class APIStatesView(HomeAssistantView):
             for state in request.app["hass"].states.async_all()
             if entity_perm(state.entity_id, "read")
         ]
-        return self.json(states)
+        try:
+            return self.json_str(json_dumps_list(states))
+        except (ValueError, TypeError):
+            # Let json log the data that can not be serialized
+            return self.json(states)
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -242,9 +245,13 @@ class APIEntityStateView(HomeAssistantView):
             raise Unauthorized(entity_id=entity_id)
 
         state = request.app["hass"].states.get(entity_id)
-        if state:
+        if state is None:
+            return self.json_message("Entity not found.", HTTP_NOT_FOUND)
+        try:
+            return self.json_str(state.as_json())
+        except (ValueError, TypeError):
+            # Let json log the data that can not be serialized
             return self.json(state)
-        return self.json_message("Entity not found.", HTTP_NOT_FOUND)
 
     async def post(self, request, entity_id):
         """Update state of entity."""
@@ -252,7 +259,7 @@ class APIEntityStateView(HomeAssistantView):
             raise Unauthorized(entity_id=entity_id)
         hass = request.app["hass"]
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
         except ValueError:
             return self.json_message("Invalid JSON specified.", HTTP_BAD_REQUEST)
 
@@ -313,7 +320,7 @@ class APIEventView(HomeAssistantView):
             raise Unauthorized()
         body = await request.text()
         try:
-            event_data = json.loads(body) if body else None
+            event_data = json_loads(body) if body else None
         except ValueError:
             return self.json_message(
                 "Event data should be valid JSON.", HTTP_BAD_REQUEST
@@ -366,7 +373,7 @@ class APIDomainServicesView(HomeAssistantView):
         hass: ha.HomeAssistant = request.app["hass"]
         body = await request.text()
         try:
-            data = json.loads(body) if body else None
+            data = json_loads(body) if body else None
         except ValueError:
             return self.json_message("Data should be valid JSON.", HTTP_BAD_REQUEST)
 
@@ -411,7 +418,7 @@ class APITemplateView(HomeAssistantView):
         if not request["hass_user"].is_admin:
             raise Unauthorized()
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
             tpl = template.Template(data["template"], request.app["hass"])
             return tpl.async_render(variables=data.get("variables"), parse_result=False)
         except (ValueError, TemplateError) as ex:
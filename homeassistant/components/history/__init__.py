@@ -1,11 +1,13 @@
 """Provide pre-made queries on top of the recorder component."""
 from __future__ import annotations
 
+import asyncio
 from collections import defaultdict
 from datetime import datetime as dt, timedelta
-from itertools import groupby
-import json
+from functools import partial
+from itertools import chain, groupby
 import logging
+import threading
 import time
 from typing import Iterable, cast
 
@@ -14,13 +16,17 @@ from sqlalchemy import and_, bindparam, func, not_, or_
 from sqlalchemy.ext import baked
 import voluptuous as vol
 
-from homeassistant.components import recorder
+from homeassistant.auth.permissions.const import POLICY_READ
+from homeassistant.components import recorder, websocket_api
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.recorder.const import EVENT_RECORDER_PURGE_PROGRESS
 from homeassistant.components.recorder.models import (
+    StateAttributes,
     States,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
 )
+from homeassistant.components.recorder.statistics import statistics_during_period
 from homeassistant.components.recorder.util import execute, session_scope
 from homeassistant.const import (
     CONF_DOMAINS,
@@ -29,21 +35,40 @@ from homeassistant.const import (
     CONF_INCLUDE,
     HTTP_BAD_REQUEST,
 )
-from homeassistant.core import Context, State, split_entity_id
+from homeassistant.core import Context, State, callback, split_entity_id
+from homeassistant.exceptions import Unauthorized
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     CONF_ENTITY_GLOBS,
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
 )
+from homeassistant.helpers.event import (
+    async_track_point_in_utc_time,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.json import (
+    json_dumps,
+    json_dumps_list,
+    json_dumps_list_chunks,
+    json_loads,
+)
 from homeassistant.helpers.typing import HomeAssistantType
 import homeassistant.util.dt as dt_util
 
+from .cache import HistoryCache, state_at
+from .downsample import MIN_POINTS, downsample
+
 # mypy: allow-untyped-defs, no-check-untyped-defs
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "history"
 CONF_ORDER = "use_include_order"
+CONF_CACHE_MAX_ENTITIES = "cache_max_entities"
+CONF_CACHE_MAX_STATES = "cache_max_states"
+
+DEFAULT_CACHE_MAX_ENTITIES = 50
+DEFAULT_CACHE_MAX_STATES = 2000
 
 STATE_KEY = "state"
 LAST_CHANGED_KEY = "last_changed"
@@ -56,7 +81,15 @@ GLOB_TO_SQL_CHARS = {
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA.extend(
-            {vol.Optional(CONF_ORDER, default=False): cv.boolean}
+            {
+                vol.Optional(CONF_ORDER, default=False): cv.boolean,
+                vol.Optional(
+                    CONF_CACHE_MAX_ENTITIES, default=DEFAULT_CACHE_MAX_ENTITIES
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_CACHE_MAX_STATES, default=DEFAULT_CACHE_MAX_STATES
+                ): cv.positive_int,
+            }
         )
     },
     extra=vol.ALLOW_EXTRA,
@@ -85,9 +118,29 @@ QUERY_STATES = [
     States.attributes,
     States.last_changed,
     States.last_updated,
+    StateAttributes.shared_attrs,
 ]
 
 HISTORY_BAKERY = "history_bakery"
+DATA_CACHE = "history_cache"
+
+# Queries that start less than this long ago can be answered from the cache
+CACHE_WINDOW = timedelta(days=1)
+
+# The number of states read from the database and serialized at a time
+# when the history is streamed
+STREAM_BATCH_SIZE = 500
+# Streamed JSON is sent in pieces of at least this many characters
+STREAM_CHUNK_SIZE = 65536
+# The number of pieces that may wait to be sent
+STREAM_QUEUE_SIZE = 4
+
+
+def _query_states_with_attributes(session):
+    """Query states with the shared attributes joined in."""
+    return session.query(*QUERY_STATES).outerjoin(
+        StateAttributes, States.attributes_id == StateAttributes.attributes_id
+    )
 
 
 def get_significant_states(hass, *args, **kwargs):
@@ -114,12 +167,61 @@ def _get_significant_states(
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
     """
+    cache = hass.data.get(DATA_CACHE)
+    if cache is not None and entity_ids:
+        cached = cache.get(entity_ids, start_time)
+        if cached is not None:
+            return _cached_states_to_json(
+                cached,
+                start_time,
+                end_time,
+                include_start_time_state,
+                significant_changes_only,
+                minimal_response,
+            )
+
     timer_start = time.perf_counter()
 
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
+    states = execute(
+        _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+        )
+    )
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_significant_states took %fs", elapsed)
+
+    return _sorted_states_to_json(
+        hass,
+        session,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        minimal_response,
     )
 
+
+def _significant_states_query(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    significant_changes_only,
+):
+    """Return a query for the significant states, sorted by entity_id."""
+    baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
+
     if significant_changes_only:
         baked_query += lambda q: q.filter(
             (
@@ -145,34 +247,122 @@ def _get_significant_states(
 
     baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
 
-    states = execute(
-        baked_query(session).params(
-            start_time=start_time, end_time=end_time, entity_ids=entity_ids
-        )
+    return baked_query(session).params(
+        start_time=start_time, end_time=end_time, entity_ids=entity_ids
     )
 
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("get_significant_states took %fs", elapsed)
 
-    return _sorted_states_to_json(
-        hass,
-        session,
-        states,
-        start_time,
-        entity_ids,
-        filters,
-        include_start_time_state,
-        minimal_response,
-    )
+def _stream_significant_states(
+    hass,
+    session,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    significant_changes_only=True,
+    minimal_response=False,
+    max_points=None,
+    use_include_order=False,
+):
+    """Yield the JSON of the significant states in pieces.
+
+    The same states as _get_significant_states, but read from the
+    database in batches and serialized as they are read, so memory use
+    does not grow with the period. Entities are in the order of
+    entity_ids, or of their entity_id, and with use_include_order the
+    included entities come first, like the buffered response. Downsampling
+    with max_points needs the states of one entity at a time.
+    """
+    initial_states = {}
+    if include_start_time_state:
+        for state in _get_initial_states(
+            hass, session, start_time, entity_ids, filters
+        ):
+            initial_states[state.entity_id] = state
+
+    def _query(query_entity_ids):
+        """Return the significant states of entities, by entity_id."""
+        return _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            query_entity_ids,
+            filters,
+            significant_changes_only,
+        ).with_post_criteria(lambda q: q.yield_per(STREAM_BATCH_SIZE))
+
+    def _entity_json(ent_id, group):
+        """Yield the JSON of the states of one entity."""
+        entity_states = _iter_entity_states(
+            initial_states.pop(ent_id, None), ent_id, group, minimal_response
+        )
+        if max_points:
+            entity_states = downsample(list(entity_states), max_points)
+        return json_dumps_list_chunks(entity_states, STREAM_BATCH_SIZE)
+
+    # Entities in a given order are read one at a time
+    ordered = []
+    if filters and use_include_order:
+        ordered = [
+            ent_id
+            for ent_id in filters.included_entities
+            if (
+                ent_id in entity_ids
+                if entity_ids is not None
+                else split_entity_id(ent_id)[0] not in IGNORE_DOMAINS
+            )
+        ]
+    if entity_ids is not None:
+        ordered.extend(ent_id for ent_id in entity_ids if ent_id not in ordered)
+
+    yield "["
+    separator = ""
+    for ent_id in ordered:
+        group = iter(_query([ent_id]))
+        first = next(group, None)
+        if first is not None:
+            group = chain([first], group)
+        elif ent_id not in initial_states:
+            continue
+        yield separator
+        separator = ","
+        yield from _entity_json(ent_id, group)
+    if entity_ids is not None:
+        yield "]"
+        return
+
+    # The other entities by entity_id, with the ones that did not change
+    # during the period in between
+    skip = set(ordered)
+    unchanged = sorted(ent_id for ent_id in initial_states if ent_id not in skip)
+    unchanged_index = 0
+    groups = groupby(_query(None), lambda state: state.entity_id)
+    for ent_id, group in chain(groups, [(None, ())]):
+        while unchanged_index < len(unchanged) and (
+            ent_id is None or unchanged[unchanged_index] < ent_id
+        ):
+            initial_state = initial_states.pop(unchanged[unchanged_index], None)
+            unchanged_index += 1
+            if initial_state is None:
+                # It changed during the period and was already sent
+                continue
+            yield separator
+            separator = ","
+            yield json_dumps_list([initial_state])
+        if ent_id is None or ent_id in skip:
+            continue
+        yield separator
+        separator = ","
+        yield from _entity_json(ent_id, group)
+    yield "]"
 
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
 
         baked_query += lambda q: q.filter(
             (States.last_changed == States.last_updated)
@@ -185,7 +375,9 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
             )
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
@@ -206,13 +398,13 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     start_time = dt_util.utcnow()
 
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
         baked_query += lambda q: q.filter(States.last_changed == States.last_updated)
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(
@@ -241,6 +433,16 @@ def get_last_state_changes(hass, number_of_states, entity_id):
 
 def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None):
     """Return the states at a specific point in time."""
+    cache = hass.data.get(DATA_CACHE)
+    if cache is not None and entity_ids:
+        cached = cache.get(entity_ids, utc_point_in_time)
+        if cached is not None:
+            states = (
+                entity_history.state_at(utc_point_in_time)
+                for entity_history in cached.values()
+            )
+            return [state for state in states if state is not None]
+
     if run is None:
         run = recorder.run_information_from_instance(hass, utc_point_in_time)
 
@@ -273,7 +475,7 @@ def _get_states_with_session(
     # We have more than one entity to look at (most commonly we want
     # all entities,) so we need to do a search on all states since the
     # last recorder run started.
-    query = session.query(*QUERY_STATES)
+    query = _query_states_with_attributes(session)
 
     most_recent_states_by_date = session.query(
         States.entity_id.label("max_entity_id"),
@@ -321,9 +523,7 @@ def _get_states_with_session(
 def _get_single_entity_states_with_session(hass, session, utc_point_in_time, entity_id):
     # Use an entirely different (and extremely fast) query if we only
     # have a single entity id
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
-    )
+    baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
     baked_query += lambda q: q.filter(
         States.last_updated < bindparam("utc_point_in_time"),
         States.entity_id == bindparam("entity_id"),
@@ -366,65 +566,147 @@ def _sorted_states_to_json(
             result[ent_id] = []
 
     # Get the states at the start time
-    timer_start = time.perf_counter()
     if include_start_time_state:
-        run = recorder.run_information_from_instance(hass, start_time)
-        for state in _get_states_with_session(
-            hass, session, start_time, entity_ids, run=run, filters=filters
+        for state in _get_initial_states(
+            hass, session, start_time, entity_ids, filters
         ):
-            state.last_changed = start_time
-            state.last_updated = start_time
             result[state.entity_id].append(state)
 
+    # Append all changes to it
+    for ent_id, group in groupby(states, lambda state: state.entity_id):
+        ent_results = result[ent_id]
+        initial_state = ent_results.pop() if ent_results else None
+        ent_results.extend(
+            _iter_entity_states(initial_state, ent_id, group, minimal_response)
+        )
+
+    # Filter out the empty lists if some states had 0 results.
+    return {key: val for key, val in result.items() if val}
+
+
+def _get_initial_states(hass, session, start_time, entity_ids, filters):
+    """Return the states at the start time, as the first data points."""
+    timer_start = time.perf_counter()
+    run = recorder.run_information_from_instance(hass, start_time)
+    states = _get_states_with_session(
+        hass, session, start_time, entity_ids, run=run, filters=filters
+    )
+    for state in states:
+        state.last_changed = start_time
+        state.last_updated = start_time
+
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("getting %d first datapoints took %fs", len(result), elapsed)
+        _LOGGER.debug("getting %d first datapoints took %fs", len(states), elapsed)
 
-    # Called in a tight loop so cache the function
-    # here
-    _process_timestamp_to_utc_isoformat = process_timestamp_to_utc_isoformat
+    return states
 
-    # Append all changes to it
-    for ent_id, group in groupby(states, lambda state: state.entity_id):
-        domain = split_entity_id(ent_id)[0]
-        ent_results = result[ent_id]
-        if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
-            ent_results.extend(LazyState(db_state) for db_state in group)
 
-        # With minimal response we only provide a native
-        # State for the first and last response. All the states
-        # in-between only provide the "state" and the
-        # "last_changed".
-        if not ent_results:
-            ent_results.append(LazyState(next(group)))
+def _iter_entity_states(initial_state, ent_id, group, minimal_response, to_state=None):
+    """Yield the states of one entity, starting with the initial state.
 
-        prev_state = ent_results[-1]
-        initial_state_count = len(ent_results)
+    to_state converts the items of group, they are database rows by default.
+    """
+    if to_state is None:
+        to_state = LazyState
+    if initial_state is not None:
+        yield initial_state
 
+    domain = split_entity_id(ent_id)[0]
+    if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
         for db_state in group:
-            # With minimal response we do not care about attribute
-            # changes so we can filter out duplicate states
-            if db_state.state == prev_state.state:
-                continue
+            yield to_state(db_state)
+        return
+
+    # With minimal response we only provide a native
+    # State for the first and last response. All the states
+    # in-between only provide the "state" and the
+    # "last_changed".
+    prev_state = initial_state
+    if prev_state is None:
+        prev_state = to_state(next(group))
+        yield prev_state
 
-            ent_results.append(
-                {
-                    STATE_KEY: db_state.state,
-                    LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
-                        db_state.last_changed
-                    ),
-                }
+    # Called in a tight loop so cache the function
+    # here
+    _process_timestamp_to_utc_isoformat = process_timestamp_to_utc_isoformat
+
+    last_change = None
+    for db_state in group:
+        # With minimal response we do not care about attribute
+        # changes so we can filter out duplicate states
+        if db_state.state == prev_state.state:
+            continue
+
+        if last_change is not None:
+            yield {
+                STATE_KEY: last_change.state,
+                LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
+                    last_change.last_changed
+                ),
+            }
+        last_change = prev_state = db_state
+
+    if last_change is not None:
+        # There was at least one state change
+        # the last one is a full state
+        yield to_state(last_change)
+
+
+def _cached_states_to_json(
+    cached,
+    start_time,
+    end_time,
+    include_start_time_state,
+    significant_changes_only,
+    minimal_response,
+):
+    """Return the significant states of cached entities like the database."""
+    result = {}
+    for ent_id, entity_history in cached.items():
+        initial_state = None
+        if include_start_time_state:
+            state = entity_history.state_at(start_time)
+            if state is not None:
+                initial_state = state_at(state, start_time)
+        states = [
+            state
+            for state in entity_history.changes_during(start_time, end_time)
+            if _is_significant(state, significant_changes_only)
+        ]
+        if initial_state is None and not states:
+            continue
+        result[ent_id] = list(
+            _iter_entity_states(
+                initial_state,
+                ent_id,
+                iter(states),
+                minimal_response,
+                to_state=lambda state: state,
             )
-            prev_state = db_state
+        )
+    return result
 
-        if prev_state and len(ent_results) != initial_state_count:
-            # There was at least one state change
-            # replace the last minimal state with
-            # a full state
-            ent_results[-1] = LazyState(prev_state)
 
-    # Filter out the empty lists if some states had 0 results.
-    return {key: val for key, val in result.items() if val}
+def _is_recorded(hass, entity_id):
+    """Return if the recorder writes the states of an entity."""
+    instance = hass.data.get(recorder.DATA_INSTANCE)
+    return instance is not None and instance.entity_filter(entity_id)
+
+
+def _get_recent_states(hass, entity_ids, since):
+    """Return the state at since and every change after it of entities."""
+    with session_scope(hass=hass) as session:
+        result = {entity_id: (None, []) for entity_id in entity_ids}
+        for state in _get_states_with_session(hass, session, since, entity_ids):
+            result[state.entity_id] = (state, [])
+        for row in execute(
+            _significant_states_query(
+                hass, session, since, None, entity_ids, None, False
+            )
+        ):
+            result[row.entity_id][1].append(LazyState(row))
+    return result
 
 
 def get_state(hass, utc_point_in_time, entity_id, run=None):
@@ -444,13 +726,247 @@ async def async_setup(hass, config):
     use_include_order = conf.get(CONF_ORDER)
 
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
+    hass.http.register_view(HistoryStatisticsView())
     hass.components.frontend.async_register_built_in_panel(
         "history", "history", "hass:poll-box"
     )
+    websocket_api.async_register_command(hass, ws_stream)
+    websocket_api.async_register_command(hass, ws_cache_info)
+
+    max_entities = conf.get(CONF_CACHE_MAX_ENTITIES, DEFAULT_CACHE_MAX_ENTITIES)
+    if max_entities:
+        cache = hass.data[DATA_CACHE] = HistoryCache(
+            hass,
+            partial(_get_recent_states, hass),
+            partial(_is_recorded, hass),
+            CACHE_WINDOW,
+            max_entities,
+            conf.get(CONF_CACHE_MAX_STATES, DEFAULT_CACHE_MAX_STATES),
+        )
+
+        @callback
+        def _async_purged(event):
+            """Forget the cached states, they may have been purged."""
+            cache.async_clear()
+
+        hass.bus.async_listen(EVENT_RECORDER_PURGE_PROGRESS, _async_purged)
 
     return True
 
 
+@websocket_api.websocket_command({vol.Required("type"): "history/cache_info"})
+@websocket_api.require_admin
+@callback
+def ws_cache_info(hass, connection, msg):
+    """Return the hits, misses and size of the history cache."""
+    cache = hass.data.get(DATA_CACHE)
+    connection.send_result(msg["id"], cache.info() if cache is not None else None)
+
+
+def _is_significant(state, significant_changes_only):
+    """Return if a state change would be returned as a significant state."""
+    return (
+        not significant_changes_only
+        or split_entity_id(state.entity_id)[0] in SIGNIFICANT_DOMAINS
+        or state.last_changed == state.last_updated
+    )
+
+
+class LiveHistory:
+    """Send the significant state changes of entities as they happen.
+
+    Changes are held back until the history they follow was sent.
+    """
+
+    def __init__(self, connection, msg_id, significant_changes_only, minimal_response):
+        """Initialize the live history."""
+        self._connection = connection
+        self._msg_id = msg_id
+        self._significant_changes_only = significant_changes_only
+        self._minimal_response = minimal_response
+        self._pending = []
+        self._last_states = {}
+
+    @callback
+    def async_start(self, history, current_states):
+        """Send the history, followed by the changes that happened since.
+
+        current_states are the states when the subscription started, they
+        are sent when they are newer than the history from the database.
+        """
+        self._connection.send_message(
+            websocket_api.event_message(self._msg_id, {"states": history})
+        )
+        newer_states = []
+        for state in current_states:
+            ent_results = history.get(state.entity_id)
+            if ent_results:
+                self._last_states[state.entity_id] = ent_results[-1].state
+                if state.last_updated <= ent_results[-1].last_updated:
+                    continue
+            if _is_significant(state, self._significant_changes_only):
+                newer_states.append(state)
+        pending = self._pending
+        self._pending = None
+        self._send(newer_states + pending)
+
+    @callback
+    def async_state_changed(self, event):
+        """Send a state change if it is significant."""
+        new_state = event.data["new_state"]
+        if new_state is None or not _is_significant(
+            new_state, self._significant_changes_only
+        ):
+            return
+        if self._pending is not None:
+            self._pending.append(new_state)
+            return
+        self._send([new_state])
+
+    def _send(self, states):
+        """Send states in the format of the history API."""
+        result = defaultdict(list)
+        for state in states:
+            if (
+                self._minimal_response
+                and state.domain not in NEED_ATTRIBUTE_DOMAINS
+                and state.entity_id in self._last_states
+            ):
+                # Like the history, only the state and last_changed
+                # after the first state and without duplicates
+                if state.state == self._last_states[state.entity_id]:
+                    continue
+                result[state.entity_id].append(
+                    {
+                        STATE_KEY: state.state,
+                        LAST_CHANGED_KEY: process_timestamp_to_utc_isoformat(
+                            state.last_changed
+                        ),
+                    }
+                )
+            else:
+                result[state.entity_id].append(state)
+            self._last_states[state.entity_id] = state.state
+
+        if result:
+            self._connection.send_message(
+                websocket_api.event_message(self._msg_id, {"states": result})
+            )
+
+
+def _downsample_history(history, max_points):
+    """Downsample the states of every entity in a history result."""
+    if not max_points:
+        return
+    for entity_id, states in history.items():
+        history[entity_id] = downsample(states, max_points)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "history/stream",
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Required("entity_ids"): cv.entity_ids,
+        vol.Optional("include_start_time_state", default=True): bool,
+        vol.Optional("significant_changes_only", default=True): bool,
+        vol.Optional("minimal_response", default=False): bool,
+        vol.Optional("max_points"): vol.All(vol.Coerce(int), vol.Range(min=MIN_POINTS)),
+    }
+)
+@websocket_api.async_response
+async def ws_stream(hass, connection, msg):
+    """Send the history of entities once and then their changes as they happen.
+
+    The history is read from the database, later changes come from the
+    state machine, so the database is only queried when subscribing.
+    Only the history is downsampled with max_points.
+    """
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg["id"], "invalid_start_time", "Invalid start_time")
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    end_time = None
+    if "end_time" in msg:
+        end_time = dt_util.parse_datetime(msg["end_time"])
+        if end_time is None:
+            connection.send_error(msg["id"], "invalid_end_time", "Invalid end_time")
+            return
+        end_time = dt_util.as_utc(end_time)
+
+    entity_ids = msg["entity_ids"]
+    for entity_id in entity_ids:
+        if not connection.user.permissions.check_entity(entity_id, POLICY_READ):
+            raise Unauthorized(entity_id=entity_id)
+
+    now = dt_util.utcnow()
+    history_args = (
+        hass,
+        start_time,
+        now if end_time is None else min(end_time, now),
+        entity_ids,
+        None,
+        msg["include_start_time_state"],
+        msg["significant_changes_only"],
+        msg["minimal_response"],
+    )
+
+    if end_time is not None and end_time <= now:
+        # Nothing will change anymore
+        history = await hass.async_add_executor_job(
+            get_significant_states, *history_args
+        )
+        _downsample_history(history, msg.get("max_points"))
+        connection.send_result(msg["id"])
+        connection.send_message(
+            websocket_api.event_message(msg["id"], {"states": history})
+        )
+        return
+
+    live_history = LiveHistory(
+        connection,
+        msg["id"],
+        msg["significant_changes_only"],
+        msg["minimal_response"],
+    )
+    unsubs = [
+        async_track_state_change_event(
+            hass, entity_ids, live_history.async_state_changed
+        )
+    ]
+
+    @callback
+    def _async_unsubscribe():
+        """Stop sending changes."""
+        while unsubs:
+            unsubs.pop()()
+
+    if end_time is not None:
+
+        @callback
+        def _async_end_reached(_now):
+            """Stop sending changes at the end time."""
+            connection.subscriptions.pop(msg["id"], None)
+            _async_unsubscribe()
+
+        unsubs.append(async_track_point_in_utc_time(hass, _async_end_reached, end_time))
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    current_states = [
+        state for state in map(hass.states.get, entity_ids) if state is not None
+    ]
+    connection.send_result(msg["id"])
+
+    history = await hass.async_add_executor_job(get_significant_states, *history_args)
+    _downsample_history(history, msg.get("max_points"))
+    if not unsubs:
+        # Unsubscribed while the history was read
+        return
+    live_history.async_start(history, current_states)
+
+
 class HistoryPeriodView(HomeAssistantView):
     """Handle history period requests."""
 
@@ -465,7 +981,7 @@ class HistoryPeriodView(HomeAssistantView):
 
     async def get(
         self, request: web.Request, datetime: str | None = None
-    ) -> web.Response:
+    ) -> web.StreamResponse:
         """Return history over a period of time."""
         datetime_ = None
         if datetime:
@@ -494,6 +1010,15 @@ class HistoryPeriodView(HomeAssistantView):
                 return self.json_message("Invalid end_time", HTTP_BAD_REQUEST)
         else:
             end_time = start_time + one_day
+        max_points = None
+        max_points_str = request.query.get("max_points")
+        if max_points_str:
+            try:
+                max_points = int(max_points_str)
+            except ValueError:
+                max_points = 0
+            if max_points < MIN_POINTS:
+                return self.json_message("Invalid max_points", HTTP_BAD_REQUEST)
         entity_ids_str = request.query.get("filter_entity_id")
         entity_ids = None
         if entity_ids_str:
@@ -514,6 +1039,18 @@ class HistoryPeriodView(HomeAssistantView):
         ):
             return self.json([])
 
+        if "stream" in request.query:
+            return await self._async_stream_significant_states(
+                request,
+                start_time,
+                end_time,
+                entity_ids,
+                include_start_time_state,
+                significant_changes_only,
+                minimal_response,
+                max_points,
+            )
+
         return cast(
             web.Response,
             await hass.async_add_executor_job(
@@ -525,9 +1062,100 @@ class HistoryPeriodView(HomeAssistantView):
                 include_start_time_state,
                 significant_changes_only,
                 minimal_response,
+                max_points,
             ),
         )
 
+    async def _async_stream_significant_states(
+        self,
+        request: web.Request,
+        start_time: dt,
+        end_time: dt | None,
+        entity_ids: list[str] | None,
+        include_start_time_state: bool,
+        significant_changes_only: bool,
+        minimal_response: bool,
+        max_points: int | None,
+    ) -> web.StreamResponse:
+        """Stream significant states from the database as chunked json.
+
+        The states are read and serialized in the executor while the
+        response is written, so the whole period is never held in memory.
+        The body is the same as the one of the buffered response.
+        If reading the states fails the connection is closed without ending
+        the body, so the client sees an incomplete response.
+        """
+        hass = request.app["hass"]
+        pieces: asyncio.Queue[str | None] = asyncio.Queue(STREAM_QUEUE_SIZE)
+        cancel = threading.Event()
+        failed = threading.Event()
+
+        def _produce():
+            """Put the pieces of the response on the queue."""
+            try:
+                with session_scope(hass=hass) as session:
+                    buffer = []
+                    size = 0
+                    for piece in _stream_significant_states(
+                        hass,
+                        session,
+                        start_time,
+                        end_time,
+                        entity_ids,
+                        self.filters,
+                        include_start_time_state,
+                        significant_changes_only,
+                        minimal_response,
+                        max_points,
+                        self.use_include_order,
+                    ):
+                        buffer.append(piece)
+                        size += len(piece)
+                        if size < STREAM_CHUNK_SIZE:
+                            continue
+                        if cancel.is_set():
+                            return
+                        asyncio.run_coroutine_threadsafe(
+                            pieces.put("".join(buffer)), hass.loop
+                        ).result()
+                        buffer = []
+                        size = 0
+                    if buffer and not cancel.is_set():
+                        asyncio.run_coroutine_threadsafe(
+                            pieces.put("".join(buffer)), hass.loop
+                        ).result()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error streaming history")
+                failed.set()
+            finally:
+                asyncio.run_coroutine_threadsafe(pieces.put(None), hass.loop)
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "application/json; charset=utf-8"}
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        hass.async_add_executor_job(_produce)
+        drained = False
+        try:
+            while (piece := await pieces.get()) is not None:
+                await response.write(piece.encode("utf-8"))
+            drained = True
+            if failed.is_set():
+                # The body is already partly sent, the status can't change
+                if request.transport is not None:
+                    request.transport.close()
+                return response
+            await response.write_eof()
+        finally:
+            if not drained:
+                # The client went away, unblock the producer so it stops
+                cancel.set()
+                while await pieces.get() is not None:
+                    pass
+        return response
+
     def _sorted_significant_states_json(
         self,
         hass,
@@ -537,6 +1165,7 @@ class HistoryPeriodView(HomeAssistantView):
         include_start_time_state,
         significant_changes_only,
         minimal_response,
+        max_points,
     ):
         """Fetch significant stats from the database as json."""
         timer_start = time.perf_counter()
@@ -554,7 +1183,13 @@ class HistoryPeriodView(HomeAssistantView):
                 minimal_response,
             )
 
-        result = list(result.values())
+        if entity_ids is None:
+            # The same order as the streamed response
+            result = [result[ent_id] for ent_id in sorted(result)]
+        else:
+            result = list(result.values())
+        if max_points:
+            result = [downsample(states, max_points) for states in result]
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
             _LOGGER.debug("Extracted %d states in %fs", sum(map(len, result)), elapsed)
@@ -572,7 +1207,60 @@ class HistoryPeriodView(HomeAssistantView):
             sorted_result.extend(result)
             result = sorted_result
 
-        return self.json(result)
+        try:
+            return self.json_str(json_dumps_list(result))
+        except (ValueError, TypeError):
+            # Let json log the data that can not be serialized
+            return self.json(result)
+
+
+class HistoryStatisticsView(HomeAssistantView):
+    """Handle requests for the hourly statistics of numeric sensors.
+
+    The statistics are kept after states are purged, which makes them
+    suited for long periods.
+    """
+
+    url = "/api/history/statistics/period"
+    name = "api:history:view-statistics-period"
+    extra_urls = ["/api/history/statistics/period/{datetime}"]
+
+    async def get(
+        self, request: web.Request, datetime: str | None = None
+    ) -> web.StreamResponse:
+        """Return the statistics over a period of time."""
+        now = dt_util.utcnow()
+
+        if datetime:
+            datetime_ = dt_util.parse_datetime(datetime)
+
+            if datetime_ is None:
+                return self.json_message("Invalid datetime", HTTP_BAD_REQUEST)
+            start_time = dt_util.as_utc(datetime_)
+        else:
+            start_time = now - timedelta(days=1)
+
+        if start_time > now:
+            return self.json({})
+
+        end_time_str = request.query.get("end_time")
+        end_time = None
+        if end_time_str:
+            end_time = dt_util.parse_datetime(end_time_str)
+            if end_time is None:
+                return self.json_message("Invalid end_time", HTTP_BAD_REQUEST)
+            end_time = dt_util.as_utc(end_time)
+
+        entity_ids_str = request.query.get("filter_entity_id")
+        entity_ids = None
+        if entity_ids_str:
+            entity_ids = entity_ids_str.lower().split(",")
+
+        hass = request.app["hass"]
+        statistics = await hass.async_add_executor_job(
+            statistics_during_period, hass, start_time, end_time, entity_ids
+        )
+        return self.json(statistics)
 
 
 def sqlalchemy_filter_from_include_exclude_conf(conf):
@@ -637,23 +1325,29 @@ class Filters:
 
         baked_query += lambda q: q.filter(self.entity_filter())
 
-    def entity_filter(self):
-        """Generate the entity filter query."""
+    def entity_filter(
+        self, domain_column=States.domain, entity_id_column=States.entity_id
+    ):
+        """Generate the entity filter query.
+
+        Filters the states table, unless the columns of another table
+        with domains and entity ids are passed.
+        """
         includes = []
         if self.included_domains:
-            includes.append(States.domain.in_(self.included_domains))
+            includes.append(domain_column.in_(self.included_domains))
         if self.included_entities:
-            includes.append(States.entity_id.in_(self.included_entities))
+            includes.append(entity_id_column.in_(self.included_entities))
         for glob in self.included_entity_globs:
-            includes.append(_glob_to_like(glob))
+            includes.append(_glob_to_like(glob, entity_id_column))
 
         excludes = []
         if self.excluded_domains:
-            excludes.append(States.domain.in_(self.excluded_domains))
+            excludes.append(domain_column.in_(self.excluded_domains))
         if self.excluded_entities:
-            excludes.append(States.entity_id.in_(self.excluded_entities))
+            excludes.append(entity_id_column.in_(self.excluded_entities))
         for glob in self.excluded_entity_globs:
-            excludes.append(_glob_to_like(glob))
+            excludes.append(_glob_to_like(glob, entity_id_column))
 
         if not includes and not excludes:
             return None
@@ -667,9 +1361,9 @@ class Filters:
         return or_(*includes) & not_(or_(*excludes))
 
 
-def _glob_to_like(glob_str):
+def _glob_to_like(glob_str, entity_id_column=States.entity_id):
     """Translate glob to sql."""
-    return States.entity_id.like(glob_str.translate(GLOB_TO_SQL_CHARS))
+    return entity_id_column.like(glob_str.translate(GLOB_TO_SQL_CHARS))
 
 
 def _entities_may_have_state_changes_after(
@@ -713,9 +1407,11 @@ class LazyState(State):
         """State attributes."""
         if not self._attributes:
             try:
-                self._attributes = json.loads(self._row.attributes)
+                self._attributes = json_loads(
+                    self._row.shared_attrs or self._row.attributes
+                )
             except ValueError:
-                # When json.loads fails
+                # When json_loads fails
                 _LOGGER.exception("Error converting row to state: %s", self)
                 self._attributes = {}
         return self._attributes
@@ -761,6 +1457,14 @@ class LazyState(State):
         """Set last updated datetime."""
         self._last_updated = value
 
+    def as_json(self):
+        """Return a JSON representation of the LazyState.
+
+        The LazyState lives only for a single request, so the JSON
+        is not cached.
+        """
+        return json_dumps(self.as_dict(), allow_nan=False)
+
     def as_dict(self):
         """Return a dict representation of the LazyState.
 
@@ -0,0 +1,270 @@
+"""In-memory cache of the recent history of entities."""
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+import threading
+from typing import Any, Callable, Iterable
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+import homeassistant.util.dt as dt_util
+
+BackfillType = Callable[
+    [Iterable[str], datetime], "dict[str, tuple[State | None, list[State]]]"
+]
+
+
+def state_at(state: State, time: datetime) -> State:
+    """Return a copy of a state as if it was set at time."""
+    return State(
+        state.entity_id,
+        state.state,
+        state.attributes,
+        time,
+        time,
+        state.context,
+        validate_entity_id=False,
+    )
+
+
+class EntityHistory:
+    """The recent states of one entity.
+
+    Every change of the entity after since is kept, initial is the state
+    the entity had at since. The oldest changes become the initial state
+    when there are more than max_states or they left the window.
+    """
+
+    __slots__ = ("since", "initial", "states", "unsub")
+
+    def __init__(
+        self, since: datetime, initial: State | None, states: Iterable[State]
+    ) -> None:
+        """Initialize the history of an entity."""
+        self.since = since
+        self.initial = initial
+        self.states: deque[State] = deque(states)
+        self.unsub: CALLBACK_TYPE | None = None
+
+    @property
+    def last_updated(self) -> datetime | None:
+        """Return when the last known state was set."""
+        if self.states:
+            return self.states[-1].last_updated
+        if self.initial is not None:
+            return self.initial.last_updated
+        return None
+
+    def add(self, state: State) -> bool:
+        """Add a new state, return False if it is older than the known states."""
+        last_updated = self.last_updated
+        if last_updated is not None and state.last_updated <= last_updated:
+            # Already known from the database, or set with a time in the past
+            return state.last_updated == last_updated
+        self.states.append(state)
+        return True
+
+    def trim(self, window_start: datetime, max_states: int) -> None:
+        """Forget the changes before the window or over the limit."""
+        states = self.states
+        while len(states) > max_states or (
+            len(states) > 1 and states[1].last_updated <= window_start
+        ):
+            self.initial = states.popleft()
+            self.since = self.initial.last_updated
+
+    def state_at(self, time: datetime) -> State | None:
+        """Return the state of the entity just before time."""
+        for state in reversed(self.states):
+            if state.last_updated < time:
+                return state
+        return self.initial
+
+    def changes_during(self, start_time: datetime, end_time: datetime | None) -> list:
+        """Return the changes between start_time and end_time."""
+        return [
+            state
+            for state in self.states
+            if start_time < state.last_updated
+            and (end_time is None or state.last_updated < end_time)
+        ]
+
+
+class HistoryCache:
+    """Cache the recent states of the entities history is asked for.
+
+    An entity is tracked after the first query for its recent history
+    missed the cache. Its states in the window are read from the
+    database once and kept up to date from state changed events, so
+    later queries that start inside the window do not need the database.
+    The least recently used entities are dropped over max_entities.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        backfill: BackfillType,
+        should_track: Callable[[str], bool],
+        window: timedelta,
+        max_entities: int,
+        max_states: int,
+    ) -> None:
+        """Initialize the cache.
+
+        backfill reads the states of entities since a time from the
+        database, it is run in the executor.
+        """
+        self.hass = hass
+        self.window = window
+        self.max_entities = max_entities
+        self.max_states = max_states
+        self.hits = 0
+        self.misses = 0
+        self._backfill = backfill
+        self._should_track = should_track
+        self._entities: OrderedDict[str, EntityHistory] = OrderedDict()
+        self._pending: dict[str, list[State | None]] = {}
+        self._pending_unsubs: dict[str, CALLBACK_TYPE] = {}
+        self._generation = 0
+        # Read from executor threads, changed in the event loop
+        self._lock = threading.Lock()
+
+    def info(self) -> dict[str, Any]:
+        """Return the cache metrics."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entities": len(self._entities),
+                "states": sum(len(entry.states) for entry in self._entities.values()),
+                "max_entities": self.max_entities,
+                "max_states": self.max_states,
+            }
+
+    def get(
+        self, entity_ids: Iterable[str], start_time: datetime
+    ) -> dict[str, EntityHistory] | None:
+        """Return the history of entities if it is cached from before start_time.
+
+        Misses of recent history start tracking the entities.
+        """
+        result = {}
+        with self._lock:
+            for entity_id in entity_ids:
+                entry = self._entities.get(entity_id)
+                if entry is None or start_time <= entry.since:
+                    break
+                result[entity_id] = entry
+            else:
+                self.hits += 1
+                for entity_id in result:
+                    self._entities.move_to_end(entity_id)
+                # Copies to read without the lock
+                return {
+                    entity_id: EntityHistory(entry.since, entry.initial, entry.states)
+                    for entity_id, entry in result.items()
+                }
+            self.misses += 1
+
+        if start_time >= dt_util.utcnow() - self.window:
+            self.hass.add_job(self.async_track, list(entity_ids))
+        return None
+
+    async def async_track(self, entity_ids: list[str]) -> None:
+        """Start caching the history of entities."""
+        entity_ids = [
+            entity_id
+            for entity_id in entity_ids[: self.max_entities]
+            if entity_id not in self._entities
+            and entity_id not in self._pending
+            and self._should_track(entity_id)
+        ]
+        if not entity_ids:
+            return
+
+        generation = self._generation
+        for entity_id in entity_ids:
+            # Changes that happen while the database is read, after the
+            # state the entity has now
+            self._pending[entity_id] = [self.hass.states.get(entity_id)]
+            self._pending_unsubs[entity_id] = self.hass.bus.async_listen_entity(
+                [entity_id], self._async_state_changed
+            )
+
+        since = dt_util.utcnow() - self.window
+        try:
+            backfilled = await self.hass.async_add_executor_job(
+                self._backfill, entity_ids, since
+            )
+        except Exception:
+            for entity_id in entity_ids:
+                self._pending.pop(entity_id)
+                self._pending_unsubs.pop(entity_id)()
+            raise
+
+        with self._lock:
+            for entity_id in entity_ids:
+                current, *changes = self._pending.pop(entity_id)
+                unsub = self._pending_unsubs.pop(entity_id)
+                new_states: list[State] = [
+                    change for change in changes if change is not None
+                ]
+                if generation != self._generation or len(new_states) != len(changes):
+                    # Purged or removed meanwhile
+                    unsub()
+                    continue
+
+                initial, states = backfilled.get(entity_id, (None, []))
+                entry = EntityHistory(since, initial, states)
+                last_updated = entry.last_updated
+                if current is not None and (
+                    last_updated is None or current.last_updated > last_updated
+                ):
+                    # The recorder did not write the latest changes yet,
+                    # the history is only complete from the current state
+                    entry = EntityHistory(current.last_updated, current, [])
+                entry.unsub = unsub
+                self._entities[entity_id] = entry
+                for state in new_states:
+                    if not entry.add(state):
+                        self._async_untrack(entity_id)
+                        break
+                else:
+                    entry.trim(dt_util.utcnow() - self.window, self.max_states)
+
+            while len(self._entities) > self.max_entities:
+                self._async_untrack(next(iter(self._entities)))
+
+    @callback
+    def async_clear(self) -> None:
+        """Forget all states, for example after they were purged."""
+        with self._lock:
+            self._generation += 1
+            for entity_id in list(self._entities):
+                self._async_untrack(entity_id)
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Add the new state of an entity."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data["new_state"]
+        with self._lock:
+            pending = self._pending.get(entity_id)
+            if pending is not None:
+                pending.append(new_state)
+                return
+
+            entry = self._entities.get(entity_id)
+            if entry is None:
+                return
+            if new_state is None or not entry.add(new_state):
+                self._async_untrack(entity_id)
+                return
+            entry.trim(new_state.last_updated - self.window, self.max_states)
+
+    @callback
+    def _async_untrack(self, entity_id: str) -> None:
+        """Stop caching an entity, the lock must be held."""
+        entry = self._entities.pop(entity_id)
+        if entry.unsub is not None:
+            entry.unsub()
@@ -0,0 +1,64 @@
+"""Downsample the history of numeric entities for graphs."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+
+# The first and the last state and the lowest and highest value between them
+MIN_POINTS = 4
+
+
+def _state_value(item: Any) -> float | None:
+    """Return the numeric value of a state or minimal state, if it has one."""
+    state = item["state"] if isinstance(item, dict) else item.state
+    try:
+        return float(state)
+    except ValueError:
+        return None
+
+
+def downsample(states: list, max_points: int) -> list:
+    """Reduce the states of a numeric entity to about max_points.
+
+    The states between the first and the last one are split in buckets
+    of the same number of states. Only the lowest and highest value of
+    each bucket are kept, so peaks stay visible in a graph. States that
+    are not numeric, like unavailable, are always kept. The states of
+    entities without a unit of measurement are returned as they are.
+
+    max_points must be at least MIN_POINTS.
+    """
+    if len(states) <= max_points:
+        return states
+    last = states[-1]
+    if isinstance(last, dict) or ATTR_UNIT_OF_MEASUREMENT not in last.attributes:
+        return states
+
+    buckets = (max_points - 2) // 2
+    middle = len(states) - 2
+    result = [states[0]]
+    for bucket in range(buckets):
+        low = 1 + bucket * middle // buckets
+        high = 1 + (bucket + 1) * middle // buckets
+        keep = []
+        min_index: int | None = None
+        max_index: int | None = None
+        min_value = max_value = 0.0
+        for index in range(low, high):
+            value = _state_value(states[index])
+            if value is None:
+                keep.append(index)
+                continue
+            if min_index is None or max_index is None:
+                min_index = max_index = index
+                min_value = max_value = value
+            elif value < min_value:
+                min_index, min_value = index, value
+            elif value > max_value:
+                max_index, max_value = index, value
+        if min_index is not None and max_index is not None:
+            keep.extend({min_index, max_index})
+        result.extend(states[index] for index in sorted(keep))
+    result.append(last)
+    return result
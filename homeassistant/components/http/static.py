@@ -1,48 +1,183 @@
 """Static file handling for HTTP component."""
+from __future__ import annotations
+
+import asyncio
+import mimetypes
 from pathlib import Path
+from typing import NamedTuple
 
 from aiohttp import hdrs
-from aiohttp.web import FileResponse
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.web import BaseRequest, FileResponse, Response
 from aiohttp.web_exceptions import HTTPForbidden, HTTPNotFound
 from aiohttp.web_urldispatcher import StaticResource
+from multidict import CIMultiDict
 
 # mypy: allow-untyped-defs
 
 CACHE_TIME = 31 * 86400  # = 1 month
-CACHE_HEADERS = {hdrs.CACHE_CONTROL: f"public, max-age={CACHE_TIME}"}
+CACHE_HEADERS: dict[str, str] = {hdrs.CACHE_CONTROL: f"public, max-age={CACHE_TIME}"}
+
+# Pre-compressed variants stored next to a file, in order of preference
+ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticFile(NamedTuple):
+    """A file of a static resource with its pre-compressed variants."""
+
+    path: Path
+    content_type: str
+    variants: tuple[tuple[str, Path], ...]
+
+    def select(self, accept_encoding: str) -> tuple[str | None, Path]:
+        """Return the encoding and path of the variant to send.
+
+        The accepted variant with the highest q-value is sent, the order of
+        ENCODING_SUFFIXES breaks ties.
+        """
+        if not self.variants or not accept_encoding:
+            return None, self.path
+        accepted = _accepted_encodings(accept_encoding)
+        selected: tuple[str | None, Path] = (None, self.path)
+        best_quality = 0.0
+        for encoding, path in self.variants:
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if quality > best_quality:
+                selected, best_quality = (encoding, path), quality
+        return selected
+
+
+class SelectedFileResponse(FileResponse):
+    """A file response that sends the file it was given.
+
+    FileResponse sends the .gz file next to its path instead when the
+    Accept-Encoding header contains gzip, even with q=0. The variant to
+    send is already selected from the header here.
+    """
+
+    async def prepare(self, request: BaseRequest) -> AbstractStreamWriter | None:
+        """Prepare the response without the Accept-Encoding of the request."""
+        if hdrs.ACCEPT_ENCODING in request.headers:
+            headers = CIMultiDict(request.headers)
+            del headers[hdrs.ACCEPT_ENCODING]
+            request = request.clone(headers=headers)
+        return await super().prepare(request)
 
 
 class CachingStaticResource(StaticResource):
-    """Static Resource handler that will add cache headers."""
+    """Static Resource handler that will add cache headers.
+
+    The file a url resolves to and its pre-compressed variants are looked
+    up once in the executor. Responses carry a strong ETag so revalidating
+    a cached file only costs a stat in the executor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the static resource."""
+        super().__init__(*args, **kwargs)
+        self._files: dict[str, StaticFile] = {}
+
+    def _lookup(self, rel_url: str) -> StaticFile | None:
+        """Return the file of a url or None for a directory.
+
+        This method does disk I/O and must be run in the executor.
+        """
+        filename = Path(rel_url)
+        if filename.anchor:
+            # rel_url is an absolute name like
+            # /static/\\machine_name\c$ or /static/D:\path
+            # where the static dir is totally different
+            raise HTTPForbidden()
+        filepath = self._directory.joinpath(filename).resolve()
+        if not self._follow_symlinks:
+            filepath.relative_to(self._directory)
+
+        # on opening a dir, load its contents if allowed
+        if filepath.is_dir():
+            return None
+        if not filepath.is_file():
+            raise FileNotFoundError(filepath)
+
+        content_type = mimetypes.guess_type(str(filepath))[0]
+        variants = []
+        for encoding, suffix in ENCODING_SUFFIXES:
+            variant = filepath.with_name(filepath.name + suffix)
+            if variant.is_file():
+                variants.append((encoding, variant))
+        return StaticFile(
+            filepath, content_type or "application/octet-stream", tuple(variants)
+        )
 
     async def _handle(self, request):
         rel_url = request.match_info["filename"]
+        loop = asyncio.get_running_loop()
+        static_file = self._files.get(rel_url)
+
+        if static_file is None:
+            try:
+                static_file = await loop.run_in_executor(None, self._lookup, rel_url)
+            except (ValueError, FileNotFoundError) as error:
+                # relatively safe
+                raise HTTPNotFound() from error
+            except Exception as error:
+                # perm error or other kind!
+                request.app.logger.exception(error)
+                raise HTTPNotFound() from error
+
+            if static_file is None:
+                return await super()._handle(request)
+            self._files[rel_url] = static_file
+
+        encoding, filepath = static_file.select(
+            request.headers.get(hdrs.ACCEPT_ENCODING, "")
+        )
         try:
-            filename = Path(rel_url)
-            if filename.anchor:
-                # rel_url is an absolute name like
-                # /static/\\machine_name\c$ or /static/D:\path
-                # where the static dir is totally different
-                raise HTTPForbidden()
-            filepath = self._directory.joinpath(filename).resolve()
-            if not self._follow_symlinks:
-                filepath.relative_to(self._directory)
-        except (ValueError, FileNotFoundError) as error:
-            # relatively safe
-            raise HTTPNotFound() from error
-        except Exception as error:
-            # perm error or other kind!
-            request.app.logger.exception(error)
+            stat = await loop.run_in_executor(None, filepath.stat)
+        except OSError as error:
+            # The file was removed since it was looked up
+            self._files.pop(rel_url, None)
             raise HTTPNotFound() from error
 
-        # on opening a dir, load its contents if allowed
-        if filepath.is_dir():
-            return await super()._handle(request)
-        if filepath.is_file():
-            return FileResponse(
-                filepath,
-                chunk_size=self._chunk_size,
-                # type ignore: https://github.com/aio-libs/aiohttp/pull/3976
-                headers=CACHE_HEADERS,  # type: ignore
-            )
-        raise HTTPNotFound
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        etag = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+        headers: dict[str, str] = {**CACHE_HEADERS, hdrs.ETAG: etag}
+        if static_file.variants:
+            headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+
+        if _etag_matches(request.headers.get(hdrs.IF_NONE_MATCH), etag):
+            return Response(status=304, headers=headers)
+
+        headers[hdrs.CONTENT_TYPE] = static_file.content_type
+        if encoding is not None:
+            headers[hdrs.CONTENT_ENCODING] = encoding
+        return SelectedFileResponse(
+            filepath,
+            chunk_size=self._chunk_size,
+            headers=headers,
+        )
+
+
+def _accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """Return the q-value of each coding in an Accept-Encoding header."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Return if an If-None-Match header matches the ETag."""
+    if if_none_match is None:
+        return False
+    return any(
+        tag.strip() in ("*", etag, f"W/{etag}") for tag in if_none_match.split(",")
+    )
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 from typing import Any, Callable
 
@@ -18,7 +17,7 @@ import voluptuous as vol
 from homeassistant import exceptions
 from homeassistant.const import CONTENT_TYPE_JSON, HTTP_OK, HTTP_SERVICE_UNAVAILABLE
 from homeassistant.core import Context, is_callback
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
 from .const import KEY_AUTHENTICATED, KEY_HASS
 
@@ -51,12 +50,21 @@ class HomeAssistantView:
     ) -> web.Response:
         """Return a JSON response."""
         try:
-            msg = json.dumps(result, cls=JSONEncoder, allow_nan=False).encode("UTF-8")
+            msg = json_dumps(result, allow_nan=False)
         except (ValueError, TypeError) as err:
             _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, result)
             raise HTTPInternalServerError from err
+        return HomeAssistantView.json_str(msg, status_code, headers)
+
+    @staticmethod
+    def json_str(
+        result: str,
+        status_code: int = HTTP_OK,
+        headers: LooseHeaders | None = None,
+    ) -> web.Response:
+        """Return a JSON response of a result that is already serialized."""
         response = web.Response(
-            body=msg,
+            body=result.encode("UTF-8"),
             content_type=CONTENT_TYPE_JSON,
             status=status_code,
             headers=headers,
@@ -1,8 +1,9 @@
 """Event parser and human readable log generator."""
+from collections import OrderedDict
 from contextlib import suppress
 from datetime import timedelta
 from itertools import groupby
-import json
+import logging
 import re
 
 import sqlalchemy
@@ -10,12 +11,18 @@ from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import literal
 import voluptuous as vol
 
+from homeassistant.components import websocket_api
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
 from homeassistant.components.history import sqlalchemy_filter_from_include_exclude_conf
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.models import (
     Events,
+    LogbookEntries,
+    RecorderRuns,
+    StateAttributes,
     States,
+    process_timestamp,
     process_timestamp_to_utc_isoformat,
 )
 from homeassistant.components.recorder.util import session_scope
@@ -27,6 +34,7 @@ from homeassistant.const import (
     ATTR_ICON,
     ATTR_NAME,
     ATTR_SERVICE,
+    ATTR_UNIT_OF_MEASUREMENT,
     EVENT_CALL_SERVICE,
     EVENT_HOMEASSISTANT_START,
     EVENT_HOMEASSISTANT_STOP,
@@ -42,22 +50,29 @@ from homeassistant.helpers.entityfilter import (
     convert_include_exclude_filter,
     generate_filter,
 )
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.integration_platform import (
     async_process_integration_platforms,
 )
+from homeassistant.helpers.json import json_dumps, json_dumps_list, json_loads
 from homeassistant.loader import bind_hass
 import homeassistant.util.dt as dt_util
 
-ENTITY_ID_JSON_TEMPLATE = '"entity_id": "{}"'
-ENTITY_ID_JSON_EXTRACT = re.compile('"entity_id": "([^"]+)"')
-DOMAIN_JSON_EXTRACT = re.compile('"domain": "([^"]+)"')
-ICON_JSON_EXTRACT = re.compile('"icon": "([^"]+)"')
+_LOGGER = logging.getLogger(__name__)
+
+# Event data is stored compact, rows written before may have a space after
+# the separator.
+ENTITY_ID_JSON_TEMPLATES = ('"entity_id":"{}"', '"entity_id": "{}"')
+ENTITY_ID_JSON_EXTRACT = re.compile('"entity_id": ?"([^"]+)"')
+DOMAIN_JSON_EXTRACT = re.compile('"domain": ?"([^"]+)"')
+ICON_JSON_EXTRACT = re.compile('"icon": ?"([^"]+)"')
 
 ATTR_MESSAGE = "message"
 
 CONTINUOUS_DOMAINS = ["proximity", "sensor"]
 
 DOMAIN = "logbook"
+DATA_FILTERS = "logbook_filters"
 
 GROUP_BY_MINUTES = 15
 
@@ -66,6 +81,12 @@ UNIT_OF_MEASUREMENT_JSON = '"unit_of_measurement":'
 
 HA_DOMAIN_ENTITY_ID = f"{HA_DOMAIN}."
 
+# The number of contexts the logbook index remembers the first event of
+CONTEXT_CACHE_SIZE = 4096
+
+# Seconds to wait for the recorder to write the events of a subscription
+RECORDER_COMMIT_TIMEOUT = 10
+
 CONFIG_SCHEMA = vol.Schema(
     {DOMAIN: INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA}, extra=vol.ALLOW_EXTRA
 )
@@ -161,6 +182,12 @@ async def async_setup(hass, config):
         entities_filter = None
 
     hass.http.register_view(LogbookView(conf, filters, entities_filter))
+    hass.data[DATA_FILTERS] = (filters, entities_filter)
+    websocket_api.async_register_command(hass, ws_event_stream)
+
+    instance = hass.data.get(DATA_INSTANCE)
+    if instance is not None:
+        instance.set_logbook_indexer(LogbookIndexer(hass))
 
     hass.services.async_register(DOMAIN, "log", log_message, schema=LOG_MESSAGE_SCHEMA)
 
@@ -241,22 +268,188 @@ class LogbookView(HomeAssistantView):
 
         def json_events():
             """Fetch events and generate JSON."""
-            return self.json(
-                _get_events(
-                    hass,
-                    start_day,
-                    end_day,
-                    entity_ids,
-                    self.filters,
-                    self.entities_filter,
-                    entity_matches_only,
-                    context_id,
+            return self.json_str(
+                json_dumps_list(
+                    _get_entries(
+                        hass,
+                        start_day,
+                        end_day,
+                        entity_ids,
+                        self.filters,
+                        self.entities_filter,
+                        entity_matches_only,
+                        context_id,
+                    )
                 )
             )
 
         return await hass.async_add_executor_job(json_events)
 
 
+class LiveLogbook:
+    """Send the logbook entries of events as they happen.
+
+    Entries are held back until the entries they follow were sent.
+    """
+
+    def __init__(self, hass, connection, msg_id, entities_filter):
+        """Initialize the live logbook."""
+        self._describer = LogbookIndexer(hass)
+        self._connection = connection
+        self._msg_id = msg_id
+        self._entities_filter = entities_filter
+        self._pending = []
+
+    @callback
+    def async_start(self, message):
+        """Send the serialized message with the earlier entries, then the new ones."""
+        self._connection.send_message(message)
+        pending = self._pending
+        self._pending = None
+        self._send(pending)
+
+    @callback
+    def async_event(self, event):
+        """Send the entry of an event if it has one that is not filtered."""
+        described = self._describer.describe(event)
+        if described is None:
+            return
+        entity_id, domain, data = described
+        if self._entities_filter is not None and not self._entities_filter(
+            entity_id or f"{domain}."
+        ):
+            return
+        entry = {"when": process_timestamp_to_utc_isoformat(event.time_fired), **data}
+        if self._pending is not None:
+            self._pending.append(entry)
+            return
+        self._send([entry])
+
+    def _send(self, entries):
+        """Send entries in the format of the logbook API."""
+        if entries:
+            self._connection.send_message(
+                websocket_api.event_message(self._msg_id, {"events": entries})
+            )
+
+
+def _entries_message(msg_id, entries):
+    """Return the serialized event message of logbook entries."""
+    return (
+        f'{{"id":{msg_id},"type":"event","event":'
+        f'{{"events":{json_dumps_list(entries)}}}}}'
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "logbook/event_stream",
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("entity_ids"): cv.entity_ids,
+    }
+)
+@websocket_api.async_response
+async def ws_event_stream(hass, connection, msg):
+    """Send the logbook of a period once and then new entries as they happen.
+
+    The entries until now are read from the database, new entries are
+    described from the events on the bus. With entity_ids, only the state
+    changes of those entities are listened to.
+    """
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg["id"], "invalid_start_time", "Invalid start_time")
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    end_time = None
+    if "end_time" in msg:
+        end_time = dt_util.parse_datetime(msg["end_time"])
+        if end_time is None:
+            connection.send_error(msg["id"], "invalid_end_time", "Invalid end_time")
+            return
+        end_time = dt_util.as_utc(end_time)
+
+    filters, entities_filter = hass.data[DATA_FILTERS]
+    entity_ids = msg.get("entity_ids")
+    now = dt_util.utcnow()
+
+    def json_entries():
+        """Fetch the entries until now and serialize them."""
+        instance = hass.data.get(DATA_INSTANCE)
+        if instance is not None and not instance.commit(RECORDER_COMMIT_TIMEOUT):
+            # Events fired before subscribing are not sent live
+            _LOGGER.warning(
+                "The recorder did not commit within %s seconds, the logbook "
+                "sent to subscription %s may miss the latest events",
+                RECORDER_COMMIT_TIMEOUT,
+                msg["id"],
+            )
+        return _entries_message(
+            msg["id"],
+            _get_entries(
+                hass,
+                start_time,
+                now if end_time is None else min(end_time, now),
+                entity_ids,
+                filters,
+                entities_filter,
+            ),
+        )
+
+    if end_time is not None and end_time <= now:
+        # Nothing will happen anymore
+        message = await hass.async_add_executor_job(json_entries)
+        connection.send_result(msg["id"])
+        connection.send_message(message)
+        return
+
+    if entity_ids is not None:
+        live_logbook = LiveLogbook(
+            hass, connection, msg["id"], generate_filter([], entity_ids, [], [])
+        )
+        # State changes of other entities are dropped by the bus
+        unsubs = [hass.bus.async_listen_entity(entity_ids, live_logbook.async_event)]
+    else:
+        live_logbook = LiveLogbook(hass, connection, msg["id"], entities_filter)
+        unsubs = [
+            hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                live_logbook.async_event,
+                event_filter=_is_logbook_state_change,
+            )
+        ]
+    # Other events are described for the context of the entries they cause
+    for event_type in (*ALL_EVENT_TYPES_EXCEPT_STATE_CHANGED, *hass.data[DOMAIN]):
+        unsubs.append(hass.bus.async_listen(event_type, live_logbook.async_event))
+
+    @callback
+    def _async_unsubscribe():
+        """Stop sending entries."""
+        while unsubs:
+            unsubs.pop()()
+
+    if end_time is not None:
+
+        @callback
+        def _async_end_reached(_now):
+            """Stop sending entries at the end time."""
+            connection.subscriptions.pop(msg["id"], None)
+            _async_unsubscribe()
+
+        unsubs.append(async_track_point_in_utc_time(hass, _async_end_reached, end_time))
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"])
+
+    message = await hass.async_add_executor_job(json_entries)
+    if not unsubs:
+        # Unsubscribed while the entries were read
+        return
+    live_logbook.async_start(message)
+
+
 def humanify(hass, events, entity_attr_cache, context_lookup):
     """Generate a converted list of events into Entry objects.
 
@@ -422,6 +615,225 @@ def _get_events(
     context_id=None,
 ):
     """Get events for a period of time."""
+    return [
+        entry.as_dict() if isinstance(entry, IndexedEntry) else entry
+        for entry in _get_entries(
+            hass,
+            start_day,
+            end_day,
+            entity_ids,
+            filters,
+            entities_filter,
+            entity_matches_only,
+            context_id,
+        )
+    ]
+
+
+def _get_entries(
+    hass,
+    start_day,
+    end_day,
+    entity_ids=None,
+    filters=None,
+    entities_filter=None,
+    entity_matches_only=False,
+    context_id=None,
+):
+    """Get the logbook entries for a period of time.
+
+    The entries of the part of the period the logbook index covers are
+    read from the index. The events before are described as they are read,
+    sensors are grouped on each side of the start of the index.
+
+    With entity_matches_only the events are always described, the index
+    does not know which context events would be left out.
+    """
+    assert not (
+        entity_ids and context_id
+    ), "can't pass in both entity_ids and context_id"
+
+    index_start = None
+    if not (entity_ids and entity_matches_only):
+        with session_scope(hass=hass) as session:
+            index_start = _get_index_start(session, start_day)
+
+    if index_start is None or index_start >= process_timestamp(end_day):
+        return _describe_events(
+            hass,
+            start_day,
+            end_day,
+            entity_ids,
+            filters,
+            entities_filter,
+            entity_matches_only,
+            context_id,
+        )
+
+    entries = []
+    # The events at the start of the index are indexed, not described
+    include_start = index_start > process_timestamp(start_day)
+    if include_start:
+        entries = _describe_events(
+            hass,
+            start_day,
+            index_start,
+            entity_ids,
+            filters,
+            entities_filter,
+            entity_matches_only,
+            context_id,
+        )
+        start_day = index_start
+
+    if entity_ids is not None:
+        filters = entities_filter = None
+    entries.extend(
+        _get_indexed_entries(
+            hass,
+            start_day,
+            end_day,
+            entity_ids,
+            filters,
+            entities_filter,
+            context_id,
+            include_start,
+        )
+    )
+    return entries
+
+
+def _get_index_start(session, start_day):
+    """Return since when the logbook entries of the events are recorded.
+
+    Runs are indexed from the time the logbook was set up. The index
+    covers the recorded events back to the first run that was not
+    indexed from its start.
+    """
+    index_start = None
+    runs = session.query(
+        RecorderRuns.start, RecorderRuns.logbook_indexed_since
+    ).order_by(RecorderRuns.start.desc())
+    for run in runs:
+        if run.logbook_indexed_since is None:
+            break
+        index_start = process_timestamp(run.logbook_indexed_since)
+        if index_start <= process_timestamp(start_day) or index_start > (
+            process_timestamp(run.start)
+        ):
+            break
+    return index_start
+
+
+def _get_indexed_entries(
+    hass,
+    start_day,
+    end_day,
+    entity_ids,
+    filters,
+    entities_filter,
+    context_id,
+    include_start,
+):
+    """Get the logbook entries of a period from the logbook index.
+
+    Like the described events, state changes are filtered by filters and
+    the other entries by entities_filter.
+    """
+    with session_scope(hass=hass) as session:
+        query = session.query(
+            LogbookEntries.event_type,
+            LogbookEntries.time_fired,
+            LogbookEntries.entity_id,
+            LogbookEntries.domain,
+            LogbookEntries.entry,
+        )
+        if include_start:
+            query = query.filter(LogbookEntries.time_fired >= start_day)
+        else:
+            query = query.filter(LogbookEntries.time_fired > start_day)
+        query = query.filter(LogbookEntries.time_fired < end_day)
+        if entity_ids is not None:
+            query = query.filter(LogbookEntries.entity_id.in_(entity_ids))
+        if context_id is not None:
+            query = query.filter(LogbookEntries.context_id == context_id)
+        if filters:
+            query = query.filter(
+                filters.entity_filter(LogbookEntries.domain, LogbookEntries.entity_id)
+                | (LogbookEntries.event_type != EVENT_STATE_CHANGED)
+            )
+        query = query.order_by(LogbookEntries.time_fired, LogbookEntries.entry_id)
+
+        rows = query.yield_per(1000)
+        if entities_filter is not None:
+            rows = (
+                row
+                for row in rows
+                if row.event_type == EVENT_STATE_CHANGED
+                or entities_filter(row.entity_id or f"{row.domain}.")
+            )
+        return list(_group_indexed_entries(rows))
+
+
+def _group_indexed_entries(rows):
+    """Group indexed entries in batches of GROUP_BY_MINUTES like humanify."""
+    for _, g_rows in groupby(
+        rows, lambda row: row.time_fired.minute // GROUP_BY_MINUTES
+    ):
+        rows_batch = list(g_rows)
+
+        # Keep track of last sensor states
+        last_sensor_row = {}
+
+        # Maps minute of event to 1: stop, 2: stop + start
+        start_stop_rows = {}
+
+        for row in rows_batch:
+            minute = row.time_fired.minute
+            if row.event_type == EVENT_STATE_CHANGED:
+                if row.domain in CONTINUOUS_DOMAINS:
+                    last_sensor_row[row.entity_id] = row
+
+            elif row.event_type == EVENT_HOMEASSISTANT_STOP:
+                if minute not in start_stop_rows:
+                    start_stop_rows[minute] = 1
+
+            elif row.event_type == EVENT_HOMEASSISTANT_START:
+                if minute in start_stop_rows:
+                    start_stop_rows[minute] = 2
+
+        for row in rows_batch:
+            entry = row.entry
+            if row.event_type == EVENT_STATE_CHANGED:
+                if (
+                    row.domain in CONTINUOUS_DOMAINS
+                    and row is not last_sensor_row[row.entity_id]
+                ):
+                    # Skip all but the last sensor state
+                    continue
+
+            elif row.event_type in HOMEASSISTANT_EVENTS:
+                if start_stop_rows.get(row.time_fired.minute) == 2:
+                    if row.event_type == EVENT_HOMEASSISTANT_START:
+                        continue
+                    entry = json_dumps(_home_assistant_data("restarted"))
+
+            yield IndexedEntry(
+                process_timestamp_to_utc_isoformat(row.time_fired), entry
+            )
+
+
+def _describe_events(
+    hass,
+    start_day,
+    end_day,
+    entity_ids=None,
+    filters=None,
+    entities_filter=None,
+    entity_matches_only=False,
+    context_id=None,
+):
+    """Describe the recorded events of a period of time."""
     assert not (
         entity_ids and context_id
     ), "can't pass in both entity_ids and context_id"
@@ -494,6 +906,7 @@ def _generate_events_query(session):
         States.entity_id,
         States.domain,
         States.attributes,
+        StateAttributes.shared_attrs,
     )
 
 
@@ -504,6 +917,7 @@ def _generate_events_query_without_states(session):
         literal(None).label("entity_id"),
         literal(None).label("domain"),
         literal(None).label("attributes"),
+        literal(None).label("shared_attrs"),
     )
 
 
@@ -512,6 +926,9 @@ def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
         _generate_events_query(session)
         .outerjoin(Events, (States.event_id == Events.event_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(_missing_state_matcher(old_state))
         .filter(_continuous_entity_matcher())
         .filter((States.last_updated > start_day) & (States.last_updated < end_day))
@@ -526,6 +943,9 @@ def _apply_events_types_and_states_filter(hass, query, old_state):
     events_query = (
         query.outerjoin(States, (Events.event_id == States.event_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(
             (Events.event_type != EVENT_STATE_CHANGED)
             | _missing_state_matcher(old_state)
@@ -555,7 +975,11 @@ def _continuous_entity_matcher():
     #
     return sqlalchemy.or_(
         sqlalchemy.not_(States.domain.in_(CONTINUOUS_DOMAINS)),
-        sqlalchemy.not_(States.attributes.contains(UNIT_OF_MEASUREMENT_JSON)),
+        sqlalchemy.not_(
+            sqlalchemy.func.coalesce(
+                StateAttributes.shared_attrs, States.attributes
+            ).contains(UNIT_OF_MEASUREMENT_JSON)
+        ),
     )
 
 
@@ -575,8 +999,9 @@ def _apply_event_entity_id_matchers(events_query, entity_ids):
     return events_query.filter(
         sqlalchemy.or_(
             *[
-                Events.event_data.contains(ENTITY_ID_JSON_TEMPLATE.format(entity_id))
+                Events.event_data.contains(template.format(entity_id))
                 for entity_id in entity_ids
+                for template in ENTITY_ID_JSON_TEMPLATES
             ]
         )
     )
@@ -676,6 +1101,239 @@ def _entity_name_from_event(entity_id, event, entity_attr_cache):
     ) or split_entity_id(entity_id)[1].replace("_", " ")
 
 
+def _home_assistant_data(message):
+    """Return an entry about Home Assistant itself."""
+    return {"name": "Home Assistant", "message": message, "domain": HA_DOMAIN}
+
+
+@callback
+def _is_logbook_state_change(event):
+    """Return if a state change event has a logbook entry.
+
+    Mirrors the state changes the logbook query selects: entities that
+    were not added or removed and changed their state, except continuous
+    sensors with a unit of measurement.
+    """
+    old_state = event.data.get("old_state")
+    new_state = event.data.get("new_state")
+    if old_state is None or new_state is None or old_state.state == new_state.state:
+        return False
+    return not (
+        new_state.domain in CONTINUOUS_DOMAINS
+        and ATTR_UNIT_OF_MEASUREMENT in new_state.attributes
+    )
+
+
+class LogbookIndexer:
+    """Describe events for the logbook index when they are recorded.
+
+    Called from the event loop with each event before the recorder queues
+    it. The first event of each context is remembered, so the entries of
+    the events it caused can say so without looking it up when the
+    logbook is read.
+    """
+
+    def __init__(self, hass):
+        """Init the indexer."""
+        self._hass = hass
+        self._contexts = OrderedDict()
+
+    def __call__(self, event):
+        """Return the logbook entry row of an event, or None."""
+        described = self.describe(event)
+        if described is None:
+            return None
+        entity_id, domain, data = described
+        return {
+            "event_type": event.event_type,
+            "time_fired": event.time_fired,
+            "entity_id": entity_id,
+            "domain": domain,
+            "context_id": event.context.id,
+            "entry": json_dumps(data),
+        }
+
+    def describe(self, event):
+        """Describe an event for the logbook.
+
+        Returns the entity id and domain the entry is filtered by and the
+        entry without its time, or None if the event has no entry.
+        """
+        external_events = self._hass.data.get(DOMAIN, {})
+        event_type = event.event_type
+        if event_type == EVENT_STATE_CHANGED:
+            if not _is_logbook_state_change(event):
+                return None
+        elif (
+            event_type not in ALL_EVENT_TYPES_EXCEPT_STATE_CHANGED
+            and event_type not in external_events
+        ):
+            return None
+
+        context_id = event.context.id
+        if context_id not in self._contexts:
+            self._contexts[context_id] = event
+            if len(self._contexts) > CONTEXT_CACHE_SIZE:
+                self._contexts.popitem(last=False)
+
+        entity_id = domain = None
+        if event_type == EVENT_STATE_CHANGED:
+            entity_id = event.data[ATTR_ENTITY_ID]
+            new_state = event.data["new_state"]
+            domain = new_state.domain
+            data = {
+                "name": self._entity_name(entity_id, new_state),
+                "state": new_state.state,
+                "entity_id": entity_id,
+            }
+            icon = new_state.attributes.get(ATTR_ICON)
+            if icon:
+                data["icon"] = icon
+            self._add_context(data, entity_id, event, external_events)
+
+        elif event_type in external_events:
+            entity_id = _data_entity_id(event)
+            domain, describe_event = external_events[event_type]
+            data = describe_event(_DescribedEvent(event))
+            data["domain"] = domain
+            self._add_context(data, data.get(ATTR_ENTITY_ID), event, external_events)
+
+        elif event_type in HOMEASSISTANT_EVENTS:
+            message = (
+                "started" if event_type == EVENT_HOMEASSISTANT_START else "stopped"
+            )
+            return None, HA_DOMAIN, _home_assistant_data(message)
+
+        elif event_type == EVENT_LOGBOOK_ENTRY:
+            entity_id = _data_entity_id(event)
+            domain = event.data.get(ATTR_DOMAIN)
+            entry_domain = domain
+            if entry_domain is None and entity_id is not None:
+                entry_domain = split_entity_id(entity_id)[0]
+            data = {
+                "name": event.data.get(ATTR_NAME),
+                "message": event.data.get(ATTR_MESSAGE),
+                "domain": entry_domain,
+                "entity_id": event.data.get(ATTR_ENTITY_ID),
+            }
+            self._add_context(data, data["entity_id"], event, external_events)
+
+        else:
+            # Service calls are only the context of other entries
+            return None
+
+        if entity_id is None and domain is None:
+            # Nothing to filter the entry by, it is never shown
+            return None
+        return entity_id, domain, data
+
+    def _entity_name(self, entity_id, state=None):
+        """Return the friendly name of an entity."""
+        state = self._hass.states.get(entity_id) or state
+        name = state.attributes.get(ATTR_FRIENDLY_NAME) if state else None
+        return name or split_entity_id(entity_id)[1].replace("_", " ")
+
+    def _add_context(self, data, entity_id, event, external_events):
+        """Add what caused an event to its entry, like the context augmentation."""
+        if event.context.user_id:
+            data["context_user_id"] = event.context.user_id
+
+        context_event = self._contexts.get(event.context.id)
+        if context_event is event:
+            # The first event of the context, was it caused by a parent?
+            context_event = self._contexts.get(event.context.parent_id)
+        if context_event is None or context_event is event:
+            return
+
+        event_type = context_event.event_type
+
+        # State change
+        if event_type == EVENT_STATE_CHANGED:
+            context_entity_id = context_event.data[ATTR_ENTITY_ID]
+            data["context_entity_id"] = context_entity_id
+            data["context_entity_id_name"] = self._entity_name(
+                context_entity_id, context_event.data["new_state"]
+            )
+            data["context_event_type"] = event_type
+            return
+
+        event_data = context_event.data
+
+        # Call service
+        if event_type == EVENT_CALL_SERVICE:
+            data["context_domain"] = event_data.get(ATTR_DOMAIN)
+            data["context_service"] = event_data.get(ATTR_SERVICE)
+            data["context_event_type"] = event_type
+            return
+
+        if not entity_id:
+            return
+
+        attr_entity_id = _data_entity_id(context_event)
+        if not attr_entity_id or (
+            event_type in SCRIPT_AUTOMATION_EVENTS and attr_entity_id == entity_id
+        ):
+            return
+
+        data["context_entity_id"] = attr_entity_id
+        data["context_entity_id_name"] = self._entity_name(attr_entity_id)
+        data["context_event_type"] = event_type
+
+        if event_type in external_events:
+            domain, describe_event = external_events[event_type]
+            data["context_domain"] = domain
+            name = describe_event(_DescribedEvent(context_event)).get(ATTR_NAME)
+            if name:
+                data["context_name"] = name
+
+
+def _data_entity_id(event):
+    """Return the entity id in the data of an event, if there is one."""
+    entity_id = event.data.get(ATTR_ENTITY_ID)
+    return entity_id if isinstance(entity_id, str) else None
+
+
+class _DescribedEvent:
+    """The parts of a recorded event the logbook platforms describe."""
+
+    __slots__ = [
+        "data",
+        "event_type",
+        "context_id",
+        "context_user_id",
+        "context_parent_id",
+    ]
+
+    def __init__(self, event):
+        """Init the described event."""
+        self.data = event.data
+        self.event_type = event.event_type
+        self.context_id = event.context.id
+        self.context_user_id = event.context.user_id
+        self.context_parent_id = event.context.parent_id
+
+
+class IndexedEntry:
+    """A logbook entry read from the logbook index."""
+
+    __slots__ = ["when", "entry"]
+
+    def __init__(self, when, entry):
+        """Init the entry with its time and the JSON of the rest."""
+        self.when = when
+        self.entry = entry
+
+    def as_json(self):
+        """Return the JSON of the entry, without decoding the stored part."""
+        if self.entry == EMPTY_JSON_OBJECT:
+            return f'{{"when":"{self.when}"}}'
+        return f'{{"when":"{self.when}",{self.entry[1:]}'
+
+    def as_dict(self):
+        """Return the entry as a dict."""
+        return {"when": self.when, **json_loads(self.entry)}
+
+
 class LazyEventPartialState:
     """A lazy version of core Event with limited State joined in."""
 
@@ -715,7 +1373,9 @@ class LazyEventPartialState:
         if self._attributes:
             return self._attributes.get(ATTR_ICON)
 
-        result = ICON_JSON_EXTRACT.search(self._row.attributes)
+        result = ICON_JSON_EXTRACT.search(
+            self._row.shared_attrs or self._row.attributes
+        )
         return result and result.group(1)
 
     @property
@@ -740,13 +1400,11 @@ class LazyEventPartialState:
     def attributes(self):
         """State attributes."""
         if not self._attributes:
-            if (
-                self._row.attributes is None
-                or self._row.attributes == EMPTY_JSON_OBJECT
-            ):
+            attributes = self._row.shared_attrs or self._row.attributes
+            if attributes is None or attributes == EMPTY_JSON_OBJECT:
                 self._attributes = {}
             else:
-                self._attributes = json.loads(self._row.attributes)
+                self._attributes = json_loads(attributes)
         return self._attributes
 
     @property
@@ -756,7 +1414,7 @@ class LazyEventPartialState:
             if self._row.event_data == EMPTY_JSON_OBJECT:
                 self._event_data = {}
             else:
-                self._event_data = json.loads(self._row.event_data)
+                self._event_data = json_loads(self._row.event_data)
         return self._event_data
 
     @property
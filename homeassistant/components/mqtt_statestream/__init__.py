@@ -58,13 +58,15 @@ async def async_setup(hass, config):
         hass.components.mqtt.async_publish(f"{mybase}state", payload, 1, True)
 
         if publish_timestamps:
+            # Reuse the timestamps serialized once per state
+            state_dict = new_state.as_dict()
             if new_state.last_updated:
                 hass.components.mqtt.async_publish(
-                    f"{mybase}last_updated", new_state.last_updated.isoformat(), 1, True
+                    f"{mybase}last_updated", state_dict["last_updated"], 1, True
                 )
             if new_state.last_changed:
                 hass.components.mqtt.async_publish(
-                    f"{mybase}last_changed", new_state.last_changed.isoformat(), 1, True
+                    f"{mybase}last_changed", state_dict["last_changed"], 1, True
                 )
 
         if publish_attributes:
@@ -10,11 +10,18 @@ import objgraph
 from pyprof2calltree import convert
 import voluptuous as vol
 
+from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.template import (
+    TemplateProfiler,
+    async_disable_profiler,
+    async_enable_profiler,
+    async_get_profiler,
+)
 from homeassistant.helpers.typing import ConfigType
 
 from .const import DOMAIN
@@ -24,6 +31,9 @@ SERVICE_MEMORY = "memory"
 SERVICE_START_LOG_OBJECTS = "start_log_objects"
 SERVICE_STOP_LOG_OBJECTS = "stop_log_objects"
 SERVICE_DUMP_LOG_OBJECTS = "dump_log_objects"
+SERVICE_START_TEMPLATE_PROFILER = "start_template_profiler"
+SERVICE_STOP_TEMPLATE_PROFILER = "stop_template_profiler"
+SERVICE_DUMP_TEMPLATE_PROFILE = "dump_template_profile"
 
 SERVICES = (
     SERVICE_START,
@@ -31,6 +41,9 @@ SERVICES = (
     SERVICE_START_LOG_OBJECTS,
     SERVICE_STOP_LOG_OBJECTS,
     SERVICE_DUMP_LOG_OBJECTS,
+    SERVICE_START_TEMPLATE_PROFILER,
+    SERVICE_STOP_TEMPLATE_PROFILER,
+    SERVICE_DUMP_TEMPLATE_PROFILE,
 )
 
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
@@ -38,6 +51,9 @@ DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
 CONF_SECONDS = "seconds"
 CONF_SCAN_INTERVAL = "scan_interval"
 CONF_TYPE = "type"
+CONF_LIMIT = "limit"
+
+DEFAULT_LIMIT = 25
 
 LOG_INTERVAL_SUB = "log_interval_subscription"
 
@@ -46,6 +62,7 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the profiler component."""
+    websocket_api.async_register_command(hass, websocket_template_profile)
     return True
 
 
@@ -99,6 +116,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             notification_id="profile_object_dump",
         )
 
+    @callback
+    def _async_start_template_profiler(call: ServiceCall):
+        async_enable_profiler(hass)
+        hass.components.persistent_notification.async_create(
+            "Template render profiling has started. Call the dump_template_profile service to write the templates that took the most time to [the logs](/config/logs).",
+            title="Template profiling started",
+            notification_id="profile_templates",
+        )
+
+    @callback
+    def _async_stop_template_profiler(call: ServiceCall):
+        profiler = async_disable_profiler(hass)
+        if profiler is None:
+            return
+
+        hass.components.persistent_notification.async_dismiss("profile_templates")
+        _log_template_profile(profiler, DEFAULT_LIMIT)
+
+    @callback
+    def _async_dump_template_profile(call: ServiceCall):
+        profiler = async_get_profiler(hass)
+        if profiler is None:
+            _LOGGER.warning("The template profiler is not running")
+            return
+
+        _log_template_profile(profiler, call.data[CONF_LIMIT])
+
     async_register_admin_service(
         hass,
         DOMAIN,
@@ -149,6 +193,32 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         schema=vol.Schema({vol.Required(CONF_TYPE): str}),
     )
 
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_START_TEMPLATE_PROFILER,
+        _async_start_template_profiler,
+        schema=vol.Schema({}),
+    )
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_STOP_TEMPLATE_PROFILER,
+        _async_stop_template_profiler,
+        schema=vol.Schema({}),
+    )
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_DUMP_TEMPLATE_PROFILE,
+        _async_dump_template_profile,
+        schema=vol.Schema(
+            {vol.Optional(CONF_LIMIT, default=DEFAULT_LIMIT): cv.positive_int}
+        ),
+    )
+
     return True
 
 
@@ -159,9 +229,35 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     if LOG_INTERVAL_SUB in hass.data[DOMAIN]:
         hass.data[DOMAIN][LOG_INTERVAL_SUB]()
     hass.data.pop(DOMAIN)
+    async_disable_profiler(hass)
     return True
 
 
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "profiler/template_profile",
+        vol.Optional(CONF_LIMIT, default=DEFAULT_LIMIT): cv.positive_int,
+    }
+)
+@websocket_api.require_admin
+@callback
+def websocket_template_profile(hass, connection, msg):
+    """Return the templates that took the most time to render."""
+    profiler = async_get_profiler(hass)
+    if profiler is None:
+        connection.send_result(msg["id"], {"running": False, "templates": []})
+        return
+
+    connection.send_result(
+        msg["id"],
+        {
+            "running": True,
+            "started": profiler.started.isoformat(),
+            "templates": profiler.async_report(msg[CONF_LIMIT]),
+        },
+    )
+
+
 async def _async_generate_profile(hass: HomeAssistant, call: ServiceCall):
     start_time = int(time.time() * 1000000)
     hass.components.persistent_notification.async_create(
@@ -217,5 +313,19 @@ def _write_memory_profile(heap, heap_path):
     heap.byrcs.dump(heap_path)
 
 
+def _log_template_profile(profiler: TemplateProfiler, limit: int):
+    lines = [
+        f"{stats['total']:.4f}s total, {stats['count']} renders, "
+        f"{stats['average'] * 1000:.3f}ms average, {stats['p99'] * 1000:.3f}ms p99, "
+        f"triggered by {stats['triggers']}: {stats['template']!r}"
+        for stats in profiler.async_report(limit)
+    ]
+    _LOGGER.critical(
+        "Templates that took the most time to render since %s:\n%s",
+        profiler.started.isoformat(),
+        "\n".join(lines),
+    )
+
+
 def _log_objects(*_):
     _LOGGER.critical("Memory Growth: %s", objgraph.growth(limit=100))
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import asyncio
+from collections import OrderedDict
 import concurrent.futures
 from datetime import datetime
 import logging
@@ -11,7 +12,14 @@ import threading
 import time
 from typing import Any, Callable, NamedTuple
 
-from sqlalchemy import create_engine, event as sqlalchemy_event, exc, select
+from sqlalchemy import (
+    bindparam,
+    create_engine,
+    event as sqlalchemy_event,
+    exc,
+    func,
+    select,
+)
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import StaticPool
 import voluptuous as vol
@@ -26,7 +34,8 @@ from homeassistant.const import (
     EVENT_TIME_CHANGED,
     MATCH_ALL,
 )
-from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
+from homeassistant.helpers import discovery
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
@@ -36,9 +45,27 @@ from homeassistant.helpers.entityfilter import (
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 
-from . import migration, purge
-from .const import CONF_DB_INTEGRITY_CHECK, DATA_INSTANCE, DOMAIN, SQLITE_URL_PREFIX
-from .models import Base, Events, RecorderRuns, States
+from . import migration, purge, statistics
+from .const import (
+    CONF_DB_INTEGRITY_CHECK,
+    DATA_INSTANCE,
+    DOMAIN,
+    MAX_ROWS_TO_PURGE,
+    PURGE_DEFER_BACKLOG,
+    PURGE_MAX_DEFERRALS,
+    SQLITE_URL_PREFIX,
+)
+from .models import (
+    Base,
+    Events,
+    LogbookEntries,
+    LogbookEvent,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    Statistics,
+)
+from .spill import SPILL_DIR, ReplaySpillTask, Spill
 from .util import (
     dburl_to_path,
     move_away_broken_database,
@@ -74,9 +101,13 @@ DEFAULT_DB_RETRY_WAIT = 3
 DEFAULT_COMMIT_INTERVAL = 1
 KEEPALIVE_TIME = 30
 
-# Controls how often we clean up
-# States and Events objects
-EXPIRE_AFTER_COMMITS = 120
+# Rows per INSERT ... RETURNING statement
+INSERT_RETURNING_CHUNK_SIZE = 500
+
+# The number of attribute ids to remember
+# so states with the same attributes can
+# share a row without a database lookup
+STATE_ATTRIBUTES_ID_CACHE_SIZE = 2048
 
 CONF_AUTO_PURGE = "auto_purge"
 CONF_DB_URL = "db_url"
@@ -86,6 +117,7 @@ CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
 CONF_COMMIT_INTERVAL = "commit_interval"
+CONF_MAX_BACKLOG = "max_backlog"
 
 EXCLUDE_SCHEMA = INCLUDE_EXCLUDE_FILTER_SCHEMA_INNER.extend(
     {vol.Optional(CONF_EVENT_TYPES): vol.All(cv.ensure_list, [cv.string])}
@@ -119,6 +151,7 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Optional(
                         CONF_DB_INTEGRITY_CHECK, default=DEFAULT_DB_INTEGRITY_CHECK
                     ): cv.boolean,
+                    vol.Optional(CONF_MAX_BACKLOG): cv.positive_int,
                 }
             ),
         )
@@ -177,6 +210,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     db_max_retries = conf[CONF_DB_MAX_RETRIES]
     db_retry_wait = conf[CONF_DB_RETRY_WAIT]
     db_integrity_check = conf[CONF_DB_INTEGRITY_CHECK]
+    max_backlog = conf.get(CONF_MAX_BACKLOG)
 
     db_url = conf.get(CONF_DB_URL)
     if not db_url:
@@ -194,6 +228,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         entity_filter=entity_filter,
         exclude_t=exclude_t,
         db_integrity_check=db_integrity_check,
+        max_backlog=max_backlog,
     )
     instance.async_initialize()
     instance.start()
@@ -223,6 +258,11 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         schema=SERVICE_DISABLE_SCHEMA,
     )
 
+    if max_backlog is not None:
+        hass.async_create_task(
+            discovery.async_load_platform(hass, "sensor", DOMAIN, {}, config)
+        )
+
     return await instance.async_db_ready
 
 
@@ -232,12 +272,19 @@ class PurgeTask(NamedTuple):
     keep_days: int
     repack: bool
     apply_filter: bool
+    deferrals: int = 0
 
 
 class WaitTask:
     """An object to insert into the recorder queue to tell it set the _queue_watch event."""
 
 
+class CommitTask(NamedTuple):
+    """Object to commit the events recorded so far, done is set after."""
+
+    done: threading.Event
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
@@ -253,6 +300,7 @@ class Recorder(threading.Thread):
         entity_filter: Callable[[str], bool],
         exclude_t: list[str],
         db_integrity_check: bool,
+        max_backlog: int | None = None,
     ) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name="Recorder")
@@ -274,22 +322,55 @@ class Recorder(threading.Thread):
 
         self.entity_filter = entity_filter
         self.exclude_t = exclude_t
+        self._spill: Spill | None = None
+        if max_backlog is not None:
+            self._spill = Spill(self.queue, hass.config.path(SPILL_DIR), max_backlog)
 
         self._timechanges_seen = 0
-        self._commits_without_expire = 0
         self._keepalive_count = 0
-        self._old_states = {}
-        self._pending_expunge = []
+        self._old_states: dict[str, int] = {}
+        self._state_attributes_ids: OrderedDict[str, int] = OrderedDict()
+        self._pending_state_attributes: dict[str, dict[str, Any]] = {}
+        self._pending_events: list[dict[str, Any]] = []
+        self._pending_states: list[
+            tuple[dict[str, Any], dict[str, Any], dict[str, Any] | None]
+        ] = []
+        self._pending_statistics: list[dict[str, Any]] = []
+        self._pending_logbook_entries: list[tuple[dict[str, Any], dict[str, Any]]] = []
+        self._logbook_indexer: Callable[[Event], dict[str, Any] | None] | None = None
+        self._logbook_indexed_since_saved = False
+        self._recorded_events = False
+        self._statistics = statistics.StatisticsCompiler(self._last_statistic)
+        self.commit_latency: float | None = None
+        self.purge_chunk_size = MAX_ROWS_TO_PURGE
         self.event_session = None
         self.get_session = None
         self._completed_database_setup = None
 
         self.enabled = True
 
+    @property
+    def backlog(self) -> int:
+        """Return the number of events waiting to be processed."""
+        if self._spill is not None:
+            return self.queue.qsize() + self._spill.spilled
+        return self.queue.qsize()
+
     def set_enable(self, enable):
         """Enable or disable recording events and states."""
         self.enabled = enable
 
+    @callback
+    def set_logbook_indexer(self, indexer):
+        """Record a logbook entry with the events, described by indexer.
+
+        The indexer is called from the event loop with each event before
+        it is queued, as the logbook platforms and the state machine are
+        not thread safe. It returns the logbook entry row of the event,
+        or None.
+        """
+        self._logbook_indexer = indexer
+
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
@@ -360,6 +441,8 @@ class Recorder(threading.Thread):
             self._shutdown()
             return
 
+        self._resume_purge()
+
         # Start periodic purge
         if self.auto_purge:
 
@@ -375,6 +458,10 @@ class Recorder(threading.Thread):
                 async_purge, hour=4, minute=12, second=0
             )
 
+        if self._spill is not None:
+            for segment in self._spill.leftover_segments():
+                self._replay_spilled_events(segment)
+
         _LOGGER.debug("Recorder processing the queue")
         # Use a session for the event read loop
         # with a commit every time the event time
@@ -388,6 +475,24 @@ class Recorder(threading.Thread):
 
             self._process_one_event(event)
 
+    def _resume_purge(self):
+        """Continue a purge that was interrupted by a restart."""
+        try:
+            with session_scope(session=self.get_session()) as session:
+                purge_run = purge.unfinished_purge_run(session)
+        except exc.SQLAlchemyError as err:
+            _LOGGER.warning("Error looking for an unfinished purge: %s", err)
+            return
+        if purge_run is None:
+            return
+        _LOGGER.info(
+            "Resuming the purge of states and events before %s",
+            purge_run.purge_before,
+        )
+        self.queue.put(
+            PurgeTask(purge_run.keep_days, purge_run.repack, purge_run.apply_filter)
+        )
+
     def _setup_recorder(self) -> bool:
         """Create schema and connect to the database."""
         tries = 1
@@ -428,6 +533,17 @@ class Recorder(threading.Thread):
     def _process_one_event(self, event):
         """Process one event."""
         if isinstance(event, PurgeTask):
+            if (
+                self.backlog > PURGE_DEFER_BACKLOG
+                and event.deferrals < PURGE_MAX_DEFERRALS
+            ):
+                # Writing the waiting events comes first, unless the
+                # backlog never shrinks and the database would only grow
+                self.queue.put(event._replace(deferrals=event.deferrals + 1))
+                return
+            # Commit pending states first so the purge sees which
+            # state attributes rows are still referenced
+            self._commit_event_session_or_recover()
             # Schedule a new purge task if this one didn't finish
             if not purge.purge_old_data(
                 self, event.keep_days, event.repack, event.apply_filter
@@ -439,7 +555,22 @@ class Recorder(threading.Thread):
         if isinstance(event, WaitTask):
             self._queue_watch.set()
             return
+        if isinstance(event, CommitTask):
+            self._commit_event_session_or_recover()
+            event.done.set()
+            return
+        if isinstance(event, ReplaySpillTask):
+            self._replay_spilled_events(event.segment)
+            return
+        logbook_event = None
+        if isinstance(event, LogbookEvent):
+            logbook_event = event
+            event = logbook_event.event
         if event.event_type == EVENT_TIME_CHANGED:
+            if self.enabled:
+                self._pending_statistics.extend(
+                    self._statistics.compile(event.time_fired)
+                )
             self._keepalive_count += 1
             if self._keepalive_count >= KEEPALIVE_TIME:
                 self._keepalive_count = 0
@@ -456,11 +587,11 @@ class Recorder(threading.Thread):
 
         try:
             if event.event_type == EVENT_STATE_CHANGED:
-                dbevent = Events.from_event(event, event_data="{}")
+                event_row = Events.row_from_event(event, event_data="{}")
             else:
-                dbevent = Events.from_event(event)
-            dbevent.created = event.time_fired
-            self.event_session.add(dbevent)
+                event_row = Events.row_from_event(event)
+            event_row["created"] = event.time_fired
+            self._pending_events.append(event_row)
         except (TypeError, ValueError):
             _LOGGER.warning("Event is not JSON serializable: %s", event)
             return
@@ -471,22 +602,22 @@ class Recorder(threading.Thread):
 
         if event.event_type == EVENT_STATE_CHANGED:
             try:
-                dbstate = States.from_event(event)
-                has_new_state = event.data.get("new_state")
-                if dbstate.entity_id in self._old_states:
-                    old_state = self._old_states.pop(dbstate.entity_id)
-                    if old_state.state_id:
-                        dbstate.old_state_id = old_state.state_id
-                    else:
-                        dbstate.old_state = old_state
-                if not has_new_state:
-                    dbstate.state = None
-                dbstate.event = dbevent
-                dbstate.created = event.time_fired
-                self.event_session.add(dbstate)
-                if has_new_state:
-                    self._old_states[dbstate.entity_id] = dbstate
-                    self._pending_expunge.append(dbstate)
+                state_row = States.row_from_event(event)
+                if not event.data.get("new_state"):
+                    state_row["state"] = None
+                state_row["event_id"] = None
+                state_row["old_state_id"] = None
+                state_row["attributes_id"] = None
+                state_row["created"] = event.time_fired
+                attributes_row = self._share_state_attributes(state_row)
+                self._pending_states.append((state_row, event_row, attributes_row))
+                self._pending_statistics.extend(
+                    self._statistics.state_changed(
+                        state_row["entity_id"],
+                        event.data.get("new_state"),
+                        event.time_fired,
+                    )
+                )
             except (TypeError, ValueError):
                 _LOGGER.warning(
                     "State is not JSON serializable: %s",
@@ -496,11 +627,112 @@ class Recorder(threading.Thread):
                 # Must catch the exception to prevent the loop from collapsing
                 _LOGGER.exception("Error adding state change: %s", err)
 
+        if logbook_event is not None:
+            self._add_logbook_entry(logbook_event, event_row)
+        self._recorded_events = True
+
         # If they do not have a commit interval
         # than we commit right away
         if not self.commit_interval:
             self._commit_event_session_or_recover()
 
+    def _add_logbook_entry(self, logbook_event, event_row):
+        """Record the logbook entry of a recorded event."""
+        if self.run_info.logbook_indexed_since is None:
+            # The logbook is complete from here for the rest of the run
+            self.run_info.logbook_indexed_since = (
+                logbook_event.event.time_fired
+                if self._recorded_events
+                else self.run_info.start
+            )
+        if logbook_event.entry_row is not None:
+            self._pending_logbook_entries.append((logbook_event.entry_row, event_row))
+
+    def _replay_spilled_events(self, segment):
+        """Record the events that were spilled to disk, in order.
+
+        Waits for the database to be reachable so the replayed events
+        are not lost to another failing commit.
+        """
+        if not self._wait_for_database():
+            _LOGGER.warning(
+                "Database is unavailable, leaving spilled events in %s", segment
+            )
+            return
+        _LOGGER.info("Replaying spilled events from %s", segment)
+        for event in self._spill.replay(segment):
+            self._process_one_event(event)
+        self._commit_event_session_or_recover()
+
+    def _wait_for_database(self):
+        """Wait until the database answers, unless Home Assistant is stopping."""
+        while True:
+            try:
+                self.event_session.connection().scalar(select([1]))
+                return True
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.error(
+                    "Error in database connectivity before replaying events: %s "
+                    "(retrying in %s seconds)",
+                    err,
+                    self.db_retry_wait,
+                )
+                self._reopen_event_session()
+            if self.hass.is_stopping:
+                return False
+            time.sleep(self.db_retry_wait)
+
+    def _share_state_attributes(self, state_row):
+        """Point the state row at a shared row with the same attributes.
+
+        Returns the new state attributes row the state refers to, if any.
+        """
+        shared_attrs = state_row["attributes"]
+        state_row["attributes"] = None
+
+        pending_attributes_row = self._pending_state_attributes.get(shared_attrs)
+        if pending_attributes_row is not None:
+            return pending_attributes_row
+
+        attributes_id = self._state_attributes_ids.get(shared_attrs)
+        if attributes_id is not None:
+            self._state_attributes_ids.move_to_end(shared_attrs)
+            state_row["attributes_id"] = attributes_id
+            return None
+
+        attributes_row = StateAttributes.row_from_shared_attrs(shared_attrs)
+        existing = (
+            self.event_session.query(StateAttributes.attributes_id)
+            .filter(StateAttributes.hash == attributes_row["hash"])
+            .filter(StateAttributes.shared_attrs == shared_attrs)
+            .first()
+        )
+        if existing is not None:
+            self._cache_state_attributes_id(shared_attrs, existing.attributes_id)
+            state_row["attributes_id"] = existing.attributes_id
+            return None
+
+        self._pending_state_attributes[shared_attrs] = attributes_row
+        return attributes_row
+
+    def _cache_state_attributes_id(self, shared_attrs, attributes_id):
+        """Remember the id of a state attributes row."""
+        self._state_attributes_ids[shared_attrs] = attributes_id
+        if len(self._state_attributes_ids) > STATE_ATTRIBUTES_ID_CACHE_SIZE:
+            self._state_attributes_ids.popitem(last=False)
+
+    def evict_purged_state_attributes_ids(self, attributes_ids: set[int]) -> None:
+        """Forget state attributes rows that were purged."""
+        self._state_attributes_ids = OrderedDict(
+            (shared_attrs, attributes_id)
+            for shared_attrs, attributes_id in self._state_attributes_ids.items()
+            if attributes_id not in attributes_ids
+        )
+
+    def _last_statistic(self, statistic_id):
+        """Return the state and sum of the last recorded period of a counter."""
+        return statistics.last_statistic(self.event_session, statistic_id)
+
     def _commit_event_session_or_recover(self):
         """Commit changes to the database and recover if the database fails when possible."""
         try:
@@ -545,34 +777,181 @@ class Recorder(threading.Thread):
                 time.sleep(self.db_retry_wait)
 
     def _commit_event_session(self):
-        self._commits_without_expire += 1
-
-        if self._pending_expunge:
-            self.event_session.flush()
-            for dbstate in self._pending_expunge:
-                # Expunge the state so its not expired
-                # until we use it later for dbstate.old_state
-                if dbstate in self.event_session:
-                    self.event_session.expunge(dbstate)
-            self._pending_expunge = []
-        self.event_session.commit()
-
-        # Expire is an expensive operation (frequently more expensive
-        # than the flush and commit itself) so we only
-        # do it after EXPIRE_AFTER_COMMITS commits
-        if self._commits_without_expire == EXPIRE_AFTER_COMMITS:
-            self._commits_without_expire = 0
-            self.event_session.expire_all()
+        start = time.perf_counter()
+        try:
+            old_states = self._insert_pending_rows()
+            self.event_session.commit()
+        except Exception:
+            # Retry the whole batch in a clean transaction
+            self.event_session.rollback()
+            self._forget_row_ids()
+            raise
+
+        self._old_states = old_states
+        for shared_attrs, attributes_row in self._pending_state_attributes.items():
+            self._cache_state_attributes_id(
+                shared_attrs, attributes_row["attributes_id"]
+            )
+        num_events = len(self._pending_events)
+        num_states = len(self._pending_states)
+        self._pending_state_attributes = {}
+        self._pending_events = []
+        self._pending_states = []
+        self._pending_statistics = []
+        self._pending_logbook_entries = []
+        if self.run_info.logbook_indexed_since is not None:
+            self._logbook_indexed_since_saved = True
+
+        self.commit_latency = time.perf_counter() - start
+        _LOGGER.debug(
+            "Committed %s events and %s states in %fs (backlog: %s)",
+            num_events,
+            num_states,
+            self.commit_latency,
+            self.backlog,
+        )
+
+    def _insert_pending_rows(self):
+        """Insert the rows collected since the last commit.
+
+        Each table is written in bulk and the ids the database assigned
+        are read back, so states can refer to their event, attributes and
+        old state without a round trip per row.
+
+        Returns the ids of the last state of each entity.
+        """
+        old_states = dict(self._old_states)
+        connection = self.event_session.connection()
+
+        if self._pending_statistics:
+            connection.execute(Statistics.__table__.insert(), self._pending_statistics)
+
+        if (
+            self.run_info.logbook_indexed_since is not None
+            and not self._logbook_indexed_since_saved
+        ):
+            connection.execute(
+                RecorderRuns.__table__.update()
+                .where(RecorderRuns.run_id == self.run_info.run_id)
+                .values(logbook_indexed_since=self.run_info.logbook_indexed_since)
+            )
+
+        if not self._pending_events:
+            return old_states
+
+        if self._pending_state_attributes:
+            self._insert_rows(
+                connection,
+                StateAttributes,
+                "attributes_id",
+                list(self._pending_state_attributes.values()),
+            )
+
+        self._insert_rows(connection, Events, "event_id", self._pending_events)
+
+        if self._pending_logbook_entries:
+            entry_rows = []
+            for entry_row, event_row in self._pending_logbook_entries:
+                entry_row["event_id"] = event_row["event_id"]
+                entry_rows.append(entry_row)
+            connection.execute(LogbookEntries.__table__.insert(), entry_rows)
+
+        if not self._pending_states:
+            return old_states
+
+        state_rows = []
+        # States whose old state is in the same batch, their ids are only
+        # known once the batch is inserted
+        linked_rows = []
+        last_rows: dict[str, dict[str, Any]] = {}
+        for state_row, event_row, attributes_row in self._pending_states:
+            state_row["event_id"] = event_row["event_id"]
+            if attributes_row is not None:
+                state_row["attributes_id"] = attributes_row["attributes_id"]
+            entity_id = state_row["entity_id"]
+            old_row = last_rows.pop(entity_id, None)
+            if old_row is not None:
+                state_row["old_state_id"] = None
+                linked_rows.append((state_row, old_row))
+            else:
+                state_row["old_state_id"] = old_states.pop(entity_id, None)
+            if state_row["state"] is not None:
+                last_rows[entity_id] = state_row
+            state_rows.append(state_row)
+        self._insert_rows(connection, States, "state_id", state_rows)
+
+        if linked_rows:
+            connection.execute(
+                States.__table__.update()
+                .where(States.state_id == bindparam("linked_state_id"))
+                .values(old_state_id=bindparam("linked_old_state_id")),
+                [
+                    {
+                        "linked_state_id": state_row["state_id"],
+                        "linked_old_state_id": old_row["state_id"],
+                    }
+                    for state_row, old_row in linked_rows
+                ],
+            )
+        for entity_id, state_row in last_rows.items():
+            old_states[entity_id] = state_row["state_id"]
+
+        return old_states
+
+    @staticmethod
+    def _insert_rows(connection, table, id_column, rows):
+        """Insert rows and store the ids the database assigned to them.
+
+        The database numbers the rows so its sequences stay in step with
+        the rows written by other writers.
+        """
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            # SQLite has a single writer, so the rows of one executemany
+            # get consecutive ids ending at the last inserted rowid.
+            connection.execute(table.__table__.insert(), rows)
+            last_id = connection.execute(select([func.last_insert_rowid()])).scalar()
+            row_ids = range(last_id - len(rows) + 1, last_id + 1)
+        elif dialect == "postgresql":
+            column = getattr(table, id_column)
+            row_ids = []
+            for start in range(0, len(rows), INSERT_RETURNING_CHUNK_SIZE):
+                result = connection.execute(
+                    table.__table__.insert()
+                    .values(rows[start : start + INSERT_RETURNING_CHUNK_SIZE])
+                    .returning(column)
+                )
+                row_ids.extend(result_row[0] for result_row in result)
+        else:
+            # Concurrent inserts can interleave the ids of a bulk insert,
+            # so each row reports its own id.
+            row_ids = []
+            for row in rows:
+                result = connection.execute(table.__table__.insert(), row)
+                row_ids.append(result.inserted_primary_key[0])
+
+        for row, row_id in zip(rows, row_ids):
+            row[id_column] = row_id
+
+    def _forget_row_ids(self):
+        """Forget the ids of rows whose insert was rolled back."""
+        for attributes_row in self._pending_state_attributes.values():
+            attributes_row.pop("attributes_id", None)
+        for event_row in self._pending_events:
+            event_row.pop("event_id", None)
+        for state_row, _, _ in self._pending_states:
+            state_row.pop("state_id", None)
 
     def _handle_sqlite_corruption(self):
         """Handle the sqlite3 database being corrupt."""
+        self._discard_pending_rows()
         self._close_connection()
         move_away_broken_database(dburl_to_path(self.db_url))
         self._setup_recorder()
 
     def _reopen_event_session(self):
         """Rollback the event session and reopen it after a failure."""
-        self._old_states = {}
+        self._discard_pending_rows()
 
         try:
             self.event_session.rollback()
@@ -585,6 +964,17 @@ class Recorder(threading.Thread):
 
         self._open_event_session()
 
+    def _discard_pending_rows(self):
+        """Forget the rows that were not committed and the ids they refer to."""
+        self._old_states = {}
+        self._state_attributes_ids.clear()
+        self._pending_state_attributes = {}
+        self._pending_events = []
+        self._pending_states = []
+        self._pending_statistics = []
+        self._pending_logbook_entries = []
+        self._logbook_indexed_since_saved = False
+
     def _open_event_session(self):
         """Open the event session."""
         try:
@@ -608,7 +998,31 @@ class Recorder(threading.Thread):
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
-        self.queue.put(event)
+        if self._logbook_indexer is not None:
+            event = LogbookEvent(event, self._async_describe_for_logbook(event))
+        if self._spill is not None:
+            self._spill.put(event)
+        else:
+            self.queue.put(event)
+
+    @callback
+    def _async_describe_for_logbook(self, event):
+        """Return the logbook entry row of an event, or None."""
+        try:
+            return self._logbook_indexer(event)
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to keep recording the event
+            _LOGGER.exception("Error describing logbook entry: %s", err)
+            return None
+
+    def commit(self, timeout: float | None = None) -> bool:
+        """Wait until the events fired so far are in the database.
+
+        Returns False if they were not committed within timeout.
+        """
+        done = threading.Event()
+        self.queue.put(CommitTask(done))
+        return done.wait(timeout)
 
     def block_till_done(self):
         """Block till all events processed.
@@ -715,6 +1129,7 @@ class Recorder(threading.Thread):
             session.add(self.run_info)
             session.flush()
             session.expunge(self.run_info)
+        self._logbook_indexed_since_saved = False
 
     def _shutdown(self):
         """Save end time for current run."""
@@ -731,3 +1146,5 @@ class Recorder(threading.Thread):
 
         self.run_info = None
         self._close_connection()
+        if self._spill is not None:
+            self._spill.stop()
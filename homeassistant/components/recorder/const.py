@@ -8,3 +8,16 @@ CONF_DB_INTEGRITY_CHECK = "db_integrity_check"
 
 # The maximum number of rows (events) we purge in one delete statement
 MAX_ROWS_TO_PURGE = 1000
+
+# The chunks of a purge are shrunk to this number of rows when they are slow
+MIN_ROWS_TO_PURGE = 50
+
+# How long a chunk of a purge should keep the database busy
+PURGE_CHUNK_SECONDS = 1
+
+# A purge waits while more events than this are waiting to be recorded
+PURGE_DEFER_BACKLOG = 100
+# A purge runs anyway after waiting this many times
+PURGE_MAX_DEFERRALS = 50
+
+EVENT_RECORDER_PURGE_PROGRESS = "recorder_purge_progress"
@@ -363,6 +363,21 @@ def _apply_update(engine, new_version, old_version):
         if engine.dialect.name == "mysql":
             _modify_columns(engine, "events", ["event_data LONGTEXT"])
             _modify_columns(engine, "states", ["attributes LONGTEXT"])
+    elif new_version == 13:
+        # The state_attributes table is created with the other missing
+        # tables. Existing rows keep their attributes inline, only new
+        # states reference the shared attributes.
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 14:
+        # The statistics table is created with the other missing tables
+        pass
+    elif new_version == 15:
+        # The purge_runs table is created with the other missing tables
+        pass
+    elif new_version == 16:
+        # The logbook_entries table is created with the other missing tables
+        _add_columns(engine, "recorder_runs", ["logbook_indexed_since DATETIME"])
     else:
         raise ValueError(f"No schema migration defined for version {new_version}")
 
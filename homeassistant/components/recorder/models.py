@@ -1,11 +1,17 @@
 """Models for SQLAlchemy."""
-import json
+from __future__ import annotations
+
+from datetime import datetime
+import hashlib
 import logging
+from typing import Any, NamedTuple
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -19,14 +25,14 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.orm.session import Session
 
 from homeassistant.core import Context, Event, EventOrigin, State, split_entity_id
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps, json_loads
 import homeassistant.util.dt as dt_util
 
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 12
+SCHEMA_VERSION = 16
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,10 +40,23 @@ DB_TIMEZONE = "+00:00"
 
 TABLE_EVENTS = "events"
 TABLE_STATES = "states"
+TABLE_STATE_ATTRIBUTES = "state_attributes"
+TABLE_STATISTICS = "statistics"
+TABLE_LOGBOOK_ENTRIES = "logbook_entries"
 TABLE_RECORDER_RUNS = "recorder_runs"
+TABLE_PURGE_RUNS = "purge_runs"
 TABLE_SCHEMA_CHANGES = "schema_changes"
 
-ALL_TABLES = [TABLE_STATES, TABLE_EVENTS, TABLE_RECORDER_RUNS, TABLE_SCHEMA_CHANGES]
+ALL_TABLES = [
+    TABLE_STATES,
+    TABLE_STATE_ATTRIBUTES,
+    TABLE_EVENTS,
+    TABLE_STATISTICS,
+    TABLE_LOGBOOK_ENTRIES,
+    TABLE_RECORDER_RUNS,
+    TABLE_PURGE_RUNS,
+    TABLE_SCHEMA_CHANGES,
+]
 
 
 class Events(Base):  # type: ignore
@@ -76,15 +95,20 @@ class Events(Base):  # type: ignore
     @staticmethod
     def from_event(event, event_data=None):
         """Create an event database object from a native event."""
-        return Events(
-            event_type=event.event_type,
-            event_data=event_data or json.dumps(event.data, cls=JSONEncoder),
-            origin=str(event.origin.value),
-            time_fired=event.time_fired,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            context_parent_id=event.context.parent_id,
-        )
+        return Events(**Events.row_from_event(event, event_data))
+
+    @staticmethod
+    def row_from_event(event, event_data=None):
+        """Create the column values of an event row from a native event."""
+        return {
+            "event_type": event.event_type,
+            "event_data": event_data or json_dumps(event.data),
+            "origin": str(event.origin.value),
+            "time_fired": event.time_fired,
+            "context_id": event.context.id,
+            "context_user_id": event.context.user_id,
+            "context_parent_id": event.context.parent_id,
+        }
 
     def to_native(self, validate_entity_id=True):
         """Convert to a natve HA Event."""
@@ -96,7 +120,7 @@ class Events(Base):  # type: ignore
         try:
             return Event(
                 self.event_type,
-                json.loads(self.event_data),
+                json_loads(self.event_data),
                 EventOrigin(self.origin),
                 process_timestamp(self.time_fired),
                 context=context,
@@ -129,8 +153,12 @@ class States(Base):  # type: ignore
     old_state_id = Column(
         Integer, ForeignKey("states.state_id", ondelete="NO ACTION"), index=True
     )
+    attributes_id = Column(
+        Integer, ForeignKey("state_attributes.attributes_id"), index=True
+    )
     event = relationship("Events", uselist=False)
     old_state = relationship("States", remote_side=[state_id])
+    state_attributes = relationship("StateAttributes", uselist=False)
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
@@ -152,34 +180,45 @@ class States(Base):  # type: ignore
     @staticmethod
     def from_event(event):
         """Create object from a state_changed event."""
+        return States(**States.row_from_event(event))
+
+    @staticmethod
+    def row_from_event(event):
+        """Create the column values of a state row from a state_changed event."""
         entity_id = event.data["entity_id"]
         state = event.data.get("new_state")
 
-        dbstate = States(entity_id=entity_id)
-
         # State got deleted
         if state is None:
-            dbstate.state = ""
-            dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = "{}"
-            dbstate.last_changed = event.time_fired
-            dbstate.last_updated = event.time_fired
-        else:
-            dbstate.domain = state.domain
-            dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
-            dbstate.last_changed = state.last_changed
-            dbstate.last_updated = state.last_updated
-
-        return dbstate
+            return {
+                "entity_id": entity_id,
+                "domain": split_entity_id(entity_id)[0],
+                "state": "",
+                "attributes": "{}",
+                "last_changed": event.time_fired,
+                "last_updated": event.time_fired,
+            }
+
+        return {
+            "entity_id": entity_id,
+            "domain": state.domain,
+            "state": state.state,
+            "attributes": json_dumps(dict(state.attributes)),
+            "last_changed": state.last_changed,
+            "last_updated": state.last_updated,
+        }
 
     def to_native(self, validate_entity_id=True):
         """Convert to an HA state object."""
+        attributes = self.attributes
+        if attributes is None and self.state_attributes is not None:
+            # The attributes are shared with other states
+            attributes = self.state_attributes.shared_attrs
         try:
             return State(
                 self.entity_id,
                 self.state,
-                json.loads(self.attributes),
+                json_loads(attributes) if attributes else {},
                 process_timestamp(self.last_changed),
                 process_timestamp(self.last_updated),
                 # Join the events table on event_id to get the context instead
@@ -193,6 +232,144 @@ class States(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):  # type: ignore
+    """State attribute change history.
+
+    States with identical attributes share a single row.
+    """
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_STATE_ATTRIBUTES
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.StateAttributes("
+            f"id={self.attributes_id}, hash='{self.hash}', "
+            f"attributes='{self.shared_attrs}'"
+            f")>"
+        )
+
+    @staticmethod
+    def from_shared_attrs(shared_attrs):
+        """Create object from the serialized attributes of a state."""
+        return StateAttributes(**StateAttributes.row_from_shared_attrs(shared_attrs))
+
+    @staticmethod
+    def row_from_shared_attrs(shared_attrs):
+        """Create the column values of a row from serialized attributes."""
+        return {
+            "hash": StateAttributes.hash_shared_attrs(shared_attrs),
+            "shared_attrs": shared_attrs,
+        }
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the content hash of the serialized attributes.
+
+        The hash narrows down the rows to compare, it is not unique.
+        """
+        digest = hashlib.blake2b(shared_attrs.encode("utf-8"), digest_size=8)
+        # Keep the hash in the range of a signed 64 bit column
+        return int.from_bytes(digest.digest(), "big") >> 1
+
+    def to_native(self):
+        """Convert to a dict of state attributes."""
+        try:
+            return json_loads(self.shared_attrs)
+        except ValueError:
+            # When json_loads fails
+            _LOGGER.exception("Error converting row to state attributes: %s", self)
+            return {}
+
+
+class Statistics(Base):  # type: ignore
+    """Hourly statistics of numeric sensors.
+
+    Statistics are kept when old states are purged.
+    """
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_STATISTICS
+    id = Column(Integer, primary_key=True)
+    created = Column(DateTime(timezone=True), default=dt_util.utcnow)
+    statistic_id = Column(String(255))
+    start = Column(DateTime(timezone=True))
+    mean = Column(Float())
+    min = Column(Float())
+    max = Column(Float())
+    state = Column(Float())
+    sum = Column(Float())
+
+    __table_args__ = (
+        # Used for fetching statistics for a certain entity at a specific time
+        Index("ix_statistics_statistic_id_start", "statistic_id", "start"),
+    )
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.Statistics("
+            f"id={self.id}, statistic_id='{self.statistic_id}', "
+            f"start='{self.start}', mean={self.mean}, sum={self.sum}"
+            f")>"
+        )
+
+
+class LogbookEntries(Base):  # type: ignore
+    """Logbook entries, described when their event is recorded.
+
+    The entry is the JSON of the logbook entry without its time, the
+    entity_id and domain are the ones the logbook is filtered by.
+    """
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_LOGBOOK_ENTRIES
+    entry_id = Column(Integer, primary_key=True)
+    event_id = Column(
+        Integer, ForeignKey("events.event_id", ondelete="CASCADE"), index=True
+    )
+    event_type = Column(String(32))
+    time_fired = Column(DateTime(timezone=True), index=True)
+    entity_id = Column(String(255))
+    domain = Column(String(64))
+    context_id = Column(String(36), index=True)
+    entry = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
+
+    __table_args__ = (
+        # Used for the logbook of entities
+        Index("ix_logbook_entries_entity_id_time_fired", "entity_id", "time_fired"),
+    )
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.LogbookEntries("
+            f"id={self.entry_id}, event_type='{self.event_type}', "
+            f"entity_id='{self.entity_id}', time_fired='{self.time_fired}'"
+            f")>"
+        )
+
+
+class LogbookEvent(NamedTuple):
+    """An event with its logbook entry row, described on the event loop."""
+
+    event: Event
+    entry_row: dict[str, Any] | None
+
+
 class RecorderRuns(Base):  # type: ignore
     """Representation of recorder run."""
 
@@ -202,6 +379,8 @@ class RecorderRuns(Base):  # type: ignore
     end = Column(DateTime(timezone=True))
     closed_incorrect = Column(Boolean, default=False)
     created = Column(DateTime(timezone=True), default=dt_util.utcnow)
+    # Logbook entries are recorded for the events of the run after this time
+    logbook_indexed_since = Column(DateTime(timezone=True))
 
     __table_args__ = (Index("ix_recorder_runs_start_end", "start", "end"),)
 
@@ -244,6 +423,37 @@ class RecorderRuns(Base):  # type: ignore
         return self
 
 
+class PurgeRuns(Base):  # type: ignore
+    """Representation of a purge that is done in chunks.
+
+    A purge that did not finish is resumed when the recorder starts.
+    """
+
+    __tablename__ = TABLE_PURGE_RUNS
+    run_id = Column(Integer, primary_key=True)
+    start = Column(DateTime(timezone=True), default=dt_util.utcnow)
+    end = Column(DateTime(timezone=True))
+    purge_before = Column(DateTime(timezone=True))
+    keep_days = Column(Integer)
+    repack = Column(Boolean, default=False)
+    apply_filter = Column(Boolean, default=False)
+    chunks = Column(Integer, default=0)
+    states_purged = Column(Integer, default=0)
+    events_purged = Column(Integer, default=0)
+    state_attributes_purged = Column(Integer, default=0)
+    elapsed = Column(Float(), default=0)
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.PurgeRuns("
+            f"id={self.run_id}, keep_days={self.keep_days}, "
+            f"purge_before='{self.purge_before}', end='{self.end}', "
+            f"chunks={self.chunks}"
+            f")>"
+        )
+
+
 class SchemaChanges(Base):  # type: ignore
     """Representation of schema version changes."""
 
@@ -272,7 +482,7 @@ def process_timestamp(ts):
     return dt_util.as_utc(ts)
 
 
-def process_timestamp_to_utc_isoformat(ts):
+def process_timestamp_to_utc_isoformat(ts: datetime | None) -> str | None:
     """Process a timestamp into UTC isotime."""
     if ts is None:
         return None
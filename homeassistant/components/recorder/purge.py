@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 import logging
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.orm.session import Session
@@ -12,8 +12,21 @@ from sqlalchemy.sql.expression import distinct
 
 import homeassistant.util.dt as dt_util
 
-from .const import MAX_ROWS_TO_PURGE
-from .models import Events, RecorderRuns, States
+from .const import (
+    EVENT_RECORDER_PURGE_PROGRESS,
+    MAX_ROWS_TO_PURGE,
+    MIN_ROWS_TO_PURGE,
+    PURGE_CHUNK_SECONDS,
+)
+from .models import (
+    Events,
+    LogbookEntries,
+    PurgeRuns,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    process_timestamp_to_utc_isoformat,
+)
 from .repack import repack_database
 from .util import session_scope
 
@@ -28,30 +41,31 @@ def purge_old_data(
 ) -> bool:
     """Purge events and states older than purge_days ago.
 
-    Cleans up an timeframe of an hour, based on the oldest record.
+    Cleans up one chunk of rows, based on the oldest record, in its own
+    transaction. The progress is kept in the purge_runs table so a purge
+    that is interrupted by a restart continues where it stopped.
+    Long-term statistics are never purged.
     """
-    purge_before = dt_util.utcnow() - timedelta(days=purge_days)
-    _LOGGER.debug(
-        "Purging states and events before target %s",
-        purge_before.isoformat(sep=" ", timespec="seconds"),
-    )
+    start = time.perf_counter()
     try:
         with session_scope(session=instance.get_session()) as session:  # type: ignore
-            # Purge a max of MAX_ROWS_TO_PURGE, based on the oldest states or events record
-            event_ids = _select_event_ids_to_purge(session, purge_before)
-            state_ids = _select_state_ids_to_purge(session, purge_before, event_ids)
-            if state_ids:
-                _purge_state_ids(session, state_ids)
-            if event_ids:
-                _purge_event_ids(session, event_ids)
-                # If states or events purging isn't processing the purge_before yet,
-                # return false, as we are not done yet.
-                _LOGGER.debug("Purging hasn't fully completed yet")
-                return False
-            if apply_filter and _purge_filtered_data(instance, session) is False:
-                _LOGGER.debug("Cleanup filtered data hasn't fully completed yet")
-                return False
-            _purge_old_recorder_runs(instance, session, purge_before)
+            purge_run = _get_purge_run(session, purge_days, repack, apply_filter)
+            purge_before = purge_run.purge_before
+            _LOGGER.debug(
+                "Purging states and events before target %s",
+                purge_before.isoformat(sep=" ", timespec="seconds"),
+            )
+            finished = _purge_chunk(instance, session, purge_run)
+            elapsed = time.perf_counter() - start
+            purge_run.chunks += 1
+            purge_run.elapsed += elapsed
+            if finished:
+                purge_run.end = dt_util.utcnow()
+            progress = _purge_run_progress(purge_run)
+        _adjust_purge_chunk_size(instance, elapsed)
+        instance.hass.bus.fire(EVENT_RECORDER_PURGE_PROGRESS, progress)
+        if not finished:
+            return False
         if repack:
             repack_database(instance)
     except OperationalError as err:
@@ -74,35 +88,155 @@ def purge_old_data(
     return True
 
 
-def _select_event_ids_to_purge(session: Session, purge_before: datetime) -> list[int]:
-    """Return a list of event ids to purge."""
+def _get_purge_run(
+    session: Session, purge_days: int, repack: bool, apply_filter: bool
+) -> PurgeRuns:
+    """Return the unfinished purge run with these options or start a new one."""
+    purge_run: PurgeRuns | None = (
+        session.query(PurgeRuns).filter(PurgeRuns.end.is_(None)).first()
+    )
+    if purge_run is not None:
+        if (
+            purge_run.keep_days,
+            bool(purge_run.repack),
+            bool(purge_run.apply_filter),
+        ) == (
+            purge_days,
+            bool(repack),
+            bool(apply_filter),
+        ):
+            return purge_run
+        # A purge with other options replaces the unfinished one
+        purge_run.end = dt_util.utcnow()
+
+    purge_run = PurgeRuns(
+        start=dt_util.utcnow(),
+        purge_before=dt_util.utcnow() - timedelta(days=purge_days),
+        keep_days=purge_days,
+        repack=bool(repack),
+        apply_filter=bool(apply_filter),
+        chunks=0,
+        states_purged=0,
+        events_purged=0,
+        state_attributes_purged=0,
+        elapsed=0,
+    )
+    session.add(purge_run)
+    return purge_run
+
+
+def unfinished_purge_run(session: Session) -> PurgeRuns | None:
+    """Return the purge run that was interrupted, if any."""
+    purge_run: PurgeRuns | None = (
+        session.query(PurgeRuns).filter(PurgeRuns.end.is_(None)).first()
+    )
+    if purge_run is not None:
+        session.expunge(purge_run)
+    return purge_run
+
+
+def _purge_chunk(instance: Recorder, session: Session, purge_run: PurgeRuns) -> bool:
+    """Purge a chunk of rows and count them in the purge run.
+
+    Returns True when there is nothing left to purge.
+    """
+    purge_before = purge_run.purge_before
+    max_rows = instance.purge_chunk_size
+    # Purge a max of max_rows, based on the oldest states or events record
+    event_ids = _select_event_ids_to_purge(session, purge_before, max_rows)
+    state_ids, attributes_ids = _select_state_and_attributes_ids_to_purge(
+        session, purge_before, event_ids
+    )
+    if state_ids:
+        purge_run.states_purged += _purge_state_ids(session, state_ids)
+    purge_run.state_attributes_purged += _purge_unused_attributes_ids(
+        instance, session, attributes_ids
+    )
+    if event_ids:
+        purge_run.events_purged += _purge_event_ids(session, event_ids)
+        # If states or events purging isn't processing the purge_before yet,
+        # return false, as we are not done yet.
+        _LOGGER.debug("Purging hasn't fully completed yet")
+        return False
+    if purge_run.apply_filter and not _purge_filtered_data(
+        instance, session, purge_run, max_rows
+    ):
+        _LOGGER.debug("Cleanup filtered data hasn't fully completed yet")
+        return False
+    _purge_old_recorder_runs(instance, session, purge_before)
+    return True
+
+
+def _purge_run_progress(purge_run: PurgeRuns) -> dict[str, Any]:
+    """Return the progress of a purge run as event data."""
+    purged = (
+        purge_run.states_purged
+        + purge_run.events_purged
+        + purge_run.state_attributes_purged
+    )
+    return {
+        "keep_days": purge_run.keep_days,
+        "purge_before": process_timestamp_to_utc_isoformat(purge_run.purge_before),
+        "chunks": purge_run.chunks,
+        "states_purged": purge_run.states_purged,
+        "events_purged": purge_run.events_purged,
+        "state_attributes_purged": purge_run.state_attributes_purged,
+        "elapsed": round(purge_run.elapsed, 3),
+        "rows_per_second": round(purged / purge_run.elapsed, 1)
+        if purge_run.elapsed
+        else None,
+        "finished": purge_run.end is not None,
+    }
+
+
+def _adjust_purge_chunk_size(instance: Recorder, elapsed: float) -> None:
+    """Size the next chunk so it takes about PURGE_CHUNK_SECONDS."""
+    if elapsed > PURGE_CHUNK_SECONDS:
+        instance.purge_chunk_size = max(
+            MIN_ROWS_TO_PURGE, instance.purge_chunk_size // 2
+        )
+    elif elapsed < PURGE_CHUNK_SECONDS / 4:
+        instance.purge_chunk_size = min(
+            MAX_ROWS_TO_PURGE, instance.purge_chunk_size * 2
+        )
+
+
+def _select_event_ids_to_purge(
+    session: Session, purge_before: datetime, max_rows: int
+) -> list[int]:
+    """Return a list of the oldest event ids to purge."""
     events = (
         session.query(Events.event_id)
         .filter(Events.time_fired < purge_before)
-        .limit(MAX_ROWS_TO_PURGE)
+        .order_by(Events.time_fired)
+        .limit(max_rows)
         .all()
     )
     _LOGGER.debug("Selected %s event ids to remove", len(events))
     return [event.event_id for event in events]
 
 
-def _select_state_ids_to_purge(
+def _select_state_and_attributes_ids_to_purge(
     session: Session, purge_before: datetime, event_ids: list[int]
-) -> list[int]:
-    """Return a list of state ids to purge."""
+) -> tuple[list[int], set[int]]:
+    """Return a list of state ids and a set of attributes ids to purge."""
     if not event_ids:
-        return []
+        return [], set()
     states = (
-        session.query(States.state_id)
+        session.query(States.state_id, States.attributes_id)
         .filter(States.last_updated < purge_before)
         .filter(States.event_id.in_(event_ids))
         .all()
     )
     _LOGGER.debug("Selected %s state ids to remove", len(states))
-    return [state.state_id for state in states]
+    state_ids = [state.state_id for state in states]
+    attributes_ids = {
+        state.attributes_id for state in states if state.attributes_id is not None
+    }
+    return state_ids, attributes_ids
 
 
-def _purge_state_ids(session: Session, state_ids: list[int]) -> None:
+def _purge_state_ids(session: Session, state_ids: list[int]) -> int:
     """Disconnect states and delete by state id."""
 
     # Update old_state_id to NULL before deleting to ensure
@@ -122,16 +256,51 @@ def _purge_state_ids(session: Session, state_ids: list[int]) -> None:
         .delete(synchronize_session=False)
     )
     _LOGGER.debug("Deleted %s states", deleted_rows)
+    return deleted_rows  # type: ignore[no-any-return]
+
 
+def _purge_unused_attributes_ids(
+    instance: Recorder, session: Session, attributes_ids: set[int]
+) -> int:
+    """Delete state attributes rows no other state refers to."""
+    if not attributes_ids:
+        return 0
 
-def _purge_event_ids(session: Session, event_ids: list[int]) -> None:
+    still_used = {
+        attributes_id
+        for (attributes_id,) in session.query(distinct(States.attributes_id))
+        .filter(States.attributes_id.in_(attributes_ids))
+        .all()
+    }
+    unused_attributes_ids = attributes_ids - still_used
+    if not unused_attributes_ids:
+        return 0
+
+    deleted_rows = (
+        session.query(StateAttributes)
+        .filter(StateAttributes.attributes_id.in_(unused_attributes_ids))
+        .delete(synchronize_session=False)
+    )
+    _LOGGER.debug("Deleted %s state attributes", deleted_rows)
+    instance.evict_purged_state_attributes_ids(unused_attributes_ids)
+    return deleted_rows  # type: ignore[no-any-return]
+
+
+def _purge_event_ids(session: Session, event_ids: list[int]) -> int:
     """Delete by event id."""
+    # The logbook entries of the events go with them
+    (
+        session.query(LogbookEntries)
+        .filter(LogbookEntries.event_id.in_(event_ids))
+        .delete(synchronize_session=False)
+    )
     deleted_rows = (
         session.query(Events)
         .filter(Events.event_id.in_(event_ids))
         .delete(synchronize_session=False)
     )
     _LOGGER.debug("Deleted %s events", deleted_rows)
+    return deleted_rows  # type: ignore[no-any-return]
 
 
 def _purge_old_recorder_runs(
@@ -147,8 +316,17 @@ def _purge_old_recorder_runs(
     )
     _LOGGER.debug("Deleted %s recorder_runs", deleted_rows)
 
+    deleted_rows = (
+        session.query(PurgeRuns)
+        .filter(PurgeRuns.end < purge_before)
+        .delete(synchronize_session=False)
+    )
+    _LOGGER.debug("Deleted %s purge_runs", deleted_rows)
+
 
-def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
+def _purge_filtered_data(
+    instance: Recorder, session: Session, purge_run: PurgeRuns, max_rows: int
+) -> bool:
     """Remove filtered states and events that shouldn't be in the database."""
     _LOGGER.debug("Cleanup filtered data")
 
@@ -159,7 +337,9 @@ def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
         if not instance.entity_filter(entity_id)
     ]
     if len(excluded_entity_ids) > 0:
-        _purge_filtered_states(session, excluded_entity_ids)
+        _purge_filtered_states(
+            instance, session, purge_run, max_rows, excluded_entity_ids
+        )
         return False
 
     # Check if excluded event_types are in database
@@ -169,21 +349,30 @@ def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
         if event_type in instance.exclude_t
     ]
     if len(excluded_event_types) > 0:
-        _purge_filtered_events(session, excluded_event_types)
+        _purge_filtered_events(
+            instance, session, purge_run, max_rows, excluded_event_types
+        )
         return False
 
     return True
 
 
-def _purge_filtered_states(session: Session, excluded_entity_ids: list[str]) -> None:
+def _purge_filtered_states(
+    instance: Recorder,
+    session: Session,
+    purge_run: PurgeRuns,
+    max_rows: int,
+    excluded_entity_ids: list[str],
+) -> None:
     """Remove filtered states and linked events."""
     state_ids: list[int]
     event_ids: list[int | None]
-    state_ids, event_ids = zip(
+    attributes_ids: list[int | None]
+    state_ids, event_ids, attributes_ids = zip(
         *(
-            session.query(States.state_id, States.event_id)
+            session.query(States.state_id, States.event_id, States.attributes_id)
             .filter(States.entity_id.in_(excluded_entity_ids))
-            .limit(MAX_ROWS_TO_PURGE)
+            .limit(max_rows)
             .all()
         )
     )
@@ -191,16 +380,25 @@ def _purge_filtered_states(session: Session, excluded_entity_ids: list[str]) ->
     _LOGGER.debug(
         "Selected %s state_ids to remove that should be filtered", len(state_ids)
     )
-    _purge_state_ids(session, state_ids)
-    _purge_event_ids(session, event_ids)  # type: ignore  # type of event_ids already narrowed to 'list[int]'
+    purge_run.states_purged += _purge_state_ids(session, state_ids)
+    purge_run.events_purged += _purge_event_ids(session, event_ids)  # type: ignore  # type of event_ids already narrowed to 'list[int]'
+    purge_run.state_attributes_purged += _purge_unused_attributes_ids(
+        instance, session, {id_ for id_ in attributes_ids if id_ is not None}
+    )
 
 
-def _purge_filtered_events(session: Session, excluded_event_types: list[str]) -> None:
+def _purge_filtered_events(
+    instance: Recorder,
+    session: Session,
+    purge_run: PurgeRuns,
+    max_rows: int,
+    excluded_event_types: list[str],
+) -> None:
     """Remove filtered events and linked states."""
     events: list[Events] = (
         session.query(Events.event_id)
         .filter(Events.event_type.in_(excluded_event_types))
-        .limit(MAX_ROWS_TO_PURGE)
+        .limit(max_rows)
         .all()
     )
     event_ids: list[int] = [event.event_id for event in events]
@@ -208,8 +406,15 @@ def _purge_filtered_events(session: Session, excluded_event_types: list[str]) ->
         "Selected %s event_ids to remove that should be filtered", len(event_ids)
     )
     states: list[States] = (
-        session.query(States.state_id).filter(States.event_id.in_(event_ids)).all()
+        session.query(States.state_id, States.attributes_id)
+        .filter(States.event_id.in_(event_ids))
+        .all()
     )
     state_ids: list[int] = [state.state_id for state in states]
-    _purge_state_ids(session, state_ids)
-    _purge_event_ids(session, event_ids)
+    purge_run.states_purged += _purge_state_ids(session, state_ids)
+    purge_run.events_purged += _purge_event_ids(session, event_ids)
+    purge_run.state_attributes_purged += _purge_unused_attributes_ids(
+        instance,
+        session,
+        {state.attributes_id for state in states if state.attributes_id is not None},
+    )
@@ -0,0 +1,53 @@
+"""Sensor reporting the recorder backlog."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorEntity
+
+from .const import DATA_INSTANCE
+
+SCAN_INTERVAL = timedelta(seconds=10)
+
+UNIT_EVENTS = "events"
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """Set up the recorder backlog sensor."""
+    if discovery_info is None:
+        return
+
+    async_add_entities([RecorderBacklogSensor(hass.data[DATA_INSTANCE])], True)
+
+
+class RecorderBacklogSensor(SensorEntity):
+    """Representation of the number of events waiting to be recorded."""
+
+    def __init__(self, instance):
+        """Initialize the sensor."""
+        self._instance = instance
+        self._state = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Recorder backlog"
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit the value is expressed in."""
+        return UNIT_EVENTS
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:database-clock"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._state
+
+    async def async_update(self):
+        """Read the backlog of the recorder."""
+        self._state = self._instance.backlog
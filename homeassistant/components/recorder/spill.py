@@ -0,0 +1,238 @@
+"""Spill recorder events to disk when the queue is full."""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Iterator, NamedTuple
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Context, Event, EventOrigin, State, callback
+from homeassistant.helpers.json import json_dumps, json_loads
+import homeassistant.util.dt as dt_util
+
+from .models import LogbookEvent
+
+_LOGGER = logging.getLogger(__name__)
+
+SPILL_DIR = "recorder_backlog"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class ReplaySpillTask(NamedTuple):
+    """Object to tell the recorder to replay a segment of spilled events."""
+
+    segment: str
+
+
+class Spill:
+    """Bounded recorder queue that spills overflow to append-only files.
+
+    Events are put on the recorder queue until it holds max_backlog
+    items. After that a ReplaySpillTask marker is queued and every new
+    event is appended to a segment file by a writer thread, so the event
+    loop never waits for the disk. When the recorder reaches the marker
+    it replays the segment in order and only stops spilling once the
+    segment is drained, which keeps events in the order they were fired.
+    """
+
+    def __init__(self, recorder_queue: Any, path: str, max_backlog: int) -> None:
+        """Initialize the spill."""
+        self.recorder_queue = recorder_queue
+        self.path = path
+        self.max_backlog = max_backlog
+        self.spilled = 0
+        self._started_ns = time.time_ns()
+        self._segment: str | None = None
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self._flushed = threading.Event()
+        self._write_queue: Any = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+
+    @callback
+    def put(self, event: Event | LogbookEvent) -> None:
+        """Queue an event, spilling it to disk if the queue is full."""
+        with self._lock:
+            if self._segment is None:
+                if self.recorder_queue.qsize() < self.max_backlog:
+                    self.recorder_queue.put(event)
+                    return
+                self._segment = os.path.join(
+                    self.path, f"{time.time_ns()}{SEGMENT_SUFFIX}"
+                )
+                self.recorder_queue.put(ReplaySpillTask(self._segment))
+                _LOGGER.warning(
+                    "The recorder queue reached %s events, spilling to %s",
+                    self.max_backlog,
+                    self._segment,
+                )
+            self._pending_writes += 1
+            self.spilled += 1
+            self._flushed.clear()
+            segment = self._segment
+
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="Recorder spill", daemon=True
+            )
+            self._writer.start()
+        self._write_queue.put((segment, event))
+
+    def stop(self) -> None:
+        """Write out the events that are still in flight."""
+        if self._writer is None:
+            return
+        self._write_queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def leftover_segments(self) -> list[str]:
+        """Return the segments that were spilled before this run, oldest first."""
+        if not os.path.isdir(self.path):
+            return []
+        return [
+            os.path.join(self.path, name)
+            for name in sorted(os.listdir(self.path), key=_segment_sort_key)
+            if name.endswith(SEGMENT_SUFFIX)
+            and _segment_sort_key(name) < self._started_ns
+        ]
+
+    def replay(self, segment: str) -> Iterator[Event | LogbookEvent]:
+        """Read the events of a segment in the order they were spilled.
+
+        Keeps reading while the segment is being written to and stops
+        spilling once it is drained. The segment is removed afterwards.
+        """
+        current = segment == self._segment
+        try:
+            segment_file = open(segment, encoding="utf-8")
+        except FileNotFoundError:
+            # Every event in the segment failed to serialize
+            segment_file = None
+
+        try:
+            while True:
+                if segment_file is not None:
+                    yield from self._read_events(segment_file, current)
+                if not current:
+                    break
+                with self._lock:
+                    if self._pending_writes == 0:
+                        # Everything spilled so far has been written and
+                        # read, new events go to the queue from here on
+                        self._segment = None
+                        current = False
+                        continue
+                if segment_file is None:
+                    segment_file = _open_when_written(segment, self._flushed)
+                else:
+                    self._flushed.wait()
+        finally:
+            if segment_file is not None:
+                segment_file.close()
+
+        if os.path.exists(segment):
+            os.unlink(segment)
+
+    def _read_events(
+        self, segment_file: Any, current: bool
+    ) -> Iterator[Event | LogbookEvent]:
+        """Read complete lines from a segment."""
+        while True:
+            position = segment_file.tell()
+            line = segment_file.readline()
+            if not line:
+                return
+            if not line.endswith("\n"):
+                # The writer has not finished the line yet
+                segment_file.seek(position)
+                return
+            try:
+                event = _event_from_dict(json_loads(line))
+            except (ValueError, KeyError, TypeError) as err:
+                _LOGGER.warning("Skipping unreadable spilled event: %s", err)
+                event = None
+            if current:
+                with self._lock:
+                    self.spilled -= 1
+            if event is not None:
+                yield event
+
+    def _write_loop(self) -> None:
+        """Append spilled events to their segment."""
+        segment_file: Any = None
+        segment_path = None
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            segment, event = item
+            if segment != segment_path:
+                if segment_file is not None:
+                    segment_file.close()
+                os.makedirs(self.path, exist_ok=True)
+                segment_file = open(segment, "a", encoding="utf-8")
+                segment_path = segment
+            try:
+                segment_file.write(f"{json_dumps(_event_as_dict(event))}\n")
+            except (TypeError, ValueError):
+                _LOGGER.warning("Event is not JSON serializable: %s", event)
+                with self._lock:
+                    self.spilled -= 1
+            if self._write_queue.empty():
+                segment_file.flush()
+            with self._lock:
+                self._pending_writes -= 1
+                if self._write_queue.empty():
+                    self._flushed.set()
+
+        if segment_file is not None:
+            segment_file.close()
+
+
+def _open_when_written(segment: str, flushed: threading.Event) -> Any:
+    """Open a segment once the writer created it."""
+    flushed.wait()
+    try:
+        return open(segment, encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def _segment_sort_key(name: str) -> int:
+    """Order segments by the time they were started."""
+    try:
+        return int(name[: -len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return -1
+
+
+def _event_as_dict(event: Event | LogbookEvent) -> dict[str, Any]:
+    """Return the dict an event is spilled as."""
+    if isinstance(event, LogbookEvent):
+        return {**event.event.as_dict(), "logbook_entry": event.entry_row}
+    return event.as_dict()
+
+
+def _event_from_dict(event_dict: dict[str, Any]) -> Event | LogbookEvent:
+    """Rebuild a spilled event."""
+    data = event_dict["data"]
+    if event_dict["event_type"] == EVENT_STATE_CHANGED:
+        data["old_state"] = State.from_dict(data.get("old_state"))
+        data["new_state"] = State.from_dict(data.get("new_state"))
+    event = Event(
+        event_dict["event_type"],
+        data,
+        EventOrigin(event_dict["origin"]),
+        dt_util.parse_datetime(event_dict["time_fired"]),
+        Context(**event_dict["context"]),
+    )
+    if "logbook_entry" not in event_dict:
+        return event
+    entry_row = event_dict["logbook_entry"]
+    if entry_row is not None:
+        entry_row["time_fired"] = event.time_fired
+    return LogbookEvent(event, entry_row)
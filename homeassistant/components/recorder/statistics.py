@@ -0,0 +1,275 @@
+"""Long-term statistics of numeric sensors."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import math
+from typing import Any, Callable, Iterable
+
+from sqlalchemy.orm.session import Session
+
+from homeassistant.const import (
+    ATTR_STATE_CLASS,
+    ATTR_UNIT_OF_MEASUREMENT,
+    STATE_CLASS_TOTAL_INCREASING,
+)
+from homeassistant.core import State, split_entity_id
+from homeassistant.helpers.typing import HomeAssistantType
+
+from .models import Statistics, process_timestamp
+from .util import execute, session_scope
+
+STATISTICS_PERIOD = timedelta(hours=1)
+
+# Statistics are compiled for the entities of this domain
+SENSOR_DOMAIN = "sensor"
+
+
+def period_start(time: datetime) -> datetime:
+    """Return the start of the statistics period time is in."""
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+def numeric_value(state: State | None) -> float | None:
+    """Return the value of a numeric sensor state, if it is numeric."""
+    if state is None or ATTR_UNIT_OF_MEASUREMENT not in state.attributes:
+        return None
+    try:
+        value = float(state.state)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _unit(state: State | None) -> Any:
+    """Return the unit of a numeric sensor state."""
+    return state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) if state else None
+
+
+class _Accumulator:
+    """The statistics of one entity for the current period."""
+
+    __slots__ = (
+        "start",
+        "last_time",
+        "value",
+        "area",
+        "duration",
+        "min",
+        "max",
+        "state",
+        "sum",
+        "reference",
+        "unit",
+    )
+
+    def __init__(self, start: datetime, sum_: float | None, unit: Any) -> None:
+        """Initialize the accumulator."""
+        self.start = start
+        self.last_time = start
+        self.value: float | None = None
+        self.area = 0.0
+        self.duration = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self.state: float | None = None
+        # Only counters keep a sum
+        self.sum = sum_
+        self.reference: float | None = None
+        self.unit = unit
+
+    def integrate(self, time: datetime) -> None:
+        """Add the time since the last change to the time weighted mean."""
+        if time <= self.last_time:
+            return
+        if self.value is not None:
+            seconds = (time - self.last_time).total_seconds()
+            self.area += self.value * seconds
+            self.duration += seconds
+        self.last_time = time
+
+    def add(self, time: datetime, value: float | None) -> None:
+        """Record that the entity changed to value at time."""
+        self.integrate(time)
+        self.value = value
+        if value is None:
+            return
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.state = value
+        if self.sum is None:
+            return
+        if self.reference is not None:
+            # A counter that decreased was reset and counts up from zero
+            self.sum += value - self.reference if value >= self.reference else value
+        self.reference = value
+
+    def close(self) -> dict[str, Any] | None:
+        """Finish the current period and start the next one.
+
+        Returns the statistics row of the finished period, if the entity
+        had a numeric value during it.
+        """
+        end = self.start + STATISTICS_PERIOD
+        self.integrate(end)
+        row = None
+        if self.min is not None:
+            row = {
+                "start": self.start,
+                "mean": self.area / self.duration if self.duration else self.state,
+                "min": self.min,
+                "max": self.max,
+                "state": self.state,
+                "sum": self.sum,
+            }
+        self.start = self.last_time = end
+        self.area = self.duration = 0.0
+        self.min = self.max = self.value
+        return row
+
+
+class StatisticsCompiler:
+    """Compile hourly statistics of numeric sensors as states change.
+
+    The statistics of the current hour are kept in memory, with a time
+    weighted mean. Rows are returned for each hour that is finished.
+    Sensors with the total_increasing state class also keep a sum of
+    how much they increased since they were first recorded.
+    """
+
+    def __init__(
+        self, last_statistic: Callable[[str], tuple[float, float] | None]
+    ) -> None:
+        """Initialize the compiler.
+
+        last_statistic returns the state and sum of the last recorded
+        period of a counter, so the sum continues after a restart.
+        """
+        self._last_statistic = last_statistic
+        self._accumulators: dict[str, _Accumulator] = {}
+        self._period_start: datetime | None = None
+
+    def state_changed(
+        self, entity_id: str, new_state: State | None, time: datetime
+    ) -> list[dict[str, Any]]:
+        """Record a state change.
+
+        Returns the statistics rows of the periods that were finished.
+        """
+        accumulator = self._accumulators.get(entity_id)
+        if accumulator is None and split_entity_id(entity_id)[0] != SENSOR_DOMAIN:
+            return []
+
+        value = numeric_value(new_state)
+        rows = []
+        start = period_start(time)
+        if accumulator is not None:
+            rows = self._close_period(entity_id, accumulator, start)
+            if value is not None and _unit(new_state) != accumulator.unit:
+                # Values in different units can't be combined, the period
+                # starts over and a counter continues from the new value
+                accumulator = self._accumulators[entity_id] = _Accumulator(
+                    start, accumulator.sum, _unit(new_state)
+                )
+        elif value is not None:
+            accumulator = self._accumulators[entity_id] = self._new_accumulator(
+                entity_id, new_state, start  # type: ignore[arg-type]
+            )
+        else:
+            return []
+
+        accumulator.add(max(time, accumulator.last_time), value)
+        if new_state is None:
+            # Removed entities only keep the statistics that were finished
+            del self._accumulators[entity_id]
+        return rows
+
+    def compile(self, now: datetime) -> list[dict[str, Any]]:
+        """Finish the periods that ended before now.
+
+        Returns the statistics rows of the periods that were finished.
+        """
+        start = period_start(now)
+        if start == self._period_start:
+            return []
+        self._period_start = start
+        rows = []
+        for entity_id, accumulator in self._accumulators.items():
+            rows.extend(self._close_period(entity_id, accumulator, start))
+        return rows
+
+    def _new_accumulator(
+        self, entity_id: str, state: State, start: datetime
+    ) -> _Accumulator:
+        """Start keeping the statistics of an entity."""
+        unit = _unit(state)
+        if state.attributes.get(ATTR_STATE_CLASS) != STATE_CLASS_TOTAL_INCREASING:
+            return _Accumulator(start, None, unit)
+        last = self._last_statistic(entity_id)
+        if last is None:
+            return _Accumulator(start, 0.0, unit)
+        accumulator = _Accumulator(start, last[1], unit)
+        accumulator.reference = last[0]
+        return accumulator
+
+    @staticmethod
+    def _close_period(
+        entity_id: str, accumulator: _Accumulator, start: datetime
+    ) -> list[dict[str, Any]]:
+        """Finish the period of an entity if it ended before start.
+
+        The periods in between are finished by compile every hour. When
+        they were not, because the clock jumped, they are skipped.
+        """
+        if accumulator.start >= start:
+            return []
+        row = accumulator.close()
+        if accumulator.start < start:
+            accumulator.start = accumulator.last_time = start
+        if row is None:
+            return []
+        row["statistic_id"] = entity_id
+        return [row]
+
+
+def last_statistic(session: Session, statistic_id: str) -> tuple[float, float] | None:
+    """Return the state and sum of the last period of a counter."""
+    row = (
+        session.query(Statistics.state, Statistics.sum)
+        .filter(Statistics.statistic_id == statistic_id)
+        .filter(Statistics.sum.isnot(None))
+        .order_by(Statistics.start.desc())
+        .first()
+    )
+    if row is None:
+        return None
+    return row.state, row.sum
+
+
+def statistics_during_period(
+    hass: HomeAssistantType,
+    start_time: datetime,
+    end_time: datetime | None = None,
+    statistic_ids: Iterable[str] | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """Return the hourly statistics that started during a period."""
+    with session_scope(hass=hass) as session:
+        query = session.query(Statistics).filter(Statistics.start >= start_time)
+        if end_time is not None:
+            query = query.filter(Statistics.start < end_time)
+        if statistic_ids is not None:
+            query = query.filter(Statistics.statistic_id.in_(list(statistic_ids)))
+        query = query.order_by(Statistics.statistic_id, Statistics.start)
+
+        result: dict[str, list[dict[str, Any]]] = {}
+        for row in execute(query):
+            result.setdefault(row.statistic_id, []).append(
+                {
+                    "start": process_timestamp(row.start),
+                    "mean": row.mean,
+                    "min": row.min,
+                    "max": row.max,
+                    "state": row.state,
+                    "sum": row.sum,
+                }
+            )
+        return result
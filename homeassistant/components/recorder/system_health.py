@@ -0,0 +1,22 @@
+"""Provide info to system health."""
+from homeassistant.components import system_health
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_INSTANCE
+
+
+@callback
+def async_register(
+    hass: HomeAssistant, register: system_health.SystemHealthRegistration
+) -> None:
+    """Register system health callbacks."""
+    register.async_register_info(system_health_info)
+
+
+async def system_health_info(hass):
+    """Get info for the info page."""
+    instance = hass.data[DATA_INSTANCE]
+    health_info = {"backlog": instance.backlog}
+    if instance.commit_latency is not None:
+        health_info["commit_latency"] = f"{instance.commit_latency * 1000:.1f} ms"
+    return health_info
@@ -1,11 +1,15 @@
 """Component to interface with various sensors that can be monitored."""
 
+from __future__ import annotations
+
 from datetime import timedelta
 import logging
+from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.const import (
+from homeassistant.const import (  # noqa: F401
+    ATTR_STATE_CLASS,
     DEVICE_CLASS_BATTERY,
     DEVICE_CLASS_CO,
     DEVICE_CLASS_CO2,
@@ -20,6 +24,8 @@ from homeassistant.const import (
     DEVICE_CLASS_TEMPERATURE,
     DEVICE_CLASS_TIMESTAMP,
     DEVICE_CLASS_VOLTAGE,
+    STATE_CLASS_MEASUREMENT,
+    STATE_CLASS_TOTAL_INCREASING,
 )
 from homeassistant.helpers.config_validation import (  # noqa: F401
     PLATFORM_SCHEMA,
@@ -56,6 +62,10 @@ DEVICE_CLASSES = [
 
 DEVICE_CLASSES_SCHEMA = vol.All(vol.Lower, vol.In(DEVICE_CLASSES))
 
+STATE_CLASSES = [STATE_CLASS_MEASUREMENT, STATE_CLASS_TOTAL_INCREASING]
+
+STATE_CLASSES_SCHEMA = vol.All(vol.Lower, vol.In(STATE_CLASSES))
+
 
 async def async_setup(hass, config):
     """Track states and offer events for sensors."""
@@ -79,3 +89,16 @@ async def async_unload_entry(hass, entry):
 
 class SensorEntity(Entity):
     """Base class for sensor entities."""
+
+    @property
+    def state_class(self) -> str | None:
+        """Return the state class of this entity, from STATE_CLASSES, if any."""
+        return None
+
+    @property
+    def capability_attributes(self) -> dict[str, Any] | None:
+        """Return the capability attributes."""
+        state_class = self.state_class
+        if state_class is None:
+            return None
+        return {ATTR_STATE_CLASS: state_class}
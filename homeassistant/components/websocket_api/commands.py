@@ -6,7 +6,7 @@ import voluptuous as vol
 from homeassistant.auth.permissions.const import CAT_ENTITIES, POLICY_READ
 from homeassistant.components.websocket_api.const import ERR_NOT_FOUND
 from homeassistant.const import EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL
-from homeassistant.core import DOMAIN as HASS_DOMAIN, callback
+from homeassistant.core import DOMAIN as HASS_DOMAIN, Event, callback, split_entity_id
 from homeassistant.exceptions import (
     HomeAssistantError,
     ServiceNotFound,
@@ -14,7 +14,12 @@ from homeassistant.exceptions import (
     Unauthorized,
 )
 from homeassistant.helpers import config_validation as cv, entity, template
-from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    async_call_later,
+    async_track_template_result,
+)
+from homeassistant.helpers.json import json_dumps_list
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.loader import IntegrationNotFound, async_get_integration
 
@@ -27,6 +32,7 @@ from . import const, decorators, messages
 def async_register_commands(hass, async_reg):
     """Register commands."""
     async_reg(hass, handle_call_service)
+    async_reg(hass, handle_connection_stats)
     async_reg(hass, handle_entity_source)
     async_reg(hass, handle_execute_script)
     async_reg(hass, handle_get_config)
@@ -36,8 +42,10 @@ def async_register_commands(hass, async_reg):
     async_reg(hass, handle_manifest_list)
     async_reg(hass, handle_ping)
     async_reg(hass, handle_render_template)
+    async_reg(hass, handle_subscribe_entities)
     async_reg(hass, handle_subscribe_events)
     async_reg(hass, handle_subscribe_trigger)
+    async_reg(hass, handle_supported_features)
     async_reg(hass, handle_test_condition)
     async_reg(hass, handle_unsubscribe_events)
 
@@ -47,15 +55,83 @@ def pong_message(iden):
     return {"id": iden, "type": "pong"}
 
 
+class StateChangeCoalescer:
+    """Merge the state changes of an entity within a window into one event.
+
+    The first change of an entity starts the window, when it ends one
+    event is sent per entity with the old state of its first change and
+    the new state of its last change.
+    """
+
+    def __init__(self, hass, connection, msg_id, window):
+        """Initialize the coalescer."""
+        self._hass = hass
+        self._connection = connection
+        self._msg_id = msg_id
+        self._window = window
+        self._pending = {}
+        self._unsub_flush = None
+
+    @callback
+    def async_state_changed(self, event):
+        """Add a state change to the window."""
+        entity_id = event.data["entity_id"]
+        first = self._pending.get(entity_id)
+        if first is None:
+            self._pending[entity_id] = event
+        else:
+            self._connection.stats.coalesced_events += 1
+            self._pending[entity_id] = Event(
+                EVENT_STATE_CHANGED,
+                {
+                    "entity_id": entity_id,
+                    "old_state": first.data["old_state"],
+                    "new_state": event.data["new_state"],
+                },
+                event.origin,
+                event.time_fired,
+                event.context,
+            )
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self._hass, self._window, self._async_flush
+            )
+
+    @callback
+    def async_cancel(self):
+        """Forget the changes that were not sent."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._pending = {}
+
+    @callback
+    def _async_flush(self, _now):
+        """Send the changes of the window."""
+        self._unsub_flush = None
+        pending = self._pending
+        self._pending = {}
+        for event in pending.values():
+            self._connection.send_message(
+                messages.cached_event_message(self._msg_id, event)
+            )
+
+
 @callback
 @decorators.websocket_command(
     {
         vol.Required("type"): "subscribe_events",
         vol.Optional("event_type", default=MATCH_ALL): str,
+        vol.Optional("coalesce_window"): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=const.MAX_COALESCE_WINDOW)
+        ),
     }
 )
 def handle_subscribe_events(hass, connection, msg):
-    """Handle subscribe events command."""
+    """Handle subscribe events command.
+
+    State changes can be merged per entity within coalesce_window seconds.
+    """
     # Circular dep
     # pylint: disable=import-outside-toplevel
     from .permissions import SUBSCRIBE_ALLOWLIST
@@ -65,7 +141,12 @@ def handle_subscribe_events(hass, connection, msg):
     if event_type not in SUBSCRIBE_ALLOWLIST and not connection.user.is_admin:
         raise Unauthorized
 
+    coalescer = None
     if event_type == EVENT_STATE_CHANGED:
+        if msg.get("coalesce_window"):
+            coalescer = StateChangeCoalescer(
+                hass, connection, msg["id"], msg["coalesce_window"]
+            )
 
         @callback
         def forward_events(event):
@@ -75,6 +156,10 @@ def handle_subscribe_events(hass, connection, msg):
             ):
                 return
 
+            if coalescer is not None:
+                coalescer.async_state_changed(event)
+                return
+
             connection.send_message(messages.cached_event_message(msg["id"], event))
 
     else:
@@ -87,9 +172,19 @@ def handle_subscribe_events(hass, connection, msg):
 
             connection.send_message(messages.cached_event_message(msg["id"], event))
 
-    connection.subscriptions[msg["id"]] = hass.bus.async_listen(
-        event_type, forward_events
-    )
+    unsub = hass.bus.async_listen(event_type, forward_events)
+    if coalescer is None:
+        connection.subscriptions[msg["id"]] = unsub
+    else:
+        active_coalescer = coalescer
+
+        @callback
+        def _async_unsubscribe():
+            """Stop forwarding events."""
+            unsub()
+            active_coalescer.async_cancel()
+
+        connection.subscriptions[msg["id"]] = _async_unsubscribe
 
     connection.send_message(messages.result_message(msg["id"]))
 
@@ -193,7 +288,81 @@ def handle_get_states(hass, connection, msg):
             if entity_perm(state.entity_id, "read")
         ]
 
-    connection.send_message(messages.result_message(msg["id"], states))
+    try:
+        response = messages.result_message_json(msg["id"], json_dumps_list(states))
+    except (ValueError, TypeError):
+        # message_to_json reports the data that can not be serialized
+        connection.send_message(messages.result_message(msg["id"], states))
+        return
+
+    connection.send_message(response)
+
+
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "subscribe_entities",
+        vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("domains"): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    Sends the compressed states of the entities, followed by the keys
+    that were added, changed or removed when they change.
+    """
+    entity_ids = set(msg.get("entity_ids", []))
+    domains = set(msg.get("domains", []))
+    entity_perm = connection.user.permissions.check_entity
+
+    @callback
+    def _async_subscribed(entity_id):
+        """Return if the entity was subscribed to."""
+        return (
+            (not entity_ids and not domains)
+            or entity_id in entity_ids
+            or split_entity_id(entity_id)[0] in domains
+        )
+
+    @callback
+    def forward_entity_changes(event):
+        """Forward the state diffs of the entities to the websocket."""
+        if not entity_perm(event.data["entity_id"], POLICY_READ):
+            return
+
+        connection.send_message(messages.cached_state_diff_message(msg["id"], event))
+
+    if entity_ids and not domains:
+        connection.subscriptions[msg["id"]] = hass.bus.async_listen_entity(
+            entity_ids, forward_entity_changes
+        )
+    else:
+
+        @callback
+        def _async_entity_filter(event):
+            """Filter the state changes of the subscribed entities."""
+            return _async_subscribed(event.data["entity_id"])
+
+        connection.subscriptions[msg["id"]] = hass.bus.async_listen(
+            EVENT_STATE_CHANGED, forward_entity_changes, _async_entity_filter
+        )
+
+    connection.send_result(msg["id"])
+
+    connection.send_message(
+        messages.event_message(
+            msg["id"],
+            {
+                messages.ENTITY_EVENT_ADD: {
+                    state.entity_id: messages.compressed_state_dict(state)
+                    for state in hass.states.async_all()
+                    if _async_subscribed(state.entity_id)
+                    and entity_perm(state.entity_id, POLICY_READ)
+                }
+            },
+        )
+    )
 
 
 @decorators.websocket_command({vol.Required("type"): "get_services"})
@@ -248,6 +417,26 @@ def handle_ping(hass, connection, msg):
     connection.send_message(pong_message(msg["id"]))
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "supported_features",
+        vol.Required("features"): {str: int},
+    }
+)
+def handle_supported_features(hass, connection, msg):
+    """Handle setting the features the client supports."""
+    connection.supported_features = msg["features"]
+    connection.send_result(msg["id"])
+
+
+@callback
+@decorators.websocket_command({vol.Required("type"): "connection_stats"})
+def handle_connection_stats(hass, connection, msg):
+    """Handle getting the counters of the messages written to the connection."""
+    connection.send_result(msg["id"], connection.stats.as_dict())
+
+
 @decorators.websocket_command(
     {
         vol.Required("type"): "render_template",
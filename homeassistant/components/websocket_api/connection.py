@@ -14,6 +14,30 @@ from . import const, messages
 # mypy: allow-untyped-calls, allow-untyped-defs
 
 
+class ConnectionStats:
+    """Counters of the messages written to a connection."""
+
+    __slots__ = ("messages", "frames", "coalesced_events", "pending", "pending_peak")
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.messages = 0
+        self.frames = 0
+        self.coalesced_events = 0
+        self.pending = 0
+        self.pending_peak = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters."""
+        return {
+            "messages": self.messages,
+            "frames": self.frames,
+            "coalesced_events": self.coalesced_events,
+            "pending": self.pending,
+            "pending_peak": self.pending_peak,
+        }
+
+
 class ActiveConnection:
     """Handle an active websocket client connection."""
 
@@ -30,6 +54,8 @@ class ActiveConnection:
 
         self.subscriptions: dict[Hashable, Callable[[], Any]] = {}
         self.last_id = 0
+        self.supported_features: dict[str, float] = {}
+        self.stats = ConnectionStats()
 
     def context(self, msg):
         """Return a context."""
@@ -2,11 +2,10 @@
 import asyncio
 from concurrent import futures
 from functools import partial
-import json
 from typing import TYPE_CHECKING, Callable
 
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
 if TYPE_CHECKING:
     from .connection import ActiveConnection
@@ -20,6 +19,14 @@ PENDING_MSG_PEAK = 512
 PENDING_MSG_PEAK_TIME = 5
 MAX_PENDING_MSG = 2048
 
+# Negotiate permessage-deflate with clients that offer it
+WS_COMPRESS = True
+
+# Clients that support it get the messages waiting to be written in one frame
+FEATURE_COALESCE_MESSAGES = "coalesce_messages"
+# The longest window state changes of an entity can be merged in, in seconds
+MAX_COALESCE_WINDOW = 60
+
 ERR_ID_REUSE = "id_reuse"
 ERR_INVALID_FORMAT = "invalid_format"
 ERR_NOT_FOUND = "not_found"
@@ -45,4 +52,4 @@ SIGNAL_WEBSOCKET_DISCONNECTED = "websocket_disconnected"
 # Data used to store the current connection list
 DATA_CONNECTIONS = f"{DOMAIN}.connections"
 
-JSON_DUMP = partial(json.dumps, cls=JSONEncoder, allow_nan=False)
+JSON_DUMP = partial(json_dumps, allow_nan=False)
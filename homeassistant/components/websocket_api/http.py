@@ -12,17 +12,21 @@ from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
 from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.json import json_loads
 
 from .auth import AuthPhase, auth_required_message
+from .connection import ConnectionStats
 from .const import (
     CANCELLATION_ERRORS,
     DATA_CONNECTIONS,
+    FEATURE_COALESCE_MESSAGES,
     MAX_PENDING_MSG,
     PENDING_MSG_PEAK,
     PENDING_MSG_PEAK_TIME,
     SIGNAL_WEBSOCKET_CONNECTED,
     SIGNAL_WEBSOCKET_DISCONNECTED,
     URL,
+    WS_COMPRESS,
 )
 from .error import Disconnect
 from .messages import message_to_json
@@ -64,22 +68,46 @@ class WebSocketHandler:
         self._writer_task = None
         self._logger = WebSocketAdapter(_WS_LOGGER, {"connid": id(self)})
         self._peak_checker_unsub = None
+        self._connection = None
+        self._stats = ConnectionStats()
 
     async def _writer(self):
         """Write outgoing messages."""
         # Exceptions if Socket disconnected or cancelled by connection handler
         with suppress(RuntimeError, ConnectionResetError, *CANCELLATION_ERRORS):
-            while not self.wsock.closed:
+            closing = False
+            while not closing and not self.wsock.closed:
                 message = await self._to_write.get()
                 if message is None:
                     break
 
-                if not isinstance(message, str):
-                    message = message_to_json(message)
+                messages = [message]
+                if self._connection is not None and (
+                    self._connection.supported_features.get(FEATURE_COALESCE_MESSAGES)
+                ):
+                    # Write everything that is waiting in one frame
+                    while not self._to_write.empty():
+                        message = self._to_write.get_nowait()
+                        if message is None:
+                            closing = True
+                            break
+                        messages.append(message)
+                self._stats.pending = self._to_write.qsize()
+
+                messages = [
+                    message if isinstance(message, str) else message_to_json(message)
+                    for message in messages
+                ]
+                if len(messages) == 1:
+                    message = messages[0]
+                else:
+                    message = f"[{','.join(messages)}]"
 
                 self._logger.debug("Sending %s", message)
 
                 await self.wsock.send_str(message)
+                self._stats.messages += len(messages)
+                self._stats.frames += 1
 
         # Clean up the peaker checker when we shut down the writer
         if self._peak_checker_unsub:
@@ -96,6 +124,9 @@ class WebSocketHandler:
         """
         try:
             self._to_write.put_nowait(message)
+            pending = self._stats.pending = self._to_write.qsize()
+            if pending > self._stats.pending_peak:
+                self._stats.pending_peak = pending
         except asyncio.QueueFull:
             self._logger.error(
                 "Client exceeded max pending messages [2]: %s", MAX_PENDING_MSG
@@ -138,7 +169,7 @@ class WebSocketHandler:
     async def async_handle(self) -> web.WebSocketResponse:
         """Handle a websocket response."""
         request = self.request
-        wsock = self.wsock = web.WebSocketResponse(heartbeat=55)
+        wsock = self.wsock = web.WebSocketResponse(heartbeat=55, compress=WS_COMPRESS)
         await wsock.prepare(request)
         self._logger.debug("Connected from %s", request.remote)
         self._handle_task = asyncio.current_task()
@@ -179,13 +210,14 @@ class WebSocketHandler:
                 raise Disconnect
 
             try:
-                msg_data = msg.json()
+                msg_data = msg.json(loads=json_loads)
             except ValueError as err:
                 disconnect_warn = "Received invalid JSON."
                 raise Disconnect from err
 
             self._logger.debug("Received %s", msg_data)
-            connection = await auth.async_handle(msg_data)
+            connection = self._connection = await auth.async_handle(msg_data)
+            connection.stats = self._stats
             self.hass.data[DATA_CONNECTIONS] = (
                 self.hass.data.get(DATA_CONNECTIONS, 0) + 1
             )
@@ -205,7 +237,7 @@ class WebSocketHandler:
                     break
 
                 try:
-                    msg_data = msg.json()
+                    msg_data = msg.json(loads=json_loads)
                 except ValueError:
                     disconnect_warn = "Received invalid JSON."
                     break
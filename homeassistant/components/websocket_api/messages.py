@@ -7,7 +7,7 @@ from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.core import Event
+from homeassistant.core import Event, State
 from homeassistant.helpers import config_validation as cv
 from homeassistant.util.json import (
     find_paths_unserializable_data,
@@ -32,12 +32,36 @@ BASE_COMMAND_MESSAGE_SCHEMA = vol.Schema({vol.Required("id"): cv.positive_int})
 IDEN_TEMPLATE = "__IDEN__"
 IDEN_JSON_TEMPLATE = '"__IDEN__"'
 
+# Keys of the compressed states sent to subscribe_entities
+COMPRESSED_STATE_STATE = "s"
+COMPRESSED_STATE_ATTRIBUTES = "a"
+COMPRESSED_STATE_CONTEXT = "c"
+COMPRESSED_STATE_LAST_CHANGED = "lc"
+COMPRESSED_STATE_LAST_UPDATED = "lu"
+
+# Keys of the subscribe_entities events
+ENTITY_EVENT_ADD = "a"
+ENTITY_EVENT_REMOVE = "r"
+ENTITY_EVENT_CHANGE = "c"
+
+# Keys of a changed entity
+STATE_DIFF_ADDITIONS = "+"
+STATE_DIFF_REMOVALS = "-"
+
 
 def result_message(iden: int, result: Any = None) -> dict:
     """Return a success result message."""
     return {"id": iden, "type": const.TYPE_RESULT, "success": True, "result": result}
 
 
+def result_message_json(iden: int, result_json: str) -> str:
+    """Return a success result message with a result that is already JSON."""
+    return (
+        f'{{"id":{iden},"type":"{const.TYPE_RESULT}",'
+        f'"success":true,"result":{result_json}}}'
+    )
+
+
 def error_message(iden: int, code: str, message: str) -> dict:
     """Return an error result message."""
     return {
@@ -75,6 +99,92 @@ def _cached_event_message(event: Event) -> str:
     return message_to_json(event_message(IDEN_TEMPLATE, event))
 
 
+def compressed_state_dict(state: State) -> dict[str, Any]:
+    """Return a state with abbreviated keys.
+
+    last_updated is only included when it differs from last_changed and
+    the context is reduced to its id when it has no user or parent.
+    """
+    context = state.context
+    compressed: dict[str, Any] = {
+        COMPRESSED_STATE_STATE: state.state,
+        COMPRESSED_STATE_ATTRIBUTES: dict(state.attributes),
+        COMPRESSED_STATE_CONTEXT: context.id
+        if context.user_id is None and context.parent_id is None
+        else context.as_dict(),
+        COMPRESSED_STATE_LAST_CHANGED: state.last_changed.timestamp(),
+    }
+    if state.last_updated != state.last_changed:
+        compressed[COMPRESSED_STATE_LAST_UPDATED] = state.last_updated.timestamp()
+    return compressed
+
+
+def cached_state_diff_message(iden: int, event: Event) -> str:
+    """Return a subscribe_entities event message for a state changed event.
+
+    Serialize to json once per message, see cached_event_message.
+    """
+    return _cached_state_diff_message(event).replace(IDEN_JSON_TEMPLATE, str(iden), 1)
+
+
+@lru_cache(maxsize=128)
+def _cached_state_diff_message(event: Event) -> str:
+    """Cache and serialize the state diff of the event to json."""
+    return message_to_json(event_message(IDEN_TEMPLATE, _state_diff_event(event)))
+
+
+def _state_diff_event(event: Event) -> dict:
+    """Return the subscribe_entities event of a state changed event."""
+    new_state = event.data["new_state"]
+    if new_state is None:
+        return {ENTITY_EVENT_REMOVE: [event.data["entity_id"]]}
+    old_state = event.data["old_state"]
+    if old_state is None:
+        return {
+            ENTITY_EVENT_ADD: {new_state.entity_id: compressed_state_dict(new_state)}
+        }
+    return {
+        ENTITY_EVENT_CHANGE: {new_state.entity_id: _state_diff(old_state, new_state)}
+    }
+
+
+def _state_diff(old_state: State, new_state: State) -> dict[str, Any]:
+    """Return the keys of a state that were added, changed or removed."""
+    additions: dict[str, Any] = {}
+    diff: dict[str, Any] = {STATE_DIFF_ADDITIONS: additions}
+
+    if old_state.state != new_state.state:
+        additions[COMPRESSED_STATE_STATE] = new_state.state
+    if old_state.last_changed != new_state.last_changed:
+        additions[COMPRESSED_STATE_LAST_CHANGED] = new_state.last_changed.timestamp()
+    elif old_state.last_updated != new_state.last_updated:
+        additions[COMPRESSED_STATE_LAST_UPDATED] = new_state.last_updated.timestamp()
+
+    old_context = old_state.context
+    new_context = new_state.context
+    if old_context.id != new_context.id:
+        if new_context.user_id is None and new_context.parent_id is None:
+            additions[COMPRESSED_STATE_CONTEXT] = new_context.id
+        else:
+            additions[COMPRESSED_STATE_CONTEXT] = new_context.as_dict()
+
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+    if old_attributes != new_attributes:
+        changed = {
+            key: value
+            for key, value in new_attributes.items()
+            if key not in old_attributes or old_attributes[key] != value
+        }
+        if changed:
+            additions[COMPRESSED_STATE_ATTRIBUTES] = changed
+        removed = [key for key in old_attributes if key not in new_attributes]
+        if removed:
+            diff[STATE_DIFF_REMOVALS] = {COMPRESSED_STATE_ATTRIBUTES: removed}
+
+    return diff
+
+
 def message_to_json(message: Any) -> str:
     """Serialize a websocket message to json."""
     try:
@@ -233,6 +233,12 @@ DEVICE_CLASS_ENERGY = "energy"
 DEVICE_CLASS_POWER_FACTOR = "power_factor"
 DEVICE_CLASS_VOLTAGE = "voltage"
 
+# #### STATE CLASSES ####
+# The state represents a measurement in present time
+STATE_CLASS_MEASUREMENT = "measurement"
+# The state is a total that only increases, apart from resets
+STATE_CLASS_TOTAL_INCREASING = "total_increasing"
+
 # #### STATES ####
 STATE_ON = "on"
 STATE_OFF = "off"
@@ -307,6 +313,9 @@ ATTR_ICON = "icon"
 # The unit of measurement if applicable
 ATTR_UNIT_OF_MEASUREMENT = "unit_of_measurement"
 
+# The state class of a sensor, if it has one
+ATTR_STATE_CLASS = "state_class"
+
 CONF_UNIT_SYSTEM_METRIC: str = "metric"
 CONF_UNIT_SYSTEM_IMPERIAL: str = "imperial"
 
@@ -14,6 +14,7 @@ import logging
 import os
 import pathlib
 import re
+import sys
 import threading
 from time import monotonic
 from types import MappingProxyType
@@ -74,6 +75,7 @@ from homeassistant.util.async_ import (
     shutdown_run_callback_threadsafe,
 )
 import homeassistant.util.dt as dt_util
+from homeassistant.util.json import json_dumps
 from homeassistant.util.timeout import TimeoutManager
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM, UnitSystem
 import homeassistant.util.uuid as uuid_util
@@ -113,6 +115,12 @@ SOURCE_YAML = "yaml"
 # How long to wait until things that run on startup have to finish.
 TIMEOUT_EVENT_START = 15
 
+# Size of the cache of split entity ids, larger than most installs
+MAX_EXPECTED_ENTITY_IDS = 16384
+
+# Shared by all states without attributes
+_EMPTY_ATTRIBUTES: MappingProxyType = MappingProxyType({})
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -121,6 +129,16 @@ def split_entity_id(entity_id: str) -> list[str]:
     return entity_id.split(".", 1)
 
 
+@functools.lru_cache(MAX_EXPECTED_ENTITY_IDS)
+def _split_entity_id_interned(entity_id: str) -> tuple[str, str]:
+    """Split a state entity ID into an interned domain and object ID.
+
+    All states of an entity share the same domain and object id strings.
+    """
+    domain, object_id = entity_id.split(".", 1)
+    return sys.intern(domain), object_id
+
+
 VALID_ENTITY_ID = re.compile(r"^(?!.+__)(?!_)[\da-z_]+(?<!_)\.(?!_)[\da-z_]+(?<!_)$")
 
 
@@ -576,13 +594,23 @@ class HomeAssistant:
 class Context:
     """The context that triggered something."""
 
-    user_id: str = attr.ib(default=None)
+    user_id: str | None = attr.ib(default=None)
     parent_id: str | None = attr.ib(default=None)
     id: str = attr.ib(factory=uuid_util.random_uuid_hex)
+    _as_dict: dict[str, str | None] | None = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
 
     def as_dict(self) -> dict[str, str | None]:
         """Return a dictionary representation of the context."""
-        return {"id": self.id, "parent_id": self.parent_id, "user_id": self.user_id}
+        if self._as_dict is None:
+            # Context is frozen, the cache is set around attrs
+            object.__setattr__(
+                self,
+                "_as_dict",
+                {"id": self.id, "parent_id": self.parent_id, "user_id": self.user_id},
+            )
+        return self._as_dict  # type: ignore
 
 
 class EventOrigin(enum.Enum):
@@ -600,7 +628,7 @@ class EventOrigin(enum.Enum):
 class Event:
     """Representation of an event within the bus."""
 
-    __slots__ = ["event_type", "data", "origin", "time_fired", "context"]
+    __slots__ = ["event_type", "data", "origin", "time_fired", "context", "_as_dict"]
 
     def __init__(
         self,
@@ -616,24 +644,35 @@ class Event:
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
         self.context: Context = context or Context()
+        self._as_dict: dict[str, Any] | None = None
 
     def __hash__(self) -> int:
         """Make hashable."""
-        # The only event type that shares context are the TIME_CHANGED
-        return hash((self.event_type, self.context.id, self.time_fired))
+        # TIME_CHANGED events and the state changed events of a batch
+        # share context and time fired
+        return hash(
+            (
+                self.event_type,
+                self.context.id,
+                self.time_fired,
+                self.data.get("entity_id"),
+            )
+        )
 
     def as_dict(self) -> dict[str, Any]:
         """Create a dict representation of this Event.
 
         Async friendly.
         """
-        return {
-            "event_type": self.event_type,
-            "data": dict(self.data),
-            "origin": str(self.origin.value),
-            "time_fired": self.time_fired.isoformat(),
-            "context": self.context.as_dict(),
-        }
+        if self._as_dict is None:
+            self._as_dict = {
+                "event_type": self.event_type,
+                "data": dict(self.data),
+                "origin": str(self.origin.value),
+                "time_fired": self.time_fired.isoformat(),
+                "context": self.context.as_dict(),
+            }
+        return self._as_dict
 
     def __repr__(self) -> str:
         """Return the representation."""
@@ -660,15 +699,41 @@ class EventBus:
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners: dict[str, list[tuple[HassJob, Callable | None]]] = {}
+        self._entity_listeners: dict[str, list[HassJob]] = {}
+        self._batch_listeners: dict[str, list[HassJob]] = {}
+        self._entity_dispatch_job = HassJob(self._async_dispatch_entity_listeners)
         self._hass = hass
 
     @callback
     def async_listeners(self) -> dict[str, int]:
         """Return dictionary with events and the number of listeners.
 
+        The entity listeners are dispatched by a single state changed
+        listener, they are counted by async_entity_listeners. Batch
+        listeners are counted by async_batch_listeners.
+
+        This method must be run in the event loop.
+        """
+        listeners = {key: len(self._listeners[key]) for key in self._listeners}
+        if self._entity_listeners:
+            listeners[EVENT_STATE_CHANGED] = listeners.get(EVENT_STATE_CHANGED, 0) + 1
+        return listeners
+
+    @callback
+    def async_batch_listeners(self) -> dict[str, int]:
+        """Return dictionary with events and the number of batch listeners.
+
+        This method must be run in the event loop.
+        """
+        return {key: len(jobs) for key, jobs in self._batch_listeners.items()}
+
+    @callback
+    def async_entity_listeners(self) -> dict[str, int]:
+        """Return dictionary with entity ids and the number of state listeners.
+
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key]) for key in self._listeners}
+        return {key: len(jobs) for key, jobs in self._entity_listeners.items()}
 
     @property
     def listeners(self) -> dict[str, int]:
@@ -700,6 +765,58 @@ class EventBus:
 
         This method must be run in the event loop.
         """
+        event = Event(event_type, event_data, origin, time_fired, context)
+        self._async_dispatch(event)
+
+        batch_listeners = self._batch_listeners.get(event_type)
+        if batch_listeners is not None:
+            for job in batch_listeners:
+                self._hass.async_add_hass_job(job, [event])
+
+    @callback
+    def async_fire_many(
+        self,
+        event_type: str,
+        event_data_list: Iterable[dict[str, Any] | None],
+        origin: EventOrigin = EventOrigin.local,
+        context: Context | None = None,
+        time_fired: datetime.datetime | None = None,
+    ) -> None:
+        """Fire a batch of events of the same type.
+
+        Every event is dispatched to the regular listeners, listeners
+        registered with async_listen_batch are called once with the
+        list of all events.
+
+        This method must be run in the event loop.
+        """
+        if context is None:
+            context = Context()
+        if time_fired is None:
+            time_fired = dt_util.utcnow()
+
+        events = [
+            Event(event_type, event_data, origin, time_fired, context)
+            for event_data in event_data_list
+        ]
+        if not events:
+            return
+
+        for event in events:
+            self._async_dispatch(event)
+
+        batch_listeners = self._batch_listeners.get(event_type)
+        if batch_listeners is not None:
+            for job in batch_listeners:
+                self._hass.async_add_hass_job(job, events)
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        """Dispatch an event to its listeners.
+
+        This method must be run in the event loop.
+        """
+        event_type = event.event_type
         listeners = self._listeners.get(event_type, [])
 
         # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
@@ -707,11 +824,17 @@ class EventBus:
         if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
             listeners = match_all_listeners + listeners
 
-        event = Event(event_type, event_data, origin, time_fired, context)
-
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
+        # State changes are routed by entity_id with a dict lookup so
+        # the cost only depends on the listeners of that entity.
+        if (
+            event_type == EVENT_STATE_CHANGED
+            and event.data.get("entity_id") in self._entity_listeners
+        ):
+            self._hass.async_add_hass_job(self._entity_dispatch_job, event)
+
         if not listeners:
             return
 
@@ -777,6 +900,100 @@ class EventBus:
 
         return remove_listener
 
+    @callback
+    def async_listen_batch(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+        """Listen for batches of events of a specific type.
+
+        The listener is called with a list of events. Events fired with
+        async_fire_many are delivered in a single call, events fired with
+        async_fire are delivered as a list with one event.
+
+        This method must be run in the event loop.
+        """
+        job = HassJob(listener)
+        self._batch_listeners.setdefault(event_type, []).append(job)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            try:
+                self._batch_listeners[event_type].remove(job)
+
+                # delete event_type list if empty
+                if not self._batch_listeners[event_type]:
+                    self._batch_listeners.pop(event_type)
+            except (KeyError, ValueError):
+                _LOGGER.exception("Unable to remove unknown batch listener %s", job)
+
+        return remove_listener
+
+    @callback
+    def async_listen_entity(
+        self, entity_ids: Iterable[str], listener: Callable
+    ) -> CALLBACK_TYPE:
+        """Listen for state changed events of specific entity ids.
+
+        Listeners are indexed by entity_id, so firing a state change only
+        iterates the listeners of the entity that changed instead of all
+        EVENT_STATE_CHANGED listeners.
+
+        Entity ids must be lowercase.
+
+        This method must be run in the event loop.
+        """
+        entity_ids = tuple(entity_ids)
+        job = HassJob(listener)
+
+        for entity_id in entity_ids:
+            self._entity_listeners.setdefault(entity_id, []).append(job)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._async_remove_entity_listener(entity_ids, job)
+
+        return remove_listener
+
+    @callback
+    def _async_dispatch_entity_listeners(self, event: Event) -> None:
+        """Dispatch a state changed event to the listeners of its entity_id."""
+        entity_id = event.data["entity_id"]
+        jobs = self._entity_listeners.get(entity_id)
+
+        if jobs is None:
+            return
+
+        for job in jobs[:]:
+            try:
+                self._hass.async_run_hass_job(job, event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error while processing state change for %s", entity_id
+                )
+
+    @callback
+    def _async_remove_entity_listener(
+        self, entity_ids: Iterable[str], job: HassJob
+    ) -> None:
+        """Remove a listener of specific entity ids.
+
+        This method must be run in the event loop.
+        """
+        for entity_id in entity_ids:
+            try:
+                jobs = self._entity_listeners[entity_id]
+                jobs.remove(job)
+            except (KeyError, ValueError):
+                _LOGGER.exception(
+                    "Unable to remove unknown entity listener %s for %s",
+                    job,
+                    entity_id,
+                )
+                continue
+
+            if not jobs:
+                del self._entity_listeners[entity_id]
+
     def listen_once(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
         """Listen once for event of a specific type.
 
@@ -873,6 +1090,7 @@ class State:
         "domain",
         "object_id",
         "_as_dict",
+        "_as_json",
     ]
 
     def __init__(
@@ -902,12 +1120,19 @@ class State:
 
         self.entity_id = entity_id.lower()
         self.state = state
-        self.attributes = MappingProxyType(attributes or {})
+        if not attributes:
+            self.attributes = _EMPTY_ATTRIBUTES
+        elif isinstance(attributes, MappingProxyType):
+            # Share the read only attributes of a previous state
+            self.attributes = attributes
+        else:
+            self.attributes = MappingProxyType(attributes)
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
         self.context = context or Context()
-        self.domain, self.object_id = split_entity_id(self.entity_id)
+        self.domain, self.object_id = _split_entity_id_interned(self.entity_id)
         self._as_dict: dict[str, Collection[Any]] | None = None
+        self._as_json: str | None = None
 
     @property
     def name(self) -> str:
@@ -940,6 +1165,18 @@ class State:
             }
         return self._as_dict
 
+    def as_json(self) -> str:
+        """Return a JSON representation of the State.
+
+        Async friendly.
+
+        The JSON is only built once so it can be spliced into responses
+        without encoding the state again.
+        """
+        if self._as_json is None:
+            self._as_json = json_dumps(self.as_dict(), allow_nan=False)
+        return self._as_json
+
     @classmethod
     def from_dict(cls, json_dict: dict) -> Any:
         """Initialize a state from a dict.
@@ -1184,28 +1421,102 @@ class StateMachine:
         If you just update the attributes and not the state, last changed will
         not be affected.
 
+        This method must be run in the event loop.
+        """
+        event_data = self._async_update_state(
+            entity_id, new_state, attributes, force_update, context
+        )
+        if event_data is None:
+            return
+
+        state = event_data["new_state"]
+        self._bus.async_fire(
+            EVENT_STATE_CHANGED,
+            event_data,
+            EventOrigin.local,
+            state.context,
+            time_fired=state.last_updated,
+        )
+
+    @callback
+    def async_set_many(
+        self,
+        states: Iterable[tuple[str, str, Mapping[str, Any] | None]],
+        force_update: bool = False,
+        context: Context | None = None,
+    ) -> None:
+        """Set the states of multiple entities at once.
+
+        States is an iterable of (entity_id, new_state, attributes) tuples.
+        All states are updated with the same timestamp and context, a
+        state changed event is fired for every changed entity and batch
+        listeners receive all of them in a single call.
+
+        This method must be run in the event loop.
+        """
+        now: datetime.datetime | None = None
+        event_data_list = []
+
+        try:
+            for entity_id, new_state, attributes in states:
+                event_data = self._async_update_state(
+                    entity_id, new_state, attributes, force_update, context, now
+                )
+                if event_data is None:
+                    continue
+                if now is None:
+                    # The context and time of the first change are shared
+                    context = event_data["new_state"].context
+                    now = event_data["new_state"].last_updated
+                event_data_list.append(event_data)
+        finally:
+            # States that were already updated must always be announced
+            if event_data_list:
+                self._bus.async_fire_many(
+                    EVENT_STATE_CHANGED,
+                    event_data_list,
+                    EventOrigin.local,
+                    context,
+                    time_fired=now,
+                )
+
+    @callback
+    def _async_update_state(
+        self,
+        entity_id: str,
+        new_state: str,
+        attributes: Mapping[str, Any] | None,
+        force_update: bool,
+        context: Context | None,
+        now: datetime.datetime | None = None,
+    ) -> dict[str, Any] | None:
+        """Update the state of an entity in the state machine.
+
+        Returns the data of the state changed event to fire or None
+        if the state did not change. The context and time of the new
+        state are only created when the state changed.
+
         This method must be run in the event loop.
         """
         entity_id = entity_id.lower()
         new_state = str(new_state)
         attributes = attributes or {}
         old_state = self._states.get(entity_id)
-        if old_state is None:
-            same_state = False
-            same_attr = False
-            last_changed = None
-        else:
+        last_changed = None
+        if old_state is not None:
             same_state = old_state.state == new_state and not force_update
-            same_attr = old_state.attributes == MappingProxyType(attributes)
-            last_changed = old_state.last_changed if same_state else None
-
-        if same_state and same_attr:
-            return
+            if old_state.attributes == MappingProxyType(attributes):
+                if same_state:
+                    return None
+                # Unchanged attributes are shared with the old state
+                attributes = old_state.attributes
+            if same_state:
+                last_changed = old_state.last_changed
 
         if context is None:
             context = Context()
-
-        now = dt_util.utcnow()
+        if now is None:
+            now = dt_util.utcnow()
 
         state = State(
             entity_id,
@@ -1217,13 +1528,7 @@ class StateMachine:
             old_state is None,
         )
         self._states[entity_id] = state
-        self._bus.async_fire(
-            EVENT_STATE_CHANGED,
-            {"entity_id": entity_id, "old_state": old_state, "new_state": state},
-            EventOrigin.local,
-            context,
-            time_fired=now,
-        )
+        return {"entity_id": entity_id, "old_state": old_state, "new_state": state}
 
 
 class Service:
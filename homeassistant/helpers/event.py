@@ -35,15 +35,18 @@ from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
 from homeassistant.helpers.ratelimit import KeyedRateLimit
 from homeassistant.helpers.sun import get_astral_event_next
-from homeassistant.helpers.template import RenderInfo, Template, result_as_boolean
+from homeassistant.helpers.template import (
+    RenderInfo,
+    Template,
+    async_get_profiler,
+    result_as_boolean,
+    share_template_states,
+)
 from homeassistant.helpers.typing import TemplateVarsType
 from homeassistant.loader import bind_hass
 from homeassistant.util import dt as dt_util
 from homeassistant.util.async_ import run_callback_threadsafe
 
-TRACK_STATE_CHANGE_CALLBACKS = "track_state_change_callbacks"
-TRACK_STATE_CHANGE_LISTENER = "track_state_change_listener"
-
 TRACK_STATE_ADDED_DOMAIN_CALLBACKS = "track_state_added_domain_callbacks"
 TRACK_STATE_ADDED_DOMAIN_LISTENER = "track_state_added_domain_listener"
 
@@ -53,6 +56,11 @@ TRACK_STATE_REMOVED_DOMAIN_LISTENER = "track_state_removed_domain_listener"
 TRACK_ENTITY_REGISTRY_UPDATED_CALLBACKS = "track_entity_registry_updated_callbacks"
 TRACK_ENTITY_REGISTRY_UPDATED_LISTENER = "track_entity_registry_updated_listener"
 
+TEMPLATE_RENDER_SCHEDULER = "template_render_scheduler"
+# Seconds a loop iteration may spend rendering the templates state changes
+# made dirty before the rest is deferred to the next iteration
+TEMPLATE_RENDER_BUDGET = 0.05
+
 _ALL_LISTENER = "all"
 _DOMAINS_LISTENER = "domains"
 _ENTITIES_LISTENER = "entities"
@@ -241,62 +249,15 @@ def async_track_state_change_event(
 
     In order to avoid having to iterate a long list
     of EVENT_STATE_CHANGED and fire and create a job
-    for each one, we keep a dict of entity ids that
-    care about the state change events so we can
+    for each one, the event bus keeps a dict of entity ids
+    that care about the state change events so it can
     do a fast dict lookup to route events.
     """
     entity_ids = _async_string_to_lower_list(entity_ids)
     if not entity_ids:
         return _remove_empty_listener
 
-    entity_callbacks = hass.data.setdefault(TRACK_STATE_CHANGE_CALLBACKS, {})
-
-    if TRACK_STATE_CHANGE_LISTENER not in hass.data:
-
-        @callback
-        def _async_state_change_filter(event: Event) -> bool:
-            """Filter state changes by entity_id."""
-            return event.data.get("entity_id") in entity_callbacks
-
-        @callback
-        def _async_state_change_dispatcher(event: Event) -> None:
-            """Dispatch state changes by entity_id."""
-            entity_id = event.data.get("entity_id")
-
-            if entity_id not in entity_callbacks:
-                return
-
-            for job in entity_callbacks[entity_id][:]:
-                try:
-                    hass.async_run_hass_job(job, event)
-                except Exception:  # pylint: disable=broad-except
-                    _LOGGER.exception(
-                        "Error while processing state change for %s", entity_id
-                    )
-
-        hass.data[TRACK_STATE_CHANGE_LISTENER] = hass.bus.async_listen(
-            EVENT_STATE_CHANGED,
-            _async_state_change_dispatcher,
-            event_filter=_async_state_change_filter,
-        )
-
-    job = HassJob(action)
-
-    for entity_id in entity_ids:
-        entity_callbacks.setdefault(entity_id, []).append(job)
-
-    @callback
-    def remove_listener() -> None:
-        """Remove state change listener."""
-        _async_remove_indexed_listeners(
-            hass,
-            TRACK_STATE_CHANGE_CALLBACKS,
-            TRACK_STATE_CHANGE_LISTENER,
-            entity_ids,
-            job,
-        )
-
-    return remove_listener
+    return hass.bus.async_listen_entity(entity_ids, action)
 
 
 @callback
@@ -789,12 +750,35 @@ class _TrackTemplateResultInfo:
         self._info: dict[Template, RenderInfo] = {}
         self._track_state_changes: _TrackStateChangeFiltered | None = None
         self._time_listeners: dict[Template, Callable] = {}
+        # State changes that did not change any attribute the template read
+        self.renders_avoided = 0
+        # Seconds the last render of each template took
+        self.render_costs: dict[Template, float] = {}
+        # Templates set up without rendering them, their errors are logged
+        # when they are first rendered
+        self._unrendered: set[Template] = set()
+        self._removed = False
 
     def async_setup(self, raise_on_template_error: bool) -> None:
-        """Activation of template tracking."""
+        """Activation of template tracking.
+
+        Templates that only read known states are not rendered, they have
+        no result until the first refresh. Errors of that first render
+        are logged like errors during setup.
+        """
         for track_template_ in self._track_templates:
             template = track_template_.template
             variables = track_template_.variables
+
+            if not raise_on_template_error:
+                # Templates that only read known states do not need to be
+                # rendered to know what to listen for.
+                info = template.async_static_render_info()
+                if info is not None:
+                    self._info[template] = info
+                    self._unrendered.add(template)
+                    continue
+
             self._info[template] = info = template.async_render_to_info(variables)
 
             if info.exception:
@@ -807,7 +791,9 @@ class _TrackTemplateResultInfo:
                 )
 
         self._track_state_changes = async_track_state_change_filtered(
-            self.hass, _render_infos_to_track_states(self._info.values()), self._refresh
+            self.hass,
+            _render_infos_to_track_states(self._info.values()),
+            self._async_schedule_refresh,
         )
         self._update_time_listeners()
         _LOGGER.debug(
@@ -859,7 +845,11 @@ class _TrackTemplateResultInfo:
     def async_remove(self) -> None:
         """Cancel the listener."""
         assert self._track_state_changes
+        self._removed = True
         self._track_state_changes.async_remove()
+        scheduler = self.hass.data.get(TEMPLATE_RENDER_SCHEDULER)
+        if scheduler is not None:
+            scheduler.async_discard(self)
         self._rate_limit.async_remove()
         for template in list(self._time_listeners):
             self._time_listeners.pop(template)()
@@ -869,6 +859,27 @@ class _TrackTemplateResultInfo:
         """Force recalculate the template."""
         self._refresh(None)
 
+    @callback
+    def _async_schedule_refresh(self, event: Event) -> None:
+        """Schedule rendering the templates a state change made dirty."""
+        scheduler = _async_template_render_scheduler(self.hass)
+        for track_template_ in self._track_templates:
+            info = self._info[track_template_.template]
+            if not _event_triggers_rerender(event, info):
+                continue
+            if not _event_changes_read_attributes(event, info):
+                # Only counted here, renders check the event again
+                self.renders_avoided += 1
+                continue
+            scheduler.async_schedule(self, track_template_, event)
+
+    def _event_triggers_render(self, template: Template, event: Event) -> bool:
+        """Return if a state change needs the template to be rendered."""
+        info = self._info[template]
+        return _event_triggers_rerender(event, info) and _event_changes_read_attributes(
+            event, info
+        )
+
     def _render_template_if_ready(
         self,
         track_template_: TrackTemplate,
@@ -888,16 +899,14 @@ class _TrackTemplateResultInfo:
         template = track_template_.template
 
         if event:
-            info = self._info[template]
-
-            if not _event_triggers_rerender(event, info):
+            if not self._event_triggers_render(template, event):
                 return False
 
             had_timer = self._rate_limit.async_has_timer(template)
 
             if self._rate_limit.async_schedule_action(
                 template,
-                _rate_limit_for_event(event, info, track_template_),
+                _rate_limit_for_event(event, self._info[template], track_template_),
                 now,
                 self._refresh,
                 event,
@@ -913,15 +922,31 @@ class _TrackTemplateResultInfo:
             )
 
         self._rate_limit.async_triggered(template, now)
+        profiler = async_get_profiler(self.hass)
+        if profiler is not None:
+            profiler.trigger = event.data[ATTR_ENTITY_ID] if event else "refresh"
+        start = time.perf_counter()
         self._info[template] = info = template.async_render_to_info(
             track_template_.variables
         )
+        self.render_costs[template] = time.perf_counter() - start
+        if profiler is not None:
+            profiler.trigger = None
 
         try:
             result: str | TemplateError = info.result()
         except TemplateError as ex:
             result = ex
 
+        if template in self._unrendered:
+            self._unrendered.discard(template)
+            if info.exception:
+                _LOGGER.error(
+                    "Error while processing template: %s",
+                    template,
+                    exc_info=info.exception,
+                )
+
         last_result = self._last_result.get(template)
 
         # Check to see if the result has changed
@@ -952,11 +977,30 @@ class _TrackTemplateResultInfo:
         replayed is True if the event is being replayed because the
         rate limit was hit.
         """
+        now = event.time_fired if not replayed and event else dt_util.utcnow()
+        updates, info_changed = self._async_render_templates(
+            event, track_templates or self._track_templates, now
+        )
+        if info_changed:
+            self._async_update_listeners()
+        self._async_call_action(event, updates)
+
+    @callback
+    def _async_render_templates(
+        self,
+        event: Event | None,
+        track_templates: Iterable[TrackTemplate],
+        now: datetime,
+    ) -> tuple[list[TrackTemplateResult], bool]:
+        """Render the templates if ready.
+
+        Returns the new results and if what the templates listen for may
+        have changed.
+        """
         updates = []
         info_changed = False
-        now = event.time_fired if not replayed and event else dt_util.utcnow()
 
-        for track_template_ in track_templates or self._track_templates:
+        for track_template_ in track_templates:
             update = self._render_template_if_ready(track_template_, now, event)
             if not update:
                 continue
@@ -969,24 +1013,33 @@ class _TrackTemplateResultInfo:
             if isinstance(update, TrackTemplateResult):
                 updates.append(update)
 
-        if info_changed:
-            assert self._track_state_changes
-            self._track_state_changes.async_update_listeners(
-                _render_infos_to_track_states(
-                    [
-                        _suppress_domain_all_in_render_info(self._info[template])
-                        if self._rate_limit.async_has_timer(template)
-                        else self._info[template]
-                        for template in self._info
-                    ]
-                )
-            )
-            _LOGGER.debug(
-                "Template group %s listens for %s",
-                self._track_templates,
-                self.listeners,
+        return updates, info_changed
+
+    @callback
+    def _async_update_listeners(self) -> None:
+        """Listen for the states the templates read."""
+        assert self._track_state_changes
+        self._track_state_changes.async_update_listeners(
+            _render_infos_to_track_states(
+                [
+                    _suppress_domain_all_in_render_info(self._info[template])
+                    if self._rate_limit.async_has_timer(template)
+                    else self._info[template]
+                    for template in self._info
+                ]
             )
+        )
+        _LOGGER.debug(
+            "Template group %s listens for %s",
+            self._track_templates,
+            self.listeners,
+        )
 
+    @callback
+    def _async_call_action(
+        self, event: Event | None, updates: list[TrackTemplateResult]
+    ) -> None:
+        """Call the action with the new results."""
         if not updates:
             return
 
@@ -996,6 +1049,148 @@ class _TrackTemplateResultInfo:
         self.hass.async_run_hass_job(self._job, event, updates)
 
 
+class _TemplateRenderScheduler:
+    """Render the templates state changes made dirty in batches.
+
+    Templates are rendered once per loop iteration, in the order they
+    became dirty, with the last state change that made them dirty. The
+    renders of a pass share the state wrappers and the actions are only
+    called after all renders, so all templates of a pass see the same
+    states. Templates left when a pass exceeds the time budget are
+    rendered first in the next iteration.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._dirty: dict[
+            tuple[_TrackTemplateResultInfo, int], tuple[TrackTemplate, Event]
+        ] = {}
+        self._task: asyncio.Task | None = None
+        self.passes = 0
+        self.renders = 0
+        self.deferred = 0
+
+    @callback
+    def async_schedule(
+        self,
+        tracker: _TrackTemplateResultInfo,
+        track_template_: TrackTemplate,
+        event: Event,
+    ) -> None:
+        """Schedule rendering a template of a tracker."""
+        # A template that is already dirty keeps its place in line
+        self._dirty[(tracker, id(track_template_))] = (track_template_, event)
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_render_dirty())
+
+    @callback
+    def async_discard(self, tracker: _TrackTemplateResultInfo) -> None:
+        """Discard the dirty templates of a removed tracker."""
+        for key in [key for key in self._dirty if key[0] is tracker]:
+            del self._dirty[key]
+
+    async def _async_render_dirty(self) -> None:
+        """Render the dirty templates until there are none left."""
+        try:
+            while self._dirty:
+                self._async_render_pass()
+                if self._dirty:
+                    await asyncio.sleep(0)
+        finally:
+            self._task = None
+
+    @callback
+    def _async_render_pass(self) -> None:
+        """Render the dirty templates within the time budget.
+
+        The templates not rendered yet are dirty again after the pass, also
+        when it was cut short by an error.
+        """
+        dirty = list(self._dirty.items())
+        self._dirty.clear()
+        self.passes += 1
+
+        changed: dict[_TrackTemplateResultInfo, None] = {}
+        results: dict[
+            tuple[_TrackTemplateResultInfo, int],
+            tuple[Event, list[TrackTemplateResult]],
+        ] = {}
+        rendered = 0
+        start = time.perf_counter()
+
+        try:
+            with share_template_states(self.hass):
+                for (tracker, _), (track_template_, event) in dirty:
+                    if (
+                        rendered
+                        and time.perf_counter() - start > TEMPLATE_RENDER_BUDGET
+                    ):
+                        break
+                    rendered += 1
+                    try:
+                        # pylint: disable=protected-access
+                        updates, info_changed = tracker._async_render_templates(
+                            event, (track_template_,), event.time_fired
+                        )
+                    except Exception:  # pylint: disable=broad-except
+                        _LOGGER.exception(
+                            "Error while rendering template %s",
+                            track_template_.template,
+                        )
+                        continue
+                    if info_changed:
+                        changed[tracker] = None
+                    if updates:
+                        results.setdefault((tracker, id(event)), (event, []))[1].extend(
+                            updates
+                        )
+        finally:
+            if rendered < len(dirty):
+                self.deferred += len(dirty) - rendered
+                self._dirty.update(dirty[rendered:])
+
+        self.renders += rendered
+        _LOGGER.debug(
+            "Rendered %s templates in %.4fs, deferred %s",
+            rendered,
+            time.perf_counter() - start,
+            len(self._dirty),
+        )
+
+        # pylint: disable=protected-access
+        for tracker in changed:
+            if tracker._removed:
+                continue
+            try:
+                tracker._async_update_listeners()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error while updating the listeners of %s", tracker)
+        for (tracker, _), (event, updates) in results.items():
+            if tracker._removed:
+                continue
+            try:
+                tracker._async_call_action(event, updates)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error while processing template results for %s",
+                    event.data.get(ATTR_ENTITY_ID),
+                )
+
+
+@callback
+def _async_template_render_scheduler(hass: HomeAssistant) -> _TemplateRenderScheduler:
+    """Return the scheduler of the template renders."""
+    scheduler: _TemplateRenderScheduler | None = hass.data.get(
+        TEMPLATE_RENDER_SCHEDULER
+    )
+    if scheduler is None:
+        scheduler = hass.data[TEMPLATE_RENDER_SCHEDULER] = _TemplateRenderScheduler(
+            hass
+        )
+    return scheduler
+
+
 TrackTemplateResultListener = Callable[
     [
         Event,
@@ -1474,7 +1669,7 @@ def _render_infos_needs_all_listener(render_infos: Iterable[RenderInfo]) -> bool
         # Previous call had an exception
         # so we do not know which states
         # to track
-        if render_info.exception:
+        if render_info.exception and not render_info.static_dependencies:
             return True
 
     return False
@@ -1506,6 +1701,30 @@ def _event_triggers_rerender(event: Event, info: RenderInfo) -> bool:
     return bool(info.filter_lifecycle(entity_id))
 
 
+@callback
+def _event_changes_read_attributes(event: Event, info: RenderInfo) -> bool:
+    """Determine if a state change changed an attribute the template read.
+
+    Templates that read more than single attributes of the entity are
+    always re-rendered.
+    """
+    attributes = info.entity_attributes.get(event.data[ATTR_ENTITY_ID])
+    if attributes is None:
+        return True
+
+    old_state = event.data.get("old_state")
+    new_state = event.data.get("new_state")
+    if old_state is None or new_state is None:
+        return True
+
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+    return any(
+        old_attributes.get(attribute) != new_attributes.get(attribute)
+        for attribute in attributes
+    )
+
+
 @callback
 def _rate_limit_for_event(
     event: Event, info: RenderInfo, track_template_: TrackTemplate
@@ -1,7 +1,15 @@
 """Helpers to help with encoding Home Assistant objects in JSON."""
-from datetime import datetime
+from __future__ import annotations
+
+from itertools import islice
 import json
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from homeassistant.util.json import (  # noqa: F401
+    json_dumps,
+    json_encoder_default,
+    json_loads,
+)
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -12,11 +20,43 @@ class JSONEncoder(json.JSONEncoder):
 
         Hand other objects to the original method.
         """
-        if isinstance(o, datetime):
-            return o.isoformat()
-        if isinstance(o, set):
-            return list(o)
-        if hasattr(o, "as_dict"):
-            return o.as_dict()
-
-        return json.JSONEncoder.default(self, o)
+        try:
+            return json_encoder_default(o)
+        except TypeError:
+            return json.JSONEncoder.default(self, o)
+
+
+def json_dumps_list(items: Iterable[Any]) -> str:
+    """Serialize a list to JSON.
+
+    Items that carry their own serialized JSON, like states, are spliced
+    into the result instead of being encoded again.
+    """
+    return f"[{','.join(_json_dumps_item(item) for item in items)}]"
+
+
+def json_dumps_list_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[str]:
+    """Serialize a list to JSON in pieces of up to chunk_size items.
+
+    The pieces joined together are the same as json_dumps_list(items),
+    the items are only read as the pieces are consumed.
+    """
+    yield "["
+    iterator = iter(items)
+    separator = ""
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        yield separator + ",".join(_json_dumps_item(item) for item in chunk)
+        separator = ","
+    yield "]"
+
+
+def _json_dumps_item(item: Any) -> str:
+    """Serialize a single item of a list to JSON."""
+    if isinstance(item, list):
+        return json_dumps_list(item)
+    if hasattr(item, "as_json"):
+        return item.as_json()  # type: ignore
+    return json_dumps(item, allow_nan=False)
@@ -5,21 +5,27 @@ from ast import literal_eval
 import asyncio
 import base64
 import collections.abc
-from contextlib import suppress
+from collections import Counter, deque
+from contextlib import contextmanager, suppress
 from datetime import datetime, timedelta
-from functools import partial, wraps
+from functools import lru_cache, partial, wraps
+import hashlib
+from importlib.util import MAGIC_NUMBER
 import json
 import logging
+import marshal
 import math
 from operator import attrgetter
 import random
 import re
-from typing import Any, Generator, Iterable, cast
+import time
+from types import CodeType
+from typing import Any, Generator, Iterable, Iterator, cast
 from urllib.parse import urlencode as urllib_urlencode
 import weakref
 
 import jinja2
-from jinja2 import contextfilter, contextfunction
+from jinja2 import contextfilter, contextfunction, nodes
 from jinja2.sandbox import ImmutableSandboxedEnvironment
 from jinja2.utils import Namespace  # type: ignore
 import voluptuous as vol
@@ -31,6 +37,7 @@ from homeassistant.const import (
     ATTR_UNIT_OF_MEASUREMENT,
     LENGTH_METERS,
     STATE_UNKNOWN,
+    __version__,
 )
 from homeassistant.core import (
     HomeAssistant,
@@ -56,6 +63,20 @@ DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 _RENDER_INFO = "template.render_info"
 _ENVIRONMENT = "template.environment"
 _ENVIRONMENT_LIMITED = "template.environment_limited"
+_BYTECODE_CACHE = "template.bytecode_cache"
+_TEMPLATE_STATES = "template.template_states"
+_PROFILER = "template.profiler"
+
+BYTECODE_CACHE_STORAGE_KEY = "core.template_bytecode"
+BYTECODE_CACHE_STORAGE_VERSION = 1
+BYTECODE_CACHE_SAVE_DELAY = 60
+# Render durations kept per template to estimate the 99th percentile
+PROFILER_SAMPLES = 1000
+# Trigger of renders that were not started by a template tracker
+PROFILER_TRIGGER_DIRECT = "direct"
+
+# Compiled code is only valid for the versions that generated it
+BYTECODE_CACHE_VERSIONS = f"{__version__}:{jinja2.__version__}:{MAGIC_NUMBER.hex()}"
 
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{|\{#")
 # Match "simple" ints and floats. -1.0, 1, +5, 5.0
@@ -79,6 +100,24 @@ _COLLECTABLE_STATE_ATTRIBUTES = {
 ALL_STATES_RATE_LIMIT = timedelta(minutes=1)
 DOMAIN_STATES_RATE_LIMIT = timedelta(seconds=1)
 
+# Globals that read the state machine for the entity_id in their first argument
+_STATIC_STATE_FUNCTIONS = {"is_state", "is_state_attr", "state_attr", "states"}
+# Globals and filters whose result depends on more than their arguments
+_HASS_GLOBALS = {
+    "closest",
+    "device_entities",
+    "distance",
+    "expand",
+    "is_state",
+    "is_state_attr",
+    "now",
+    "relative_time",
+    "state_attr",
+    "states",
+    "utcnow",
+}
+_HASS_FILTERS = {"closest", "device_entities", "expand"}
+
 
 @bind_hass
 def attach(hass: HomeAssistant, obj: Any) -> None:
@@ -213,12 +252,16 @@ class RenderInfo:
         self.domains = set()
         self.domains_lifecycle = set()
         self.entities = set()
+        # Entities of which only these attributes were read
+        self.entity_attributes: dict[str, set[str]] = {}
         self.rate_limit: timedelta | None = None
         self.has_time = False
+        # The entities and domains were found without rendering the template
+        self.static_dependencies = False
 
     def __repr__(self) -> str:
         """Representation of RenderInfo."""
-        return f"<RenderInfo {self.template} all_states={self.all_states} all_states_lifecycle={self.all_states_lifecycle} domains={self.domains} domains_lifecycle={self.domains_lifecycle} entities={self.entities} rate_limit={self.rate_limit}> has_time={self.has_time}"
+        return f"<RenderInfo {self.template} all_states={self.all_states} all_states_lifecycle={self.all_states_lifecycle} domains={self.domains} domains_lifecycle={self.domains_lifecycle} entities={self.entities} entity_attributes={self.entity_attributes} rate_limit={self.rate_limit}> has_time={self.has_time}"
 
     def _filter_domains_and_entities(self, entity_id: str) -> bool:
         """Template should re-render if the entity state changes when we match specific domains or entities."""
@@ -246,20 +289,34 @@ class RenderInfo:
         self.all_states = False
 
     def _freeze_sets(self) -> None:
-        self.entities = frozenset(self.entities)
+        if self.all_states:
+            entity_attributes = {}
+        else:
+            # Entities that were read as a whole or through their domain
+            # re-render on every change.
+            entity_attributes = {
+                entity_id: frozenset(attributes)
+                for entity_id, attributes in self.entity_attributes.items()
+                if entity_id not in self.entities
+                and split_entity_id(entity_id)[0] not in self.domains
+            }
+        self.entity_attributes = entity_attributes  # type: ignore[assignment]
+        self.entities = frozenset(self.entities | self.entity_attributes.keys())
         self.domains = frozenset(self.domains)
         self.domains_lifecycle = frozenset(self.domains_lifecycle)
 
     def _freeze(self) -> None:
         self._freeze_sets()
 
+        unknown_dependencies = self.exception and not self.static_dependencies
+
         if self.rate_limit is None:
-            if self.all_states or self.exception:
+            if self.all_states or unknown_dependencies:
                 self.rate_limit = ALL_STATES_RATE_LIMIT
             elif self.domains or self.domains_lifecycle:
                 self.rate_limit = DOMAIN_STATES_RATE_LIMIT
 
-        if self.exception:
+        if unknown_dependencies:
             return
 
         if not self.all_states_lifecycle:
@@ -279,6 +336,208 @@ class RenderInfo:
             self.filter = _false
 
 
+class TemplateRenderStats:
+    """Render durations of a template."""
+
+    __slots__ = ("count", "total", "durations", "triggers")
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.count = 0
+        self.total = 0.0
+        self.durations: deque[float] = deque(maxlen=PROFILER_SAMPLES)
+        self.triggers: Counter[str] = Counter()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stats as a dictionary, durations in seconds."""
+        durations = sorted(self.durations)
+        return {
+            "count": self.count,
+            "total": self.total,
+            "average": self.total / self.count,
+            "p99": durations[math.ceil(len(durations) * 0.99) - 1],
+            "triggers": dict(self.triggers.most_common()),
+        }
+
+
+class TemplateProfiler:
+    """Collect how often and how long templates render.
+
+    Renders are grouped by template source. A template tracker sets
+    trigger to what made it render while it renders.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self.started = dt_util.utcnow()
+        self.trigger: str | None = None
+        self.stats: dict[str, TemplateRenderStats] = {}
+
+    @callback
+    def async_record(self, template: str, duration: float) -> None:
+        """Record a render of a template."""
+        stats = self.stats.get(template)
+        if stats is None:
+            stats = self.stats[template] = TemplateRenderStats()
+        stats.count += 1
+        stats.total += duration
+        stats.durations.append(duration)
+        stats.triggers[self.trigger or PROFILER_TRIGGER_DIRECT] += 1
+
+    @callback
+    def async_report(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Return the stats of the templates that took the most time."""
+        ranked = sorted(
+            self.stats.items(), key=lambda item: item[1].total, reverse=True
+        )
+        return [
+            {"template": template, **stats.as_dict()}
+            for template, stats in ranked[:limit]
+        ]
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> TemplateProfiler | None:
+    """Return the template profiler if it is enabled."""
+    return cast("TemplateProfiler | None", hass.data.get(_PROFILER))
+
+
+@callback
+def async_enable_profiler(hass: HomeAssistant) -> TemplateProfiler:
+    """Start profiling template renders."""
+    profiler = hass.data.get(_PROFILER)
+    if profiler is None:
+        profiler = hass.data[_PROFILER] = TemplateProfiler()
+    return cast(TemplateProfiler, profiler)
+
+
+@callback
+def async_disable_profiler(hass: HomeAssistant) -> TemplateProfiler | None:
+    """Stop profiling template renders and return what was collected."""
+    return cast("TemplateProfiler | None", hass.data.pop(_PROFILER, None))
+
+
+@lru_cache(maxsize=4096)
+def _static_dependencies(
+    source: str,
+) -> tuple[frozenset[str], frozenset[str], frozenset[str]] | None:
+    """Return the entities, domains and expanded entities a template reads.
+
+    None is returned when it can only be known by rendering the template
+    which states it reads, like when entity_ids are built from variables or
+    all states are iterated.
+    """
+    try:
+        tree = _NO_HASS_ENV.parse(source)
+    except jinja2.TemplateSyntaxError:
+        return None
+
+    collector = _StaticDependencyCollector()
+    if not collector.collect(tree):
+        return None
+
+    return (
+        frozenset(collector.entities),
+        frozenset(collector.domains),
+        frozenset(collector.expanded),
+    )
+
+
+class _StaticDependencyCollector:
+    """Collect the states a template reads from its syntax tree."""
+
+    def __init__(self) -> None:
+        """Initialize the collector."""
+        self.entities: set[str] = set()
+        self.domains: set[str] = set()
+        self.expanded: set[str] = set()
+
+    def collect(self, node: nodes.Node) -> bool:
+        """Collect the states a node reads.
+
+        Returns False if they can not be known without rendering.
+        """
+        if isinstance(node, (nodes.Extends, nodes.FromImport, nodes.Import)):
+            return False
+        if isinstance(node, nodes.Include):
+            return False
+
+        if isinstance(node, nodes.Name):
+            # Reading all states, time or shadowing a state function
+            return node.name not in _HASS_GLOBALS
+
+        if isinstance(node, nodes.Filter) and node.name in _HASS_FILTERS:
+            return False
+
+        if isinstance(node, nodes.Call) and isinstance(node.node, nodes.Name):
+            if node.node.name in _STATIC_STATE_FUNCTIONS:
+                return self._collect_state_function(node)
+            if node.node.name == "expand":
+                return self._collect_expand(node)
+
+        if isinstance(node, nodes.Getattr) and _is_states_name(node.node):
+            # states.domain
+            if not valid_entity_id(f"{node.attr}.entity"):
+                return False
+            self.domains.add(node.attr)
+            return True
+
+        if (
+            isinstance(node, nodes.Getattr)
+            and isinstance(node.node, nodes.Getattr)
+            and _is_states_name(node.node.node)
+        ):
+            # states.domain.object_id
+            entity_id = f"{node.node.attr}.{node.attr}"
+            if not valid_entity_id(entity_id):
+                return False
+            self.entities.add(entity_id)
+            return True
+
+        return all(self.collect(child) for child in node.iter_child_nodes())
+
+    def _collect_state_function(self, node: nodes.Call) -> bool:
+        """Collect a call like states('light.kitchen')."""
+        if node.dyn_args is not None or node.dyn_kwargs is not None:
+            return False
+        if not node.args:
+            return False
+        entity_id = _const_entity_id(node.args[0])
+        if entity_id is None:
+            return False
+        self.entities.add(entity_id)
+        return all(self.collect(child) for child in (*node.args[1:], *node.kwargs))
+
+    def _collect_expand(self, node: nodes.Call) -> bool:
+        """Collect a call like expand('group.kitchen', 'light.hall')."""
+        if node.dyn_args is not None or node.dyn_kwargs or node.kwargs:
+            return False
+        if not node.args:
+            return False
+        for arg in node.args:
+            entity_id = _const_entity_id(arg)
+            if entity_id is None:
+                return False
+            self.entities.add(entity_id)
+            self.expanded.add(entity_id)
+        return True
+
+
+def _is_states_name(node: nodes.Node) -> bool:
+    """Return if the node reads the states global."""
+    return isinstance(node, nodes.Name) and node.name == "states"
+
+
+def _const_entity_id(node: nodes.Node) -> str | None:
+    """Return the entity_id of a constant argument."""
+    if not isinstance(node, nodes.Const) or not isinstance(node.value, str):
+        return None
+    entity_id = node.value.lower()
+    if not valid_entity_id(entity_id):
+        return None
+    return entity_id
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
@@ -369,10 +628,17 @@ class Template:
         if variables is not None:
             kwargs.update(variables)
 
+        profiler = self.hass.data.get(_PROFILER)
+        if profiler is not None:
+            start = time.perf_counter()
+
         try:
             render_result = compiled.render(kwargs)
         except Exception as err:
             raise TemplateError(err) from err
+        finally:
+            if profiler is not None:
+                profiler.async_record(self.template, time.perf_counter() - start)
 
         render_result = render_result.strip()
 
@@ -483,6 +749,47 @@ class Template:
         finally:
             del self.hass.data[_RENDER_INFO]
 
+        if render_info.exception is not None:
+            # Keep listening for the states the template reads, the
+            # render may have failed before it read all of them.
+            static_info = self.async_static_render_info()
+            if static_info is not None:
+                render_info.static_dependencies = True
+                render_info.entities |= static_info.entities
+                render_info.domains |= static_info.domains
+                render_info.domains_lifecycle |= static_info.domains_lifecycle
+
+        render_info._freeze()
+        return render_info
+
+    @callback
+    def async_static_render_info(self) -> RenderInfo | None:
+        """Return the states the template reads without rendering it.
+
+        None is returned if the states can only be known by rendering the
+        template. Groups are only known once they are expanded by a render.
+        """
+        assert self.hass
+
+        if self.is_static:
+            return None
+
+        dependencies = _static_dependencies(self.template)
+        if dependencies is None:
+            return None
+
+        entities, domains, expanded = dependencies
+        for entity_id in expanded:
+            state = self.hass.states.get(entity_id)
+            if state is not None and ATTR_ENTITY_ID in state.attributes:
+                return None
+
+        render_info = RenderInfo(self)  # type: ignore[no-untyped-call]
+        render_info.static_dependencies = True
+        render_info.entities = set(entities)
+        render_info.domains = set(domains)
+        render_info.domains_lifecycle = set(domains)
+        # pylint: disable=protected-access
         render_info._freeze()
         return render_info
 
@@ -687,6 +994,8 @@ class TemplateState(State):
     # to call is_safe_attribute
     def __getitem__(self, item):
         """Return a property as an attribute for jinja."""
+        if item == "attributes":
+            return self.attributes
         if item in _COLLECTABLE_STATE_ATTRIBUTES:
             # _collect_state inlined here for performance
             if self._collect and _RENDER_INFO in self._hass.data:
@@ -714,8 +1023,12 @@ class TemplateState(State):
 
     @property
     def attributes(self):
-        """Wrap State.attributes."""
-        self._collect_state()
+        """Wrap State.attributes.
+
+        While collecting, reading single attributes only collects those.
+        """
+        if self._collect and _RENDER_INFO in self._hass.data:
+            return TemplateStateAttributes(self._hass.data[_RENDER_INFO], self._state)
         return self._state.attributes
 
     @property
@@ -771,16 +1084,124 @@ class TemplateState(State):
         return f"<template TemplateState({self._state.__repr__()})>"
 
 
+class TemplateStateAttributes(collections.abc.Mapping):
+    """Class to represent the attributes of a state in a template.
+
+    Reading an attribute collects that attribute, anything that reads all
+    attributes collects the state.
+    """
+
+    __slots__ = ("_render_info", "_state")
+
+    def __init__(self, render_info: RenderInfo, state: State) -> None:
+        """Initialize template state attributes."""
+        self._render_info = render_info
+        self._state = state
+
+    def _collect_attribute(self, name: str) -> None:
+        self._render_info.entity_attributes.setdefault(
+            self._state.entity_id, set()
+        ).add(name)
+
+    def _collect_state(self) -> None:
+        self._render_info.entities.add(self._state.entity_id)
+
+    def __getitem__(self, name: str) -> Any:
+        """Return an attribute."""
+        self._collect_attribute(name)
+        return self._state.attributes[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return an attribute or the default."""
+        self._collect_attribute(name)
+        return self._state.attributes.get(name, default)
+
+    def __contains__(self, name: object) -> bool:
+        """Return if the state has an attribute."""
+        if not isinstance(name, str):
+            return False
+        self._collect_attribute(name)
+        return name in self._state.attributes
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate the attribute names."""
+        self._collect_state()
+        return iter(self._state.attributes)
+
+    def __len__(self) -> int:
+        """Return the number of attributes."""
+        self._collect_state()
+        return len(self._state.attributes)
+
+    def __repr__(self) -> str:
+        """Representation of the attributes."""
+        self._collect_state()
+        return repr(dict(self._state.attributes))
+
+
 def _collect_state(hass: HomeAssistant, entity_id: str) -> None:
     entity_collect = hass.data.get(_RENDER_INFO)
     if entity_collect is not None:
         entity_collect.entities.add(entity_id)
 
 
+class _SharedTemplateStates:
+    """State wrappers and sorted domain states shared between renders."""
+
+    __slots__ = ("wrappers", "domains")
+
+    def __init__(self) -> None:
+        """Initialize the shared states."""
+        self.wrappers: dict[tuple[str, bool], TemplateState] = {}
+        self.domains: dict[str | None, list[TemplateState]] = {}
+
+
+@contextmanager
+def share_template_states(hass: HomeAssistant) -> Generator[None, None, None]:
+    """Share the states between the templates rendered in the block.
+
+    The templates see the states as they were when first read in the
+    block, so states must not be changed in the block.
+    """
+    assert _TEMPLATE_STATES not in hass.data
+    hass.data[_TEMPLATE_STATES] = _SharedTemplateStates()
+    try:
+        yield
+    finally:
+        del hass.data[_TEMPLATE_STATES]
+
+
+def _template_state(hass: HomeAssistant, state: State, collect: bool) -> TemplateState:
+    """Return the state wrapper, shared if rendering in share_template_states."""
+    shared: _SharedTemplateStates | None = hass.data.get(_TEMPLATE_STATES)
+    if shared is None:
+        return TemplateState(hass, state, collect)
+
+    key = (state.entity_id, collect)
+    template_state = shared.wrappers.get(key)
+    # pylint: disable=protected-access
+    if template_state is None or template_state._state is not state:
+        template_state = shared.wrappers[key] = TemplateState(hass, state, collect)
+    return template_state
+
+
 def _state_generator(hass: HomeAssistant, domain: str | None) -> Generator:
     """State generator for a domain or all states."""
-    for state in sorted(hass.states.async_all(domain), key=attrgetter("entity_id")):
-        yield TemplateState(hass, state, collect=False)
+    shared: _SharedTemplateStates | None = hass.data.get(_TEMPLATE_STATES)
+    if shared is None:
+        for state in sorted(hass.states.async_all(domain), key=attrgetter("entity_id")):
+            yield TemplateState(hass, state, collect=False)
+        return
+
+    template_states = shared.domains.get(domain)
+    if template_states is None:
+        template_states = shared.domains[domain] = [
+            _template_state(hass, state, False)
+            for state in sorted(
+                hass.states.async_all(domain), key=attrgetter("entity_id")
+            )
+        ]
+    yield from template_states
 
 
 def _get_state_if_valid(hass: HomeAssistant, entity_id: str) -> TemplateState | None:
@@ -802,7 +1223,7 @@ def _get_template_state_from_state(
         # access to the state properties in the state wrapper.
         _collect_state(hass, entity_id)
         return None
-    return TemplateState(hass, state)
+    return _template_state(hass, state, True)
 
 
 def _resolve_state(
@@ -1314,6 +1735,83 @@ def urlencode(value):
     return urllib_urlencode(value).encode("utf-8")
 
 
+async def async_load_bytecode_cache(hass: HomeAssistant) -> None:
+    """Load the compiled code of the templates of the previous run."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.helpers.storage import Store
+
+    bytecode_cache = TemplateBytecodeCache(
+        hass,
+        Store(hass, BYTECODE_CACHE_STORAGE_VERSION, BYTECODE_CACHE_STORAGE_KEY, True),
+    )
+    await bytecode_cache.async_load()
+    hass.data[_BYTECODE_CACHE] = bytecode_cache
+
+
+class TemplateBytecodeCache:
+    """Persist the compiled code of templates across restarts.
+
+    Code is keyed by the environment and a hash of the template source. The
+    stored code is discarded as a whole when Home Assistant, Jinja or Python
+    were updated. Only the code of templates compiled during a run is saved,
+    so templates that were removed from the configuration are dropped.
+    """
+
+    def __init__(self, hass: HomeAssistant, store: Any) -> None:
+        """Initialize the bytecode cache."""
+        self.hass = hass
+        self._store = store
+        self._stored: dict[str, str] = {}
+        self._used: dict[str, str] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored code."""
+        data = await self._store.async_load()
+        if data is None or data.get("versions") != BYTECODE_CACHE_VERSIONS:
+            return
+        self._stored = data["templates"]
+
+    def get(self, environment: str, source: str) -> CodeType | None:
+        """Return the stored code of a template."""
+        key = _bytecode_key(environment, source)
+        encoded = self._used.get(key)
+        if encoded is None:
+            encoded = self._stored.pop(key, None)
+            if encoded is None:
+                return None
+        try:
+            code = marshal.loads(base64.b64decode(encoded))
+        except (EOFError, TypeError, ValueError):
+            code = None
+        if not isinstance(code, CodeType):
+            _LOGGER.debug("Discarding invalid compiled code of template %s", source)
+            return None
+        self._used[key] = encoded
+        return code
+
+    def set(self, environment: str, source: str, code: CodeType) -> None:
+        """Store the code of a template that was compiled."""
+        self._used[_bytecode_key(environment, source)] = base64.b64encode(
+            marshal.dumps(code)
+        ).decode()
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_save)
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Schedule saving the compiled code."""
+        self._store.async_delay_save(self._data_to_save, BYTECODE_CACHE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the compiled code to store."""
+        return {"versions": BYTECODE_CACHE_VERSIONS, "templates": self._used.copy()}
+
+
+def _bytecode_key(environment: str, source: str) -> str:
+    """Return the key of the compiled code of a template."""
+    return hashlib.sha256(f"{environment}:{source}".encode()).hexdigest()
+
+
 class TemplateEnvironment(ImmutableSandboxedEnvironment):
     """The Home Assistant template environment."""
 
@@ -1321,6 +1819,7 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         """Initialise template environment."""
         super().__init__(undefined=jinja2.make_logging_undefined(logger=_LOGGER))
         self.hass = hass
+        self.limited = limited
         self.template_cache = weakref.WeakValueDictionary()
         self.filters["round"] = forgiving_round
         self.filters["multiply"] = multiply
@@ -1463,9 +1962,24 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         cached = self.template_cache.get(source)
 
         if cached is None:
-            cached = self.template_cache[source] = super().compile(source)
+            cached = self.template_cache[source] = self._compile_source(source)
 
         return cached
 
+    def _compile_source(self, source):
+        """Compile the template or load its code from the bytecode cache."""
+        bytecode_cache = None
+        if self.hass is not None:
+            bytecode_cache = self.hass.data.get(_BYTECODE_CACHE)
+        if bytecode_cache is None:
+            return super().compile(source)
+
+        environment = "limited" if self.limited else "full"
+        code = bytecode_cache.get(environment, source)
+        if code is None:
+            code = super().compile(source)
+            bytecode_cache.set(environment, source, code)
+        return code
+
 
 _NO_HASS_ENV = TemplateEnvironment(None)  # type: ignore[no-untyped-call]
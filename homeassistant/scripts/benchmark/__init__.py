@@ -8,14 +8,22 @@ from contextlib import suppress
 from datetime import datetime
 import json
 import logging
+import tempfile
 from timeit import default_timer as timer
+import tracemalloc
 from typing import Callable, TypeVar
+import zlib
 
 from homeassistant import core
 from homeassistant.components.websocket_api.const import JSON_DUMP
 from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
 from homeassistant.helpers.entityfilter import convert_include_exclude_filter
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import (
+    JSONEncoder,
+    json_dumps,
+    json_dumps_list,
+    json_loads,
+)
 from homeassistant.util import dt as dt_util
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
@@ -252,6 +260,181 @@ async def state_changed_event_filter_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def state_changed_entity_index(hass):
+    """Run 100k state changes for 10k entities with 5k entity listeners."""
+    count = 0
+    entity_id = "sensor.power"
+    entities = 10 ** 4
+    events_to_fire = 10 ** 5
+
+    @core.callback
+    def listener(*args):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+    for idx in range(0, entities, 2):
+        hass.helpers.event.async_track_state_change_event(f"{entity_id}{idx}", listener)
+
+    for idx in range(entities):
+        hass.states.async_set(f"{entity_id}{idx}", 0)
+
+    await hass.async_block_till_done()
+    count = 0
+
+    start = timer()
+
+    for value in range(1, events_to_fire + 1):
+        hass.states.async_set(f"{entity_id}{value % entities}", value)
+
+    await hass.async_block_till_done()
+
+    assert count == events_to_fire // 2
+
+    return timer() - start
+
+
+@benchmark
+async def state_set_many_1k(hass):
+    """Set 100k states in batches of 1k per tick."""
+    return await _state_set_many(hass, 10 ** 3)
+
+
+@benchmark
+async def state_set_many_10k(hass):
+    """Set 100k states in batches of 10k per tick."""
+    return await _state_set_many(hass, 10 ** 4)
+
+
+async def _state_set_many(hass, updates_per_tick):
+    count = 0
+    entity_id = "sensor.power"
+    updates = 10 ** 5
+
+    @core.callback
+    def listener(events):
+        """Handle batch of events."""
+        nonlocal count
+        count += len(events)
+
+    hass.bus.async_listen_batch(EVENT_STATE_CHANGED, listener)
+
+    start = timer()
+
+    for tick in range(updates // updates_per_tick):
+        hass.states.async_set_many(
+            (f"{entity_id}{idx}", tick, None) for idx in range(updates_per_tick)
+        )
+        await asyncio.sleep(0)
+
+    await hass.async_block_till_done()
+
+    assert count == updates
+
+    return timer() - start
+
+
+@benchmark
+async def state_memory(hass):
+    """Measure memory used by 10 states of 10k entities."""
+    entities = 10 ** 4
+    states_per_entity = 10
+    states = []
+
+    @core.callback
+    def listener(event):
+        """Keep the new states alive like history consumers do."""
+        states.append(event.data["new_state"])
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+
+    tracemalloc.start()
+    start = timer()
+    mem_start = tracemalloc.get_traced_memory()[0]
+
+    for value in range(states_per_entity):
+        for idx in range(entities):
+            hass.states.async_set(
+                f"sensor.temperature_{idx}",
+                value,
+                {"unit_of_measurement": "°C", "friendly_name": f"Temperature {idx}"},
+            )
+        await hass.async_block_till_done()
+
+    for state in states:
+        state.as_dict()
+
+    runtime = timer() - start
+    mem_used = tracemalloc.get_traced_memory()[0] - mem_start
+    tracemalloc.stop()
+
+    assert len(states) == entities * states_per_entity
+    print(f"Bytes per state: {mem_used / len(states):.0f}")
+
+    return runtime
+
+
+@benchmark
+async def recorder_replay_state_changes(hass):
+    """Replay 100,000 state changes into an SQLite recorder database."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import recorder
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        instance = recorder.Recorder(
+            hass,
+            auto_purge=False,
+            keep_days=10,
+            commit_interval=1,
+            uri=f"sqlite:///{tmpdir}/benchmark.db",
+            db_max_retries=1,
+            db_retry_wait=0,
+            entity_filter=lambda entity_id: True,
+            exclude_t=[],
+            db_integrity_check=False,
+        )
+        return await hass.async_add_executor_job(
+            _replay_state_changes, instance, 10 ** 5
+        )
+
+
+def _replay_state_changes(instance, state_changes):
+    """Feed state changes to the recorder and commit like a busy system."""
+    # pylint: disable=protected-access
+    entities = 200
+    # Commit once per second at 200 state changes per second
+    changes_per_commit = 200
+    instance._setup_recorder()
+
+    start = timer()
+    for idx in range(state_changes):
+        entity_id = f"sensor.power_{idx % entities}"
+        new_state = core.State(
+            entity_id,
+            str(idx % 3000),
+            {
+                "unit_of_measurement": "W",
+                "friendly_name": f"Power {idx % entities}",
+                "device_class": "power",
+            },
+        )
+        instance._process_one_event(
+            core.Event(
+                EVENT_STATE_CHANGED,
+                {"entity_id": entity_id, "old_state": None, "new_state": new_state},
+            )
+        )
+        if idx % changes_per_commit == changes_per_commit - 1:
+            instance._commit_event_session_or_recover()
+    instance._commit_event_session_or_recover()
+    runtime = timer() - start
+
+    instance.event_session.close()
+    instance._close_connection()
+    return runtime
+
+
 @benchmark
 async def logbook_filtering_state(hass):
     """Filter state changes."""
@@ -390,6 +573,164 @@ async def json_serialize_states(hass):
     return timer() - start
 
 
+@benchmark
+async def json_serialize_cached_states(hass):
+    """Serialize 5k states a hundred times reusing the cached state JSON."""
+    states = [
+        core.State(
+            f"light.kitchen_{idx}",
+            "on",
+            {"friendly_name": f"Kitchen Lights {idx}", "brightness": 255},
+        )
+        for idx in range(5000)
+    ]
+
+    start = timer()
+    for _ in range(100):
+        json_dumps_list(states)
+    return timer() - start
+
+
+@benchmark
+async def json_roundtrip_attributes(hass):
+    """Encode and decode 100k state attributes with the fastest JSON backend."""
+    return _json_roundtrip_attributes(json_dumps, json_loads)
+
+
+@benchmark
+async def json_roundtrip_attributes_stdlib(hass):
+    """Encode and decode 100k state attributes with the standard library."""
+    return _json_roundtrip_attributes(
+        lambda data: json.dumps(data, cls=JSONEncoder), json.loads
+    )
+
+
+def _json_roundtrip_attributes(dumps, loads):
+    """Round trip attributes like the recorder and history do."""
+    now = dt_util.utcnow()
+    attributes = [
+        {
+            "friendly_name": f"Kitchen Lights {idx}",
+            "brightness": idx % 256,
+            "color_temp": 370,
+            "hs_color": [30.0, 50.5],
+            "supported_features": 63,
+            "effect_list": ["colorloop", "random"],
+            "last_triggered": now,
+        }
+        for idx in range(10 ** 5)
+    ]
+
+    start = timer()
+    for attrs in attributes:
+        loads(dumps(attrs))
+    return timer() - start
+
+
+@benchmark
+async def websocket_message_size(hass):
+    """Measure bytes on the wire and CPU per websocket message shape."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.websocket_api import messages
+
+    states = [
+        core.State(
+            f"light.kitchen_{idx}",
+            "on",
+            {
+                "friendly_name": f"Kitchen Lights {idx}",
+                "brightness": idx % 256,
+                "supported_features": 63,
+                "effect_list": ["colorloop", "random"],
+            },
+        )
+        for idx in range(5000)
+    ]
+    state_changes = []
+    for idx in range(10 ** 4):
+        old_state = states[idx % len(states)]
+        new_state = core.State(
+            old_state.entity_id, "on", {**old_state.attributes, "brightness": idx}
+        )
+        state_changes.append(
+            core.Event(
+                EVENT_STATE_CHANGED,
+                {
+                    "entity_id": new_state.entity_id,
+                    "old_state": old_state,
+                    "new_state": new_state,
+                },
+            )
+        )
+
+    # pylint: disable=protected-access
+    shapes = {
+        "get_states": (
+            1,
+            lambda idx: messages.result_message_json(idx, json_dumps_list(states)),
+        ),
+        "subscribe_entities": (
+            1,
+            lambda idx: messages.message_to_json(
+                messages.event_message(
+                    idx,
+                    {
+                        messages.ENTITY_EVENT_ADD: {
+                            state.entity_id: messages.compressed_state_dict(state)
+                            for state in states
+                        }
+                    },
+                )
+            ),
+        ),
+        "state_changed": (
+            len(state_changes),
+            lambda idx: messages.message_to_json(
+                messages.event_message(idx, state_changes[idx])
+            ),
+        ),
+        "state_diff": (
+            len(state_changes),
+            lambda idx: messages.message_to_json(
+                messages.event_message(
+                    idx, messages._state_diff_event(state_changes[idx])
+                )
+            ),
+        ),
+        "result": (
+            10 ** 4,
+            lambda idx: messages.message_to_json(messages.result_message(idx)),
+        ),
+    }
+
+    total = 0
+    for name, (count, serialize) in shapes.items():
+        # Compress like permessage-deflate with context takeover
+        compressobj = zlib.compressobj(zlib.Z_BEST_SPEED, zlib.DEFLATED, -15)
+        raw_bytes = wire_bytes = 0
+        serialize_time = compress_time = 0.0
+        for idx in range(count):
+            start = timer()
+            message = serialize(idx).encode()
+            serialize_time += timer() - start
+            start = timer()
+            compressed = compressobj.compress(message) + compressobj.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+            compress_time += timer() - start
+            raw_bytes += len(message)
+            wire_bytes += len(compressed) - 4
+        total += serialize_time + compress_time
+        print(
+            f"{name}: {raw_bytes / count:.0f} bytes, "
+            f"{wire_bytes / count:.0f} bytes compressed, "
+            f"{serialize_time / count * 10 ** 6:.1f}us to serialize, "
+            f"{compress_time / count * 10 ** 6:.1f}us to compress"
+        )
+
+    return total
+
+
 def _create_state_changed_event_from_old_new(
     entity_id, event_time_fired, old_state, new_state
 ):
@@ -420,6 +761,7 @@ def _create_state_changed_event_from_old_new(
     row.event_type = EVENT_STATE_CHANGED
     row.event_data = "{}"
     row.attributes = attributes_json
+    row.shared_attrs = None
     row.time_fired = event_time_fired
     row.state = new_state and new_state.get("state")
     row.entity_id = entity_id
@@ -2,17 +2,30 @@
 from __future__ import annotations
 
 from collections import deque
+from datetime import datetime
 import json
 import logging
+import math
 import os
 import tempfile
 from typing import Any, Callable
 
-from homeassistant.core import Event, State
+import orjson
+
 from homeassistant.exceptions import HomeAssistantError
 
 _LOGGER = logging.getLogger(__name__)
 
+_COMPACT_SEPARATORS = (",", ":")
+
+# Datetimes and dataclasses go through the default function like they
+# do with the standard library encoder.
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
 
 class SerializationError(HomeAssistantError):
     """Error serializing the data to JSON."""
@@ -22,6 +35,113 @@ class WriteError(HomeAssistantError):
     """Error writing the data."""
 
 
+def json_encoder_default(obj: Any) -> Any:
+    """Convert Home Assistant objects.
+
+    Raises TypeError for objects that can not be converted.
+    """
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, set):
+        return list(obj)
+    if hasattr(obj, "as_dict"):
+        return obj.as_dict()
+
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def json_dumps(
+    data: Any,
+    *,
+    pretty: bool = False,
+    allow_nan: bool = True,
+    default: Callable[[Any], Any] | None = json_encoder_default,
+) -> str:
+    """Serialize data to JSON.
+
+    Objects the encoder does not know are converted with default. Compact
+    output is written by orjson, without whitespace. Pretty output is
+    written by the standard library encoder with the indent of the files
+    under .storage.
+
+    NaN and infinity are written as NaN and Infinity like the standard
+    library encoder does, with allow_nan=False they raise ValueError.
+    Unlike the standard library encoder, orjson also serializes enums by
+    their value and UUIDs as strings, and writes non-ASCII characters as
+    they are instead of escaping them.
+    """
+    if not pretty:
+        converted: list[Any] = []
+        orjson_default = None
+        if default is not None:
+            convert = default
+
+            def _default(obj: Any) -> Any:
+                """Convert an object and remember the result."""
+                value = convert(obj)
+                converted.append(value)
+                return value
+
+            orjson_default = _default
+
+        try:
+            dumped = orjson.dumps(
+                data, option=_ORJSON_OPTIONS, default=orjson_default
+            ).decode("utf-8")
+        except TypeError:
+            # orjson is stricter on large integers and invalid unicode,
+            # let the standard library decide if the data can be encoded.
+            pass
+        else:
+            # orjson writes NaN and infinity as null
+            if "null" not in dumped or not _contains_non_finite((data, converted)):
+                return dumped
+            if not allow_nan:
+                raise ValueError("Out of range float values are not JSON compliant")
+        return json.dumps(
+            data, default=default, allow_nan=allow_nan, separators=_COMPACT_SEPARATORS
+        )
+
+    return json.dumps(data, default=default, allow_nan=allow_nan, indent=4)
+
+
+def _contains_non_finite(data: Any) -> bool:
+    """Return if data contains NaN or infinity.
+
+    Objects converted by the default function are not looked into, the
+    results of the conversions are checked on their own.
+    """
+    stack = [data]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        item = pop()
+        kind = type(item)
+        if kind is str or kind is int or item is None:
+            continue
+        if kind is float:
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            extend(item)
+    return False
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parse JSON data with orjson.
+
+    Raises ValueError if the data is not valid JSON.
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # The standard library also accepts NaN, infinity and
+        # lone surrogates.
+        return json.loads(data)
+
+
 def load_json(filename: str, default: list | dict | None = None) -> list | dict:
     """Load JSON data from a file and return as dict or list.
 
@@ -29,7 +149,7 @@ def load_json(filename: str, default: list | dict | None = None) -> list | dict:
     """
     try:
         with open(filename, encoding="utf-8") as fdesc:
-            return json.loads(fdesc.read())  # type: ignore
+            return json_loads(fdesc.read())  # type: ignore
     except FileNotFoundError:
         # This is not a fatal error
         _LOGGER.debug("JSON file not found: %s", filename)
@@ -54,7 +174,10 @@ def save_json(
     Returns True on success.
     """
     try:
-        json_data = json.dumps(data, indent=4, cls=encoder)
+        if encoder is None:
+            json_data = json_dumps(data, pretty=True, default=None)
+        else:
+            json_data = json.dumps(data, indent=4, cls=encoder)
     except TypeError as error:
         msg = f"Failed to serialize to JSON: {filename}. Bad data at {format_unserializable_data(find_paths_unserializable_data(data))}"
         _LOGGER.error(msg)
@@ -100,6 +223,9 @@ def find_paths_unserializable_data(
 
     This method is slow! Only use for error handling.
     """
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.core import Event, State
+
     to_process = deque([(bad_data, "$")])
     invalid = {}
 
@@ -17,7 +17,6 @@ from homeassistant.const import (
     STATE_UNKNOWN,
 )
 from homeassistant.core import CoreState
-from homeassistant.helpers.event import TRACK_STATE_CHANGE_CALLBACKS
 from homeassistant.setup import async_setup_component
 
 from tests.common import assert_setup_component
@@ -440,10 +439,10 @@ async def test_reloading_groups(hass):
         "group.test_group",
     ]
     assert hass.bus.async_listeners()["state_changed"] == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["hello.world"]) == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["light.bowl"]) == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["test.one"]) == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["test.two"]) == 1
+    assert hass.bus.async_entity_listeners()["hello.world"] == 1
+    assert hass.bus.async_entity_listeners()["light.bowl"] == 1
+    assert hass.bus.async_entity_listeners()["test.one"] == 1
+    assert hass.bus.async_entity_listeners()["test.two"] == 1
 
     with patch(
         "homeassistant.config.load_yaml_config_file",
@@ -459,9 +458,9 @@ async def test_reloading_groups(hass):
         "group.hello",
     ]
     assert hass.bus.async_listeners()["state_changed"] == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["light.bowl"]) == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["test.one"]) == 1
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS]["test.two"]) == 1
+    assert hass.bus.async_entity_listeners()["light.bowl"] == 1
+    assert hass.bus.async_entity_listeners()["test.one"] == 1
+    assert hass.bus.async_entity_listeners()["test.two"] == 1
 
 
 async def test_modify_group(hass):
@@ -0,0 +1,198 @@
+"""The tests for the recent history cache."""
+# pylint: disable=protected-access
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components import history
+from homeassistant.components.recorder.const import EVENT_RECORDER_PURGE_PROGRESS
+from homeassistant.setup import async_setup_component, setup_component
+import homeassistant.util.dt as dt_util
+
+from tests.common import init_recorder_component
+from tests.components.recorder.common import wait_recording_done
+
+
+def _setup_history(hass_recorder, config=None):
+    """Set up history with a recorder."""
+    hass = hass_recorder()
+    assert setup_component(hass, history.DOMAIN, {history.DOMAIN: config or {}})
+    return hass
+
+
+def _from_database(hass, *args, **kwargs):
+    """Return significant states without the cache."""
+    cache = hass.data.pop(history.DATA_CACHE)
+    try:
+        return history.get_significant_states(hass, *args, **kwargs)
+    finally:
+        hass.data[history.DATA_CACHE] = cache
+
+
+def _simplify(result):
+    """Return the comparable parts of a history result."""
+    return {
+        entity_id: [
+            (state["state"], state["last_changed"])
+            if isinstance(state, dict)
+            else (state.state, state.last_changed.isoformat())
+            for state in states
+        ]
+        for entity_id, states in result.items()
+    }
+
+
+def test_cache_answers_recent_queries(hass_recorder):
+    """Test queries inside the cached window do not use the database."""
+    hass = _setup_history(hass_recorder)
+    cache = hass.data[history.DATA_CACHE]
+    start = dt_util.utcnow()
+    hass.states.set("light.kitchen", "on", {"brightness": 1})
+    hass.states.set("climate.room", "heat", {"temperature": 20})
+    hass.states.set("light.kitchen", "on", {"brightness": 2})
+    wait_recording_done(hass)
+
+    entity_ids = ["light.kitchen", "climate.room"]
+    first = history.get_significant_states(hass, start, None, entity_ids)
+    hass.block_till_done()
+    assert cache.info()["misses"] == 1
+    assert cache.info()["entities"] == 2
+
+    # Changes after the backfill come from the state machine
+    hass.states.set("climate.room", "heat", {"temperature": 21})
+    hass.states.set("light.kitchen", "off", {"brightness": 0})
+    hass.states.set("light.kitchen", "on", {"brightness": 3})
+    wait_recording_done(hass)
+
+    for kwargs in (
+        {},
+        {"minimal_response": True},
+        {"significant_changes_only": False},
+        {"include_start_time_state": False},
+    ):
+        for query_start in (start, start + timedelta(microseconds=1)):
+            with patch.object(
+                history, "_significant_states_query"
+            ) as query, patch.object(history, "_get_states_with_session") as states:
+                cached = history.get_significant_states(
+                    hass, query_start, None, entity_ids, **kwargs
+                )
+            assert not query.called
+            assert not states.called
+            assert _simplify(cached) == _simplify(
+                _from_database(hass, query_start, None, entity_ids, **kwargs)
+            )
+
+    assert len(first["light.kitchen"]) == 1
+    assert len(cached["light.kitchen"]) == 3
+
+    with patch.object(history, "_get_single_entity_states_with_session") as states:
+        assert history.get_state(hass, dt_util.utcnow(), "light.kitchen").state == "on"
+    assert not states.called
+    assert cache.info()["hits"] >= 1
+
+    # Queries before the window are not answered from the cache
+    before = dt_util.utcnow() - timedelta(days=2)
+    assert cache.get(entity_ids, before) is None
+    hass.block_till_done()
+    assert cache.info()["entities"] == 2
+
+
+def test_cache_is_complete_from_the_recorded_states(hass_recorder):
+    """Test states the recorder did not write yet limit the cached window."""
+    hass = _setup_history(hass_recorder)
+    cache = hass.data[history.DATA_CACHE]
+    start = dt_util.utcnow()
+    hass.states.set("light.kitchen", "on")
+    wait_recording_done(hass)
+
+    # The recorder is behind, the database has no states yet
+    cache._backfill = lambda entity_ids, since: {}
+    assert cache.get(["light.kitchen"], start) is None
+    hass.block_till_done()
+
+    current = hass.states.get("light.kitchen")
+    assert cache.get(["light.kitchen"], start) is None
+    cached = cache.get(["light.kitchen"], current.last_updated + timedelta(seconds=1))
+    assert cached["light.kitchen"].since == current.last_updated
+
+
+def test_cache_limits(hass_recorder):
+    """Test the number of cached entities and states is limited."""
+    hass = _setup_history(
+        hass_recorder,
+        {history.CONF_CACHE_MAX_ENTITIES: 1, history.CONF_CACHE_MAX_STATES: 2},
+    )
+    cache = hass.data[history.DATA_CACHE]
+    start = dt_util.utcnow()
+    hass.states.set("light.kitchen", "on")
+    hass.states.set("light.cow", "on")
+    wait_recording_done(hass)
+
+    history.get_significant_states(hass, start, None, ["light.kitchen"])
+    hass.block_till_done()
+    history.get_significant_states(hass, start, None, ["light.cow"])
+    hass.block_till_done()
+    assert cache.get(["light.kitchen"], start) is None
+    hass.block_till_done()
+    assert cache.info()["entities"] == 1
+
+    for value in range(5):
+        hass.states.set("light.kitchen", str(value))
+    hass.block_till_done()
+    info = cache.info()
+    assert info["states"] == 2
+    third = hass.states.get("light.kitchen")
+    cached = cache.get(["light.kitchen"], third.last_updated + timedelta(seconds=1))
+    assert cached is not None
+    assert cached["light.kitchen"].initial.state == "2"
+    assert cache.get(["light.kitchen"], start) is None
+
+
+def test_cache_is_cleared_on_purge(hass_recorder):
+    """Test cached states are dropped when the recorder purges."""
+    hass = _setup_history(hass_recorder)
+    cache = hass.data[history.DATA_CACHE]
+    start = dt_util.utcnow()
+    hass.states.set("light.kitchen", "on")
+    wait_recording_done(hass)
+
+    history.get_significant_states(hass, start, None, ["light.kitchen"])
+    hass.block_till_done()
+    assert cache.info()["entities"] == 1
+
+    hass.bus.fire(EVENT_RECORDER_PURGE_PROGRESS, {})
+    hass.block_till_done()
+    assert cache.info()["entities"] == 0
+
+    # Removed entities are not cached
+    history.get_significant_states(hass, start, None, ["light.kitchen"])
+    hass.block_till_done()
+    hass.states.remove("light.kitchen")
+    hass.block_till_done()
+    assert cache.info()["entities"] == 0
+
+
+def test_cache_disabled(hass_recorder):
+    """Test the cache can be turned off."""
+    hass = _setup_history(hass_recorder, {history.CONF_CACHE_MAX_ENTITIES: 0})
+    assert history.DATA_CACHE not in hass.data
+
+
+async def test_cache_info(hass, hass_ws_client):
+    """Test the cache metrics can be read over the websocket API."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    assert await async_setup_component(hass, history.DOMAIN, {})
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client()
+    await client.send_json({"id": 1, "type": "history/cache_info"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"] == {
+        "hits": 0,
+        "misses": 0,
+        "entities": 0,
+        "states": 0,
+        "max_entities": history.DEFAULT_CACHE_MAX_ENTITIES,
+        "max_states": history.DEFAULT_CACHE_MAX_STATES,
+    }
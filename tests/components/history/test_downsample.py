@@ -0,0 +1,48 @@
+"""The tests for downsampling history."""
+from homeassistant.components.history.downsample import MIN_POINTS, downsample
+from homeassistant.core import State
+
+POWER_ATTRIBUTES = {"unit_of_measurement": "W"}
+
+
+def _power_states(values):
+    """Return minimal states of a power sensor between two full states."""
+    return [
+        State("sensor.power", values[0], POWER_ATTRIBUTES),
+        *(
+            {"state": value, "last_changed": str(index)}
+            for index, value in enumerate(values[1:-1])
+        ),
+        State("sensor.power", values[-1], POWER_ATTRIBUTES),
+    ]
+
+
+def test_downsample_keeps_extremes():
+    """Test the lowest and highest value of each bucket are kept in order."""
+    values = ["0", "5", "1", "9", "2", "3", "unavailable", "4", "-3", "6", "1", "2"]
+    states = _power_states(values)
+
+    result = downsample(states, 6)
+
+    assert result[0] is states[0]
+    assert result[-1] is states[-1]
+    assert [item["state"] for item in result[1:-1]] == [
+        "1",
+        "9",
+        "unavailable",
+        "-3",
+        "6",
+    ]
+
+
+def test_downsample_leaves_other_entities():
+    """Test short series and entities that are not numeric are kept."""
+    states = _power_states(["1", "2", "3"])
+    assert downsample(states, 3) is states
+
+    switch_states = [State("switch.heater", value) for value in ("on", "off") * 10]
+    assert downsample(switch_states, 4) is switch_states
+
+    states = _power_states([str(value) for value in range(100)])
+    assert len(downsample(states, MIN_POINTS)) == MIN_POINTS
+    assert len(downsample(states, MIN_POINTS + 1)) == MIN_POINTS
@@ -5,6 +5,7 @@ from datetime import timedelta
 import json
 from unittest.mock import patch, sentinel
 
+from aiohttp import ClientPayloadError
 import pytest
 
 from homeassistant.components import history, recorder
@@ -971,3 +972,307 @@ async def test_entity_ids_limit_via_api_with_skip_initial_state(hass, hass_clien
     assert len(response_json) == 2
     assert response_json[0][0]["entity_id"] == "light.kitchen"
     assert response_json[1][0]["entity_id"] == "light.cow"
+
+
+async def test_fetch_period_api_streamed(hass, hass_client):
+    """Test the fetch period view streams the same history."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.cow", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    for value in range(5):
+        hass.states.async_set("light.kitchen", str(value), {"value": value})
+        hass.states.async_set("sensor.power", str(value), {"value": value})
+    hass.states.async_set("sensor.power", "4", {"value": 5})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    for params in ("", "&minimal_response", "&significant_changes_only=0"):
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}?stream{params}"
+        )
+        assert response.status == 200
+        assert response.headers["Transfer-Encoding"] == "chunked"
+        streamed = await response.read()
+
+        response = await client.get(f"/api/history/period/{start.isoformat()}?{params}")
+        assert response.status == 200
+        assert await response.read() == streamed
+
+        by_entity = {states[0]["entity_id"]: states for states in json.loads(streamed)}
+        assert list(by_entity) == ["light.cow", "light.kitchen", "sensor.power"]
+
+    with patch.object(history, "STREAM_BATCH_SIZE", 2), patch.object(
+        history, "STREAM_CHUNK_SIZE", 1
+    ), patch.object(history, "STREAM_QUEUE_SIZE", 1):
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}?stream&minimal_response"
+        )
+        assert response.status == 200
+        assert [len(states) for states in await response.json()] == [1, 6, 5]
+
+
+async def test_fetch_period_api_streamed_order(hass, hass_client):
+    """Test the streamed history has the entity order of the buffered one."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(
+        hass,
+        "history",
+        {
+            "history": {
+                "use_include_order": True,
+                "include": {
+                    "entities": ["sensor.power", "light.kitchen"],
+                    "domains": ["light"],
+                },
+            }
+        },
+    )
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.cow", "on")
+    hass.states.async_set("light.bowl", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.bed", "on")
+    hass.states.async_set("sensor.power", "5")
+    hass.states.async_set("switch.heater", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    for params, order in (
+        (
+            "",
+            ["sensor.power", "light.kitchen", "light.bed", "light.bowl", "light.cow"],
+        ),
+        (
+            "&filter_entity_id=light.cow,light.kitchen,light.bed",
+            ["light.kitchen", "light.cow", "light.bed"],
+        ),
+    ):
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}?stream{params}"
+        )
+        assert response.status == 200
+        streamed = await response.read()
+
+        response = await client.get(f"/api/history/period/{start.isoformat()}?{params}")
+        assert response.status == 200
+        assert await response.read() == streamed
+        assert [states[0]["entity_id"] for states in json.loads(streamed)] == order
+
+
+async def test_fetch_period_api_streamed_error(hass, hass_client, caplog):
+    """Test a failing streamed history query does not end the body cleanly."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    def _failing_stream(*args):
+        yield '[[{"entity_id": "light.kitchen"}]'
+        raise ValueError("Boom")
+
+    client = await hass_client()
+    with patch.object(
+        history, "_stream_significant_states", _failing_stream
+    ), patch.object(history, "STREAM_CHUNK_SIZE", 1):
+        response = await client.get(
+            f"/api/history/period/{dt_util.utcnow().isoformat()}?stream"
+        )
+        assert response.status == 200
+        with pytest.raises(ClientPayloadError):
+            await response.read()
+
+    assert "Error streaming history" in caplog.text
+
+
+async def test_fetch_period_api_with_max_points(hass, hass_client):
+    """Test the fetch period view downsamples numeric entities."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    for value in range(50):
+        hass.states.async_set("sensor.power", str(value), {"unit_of_measurement": "W"})
+        hass.states.async_set("switch.heater", "on" if value % 2 else "off")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    for params in ("max_points=10", "max_points=10&stream"):
+        response = await client.get(f"/api/history/period/{start.isoformat()}?{params}")
+        assert response.status == 200
+        by_entity = {states[0]["entity_id"]: states for states in await response.json()}
+        power = [state["state"] for state in by_entity["sensor.power"]]
+        assert len(power) == 10
+        assert power[0] == "0"
+        assert power[-1] == "49"
+        assert len(by_entity["switch.heater"]) == 50
+
+    for params in ("max_points=none", "max_points=3"):
+        response = await client.get(f"/api/history/period/{start.isoformat()}?{params}")
+        assert response.status == 400
+
+
+async def test_fetch_statistics_period_api(hass, hass_client):
+    """Test the fetch statistics period view for history."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    start -= timedelta(hours=1)
+    with patch("homeassistant.core.dt_util.utcnow", return_value=start):
+        hass.states.async_set("sensor.power", "10", {"unit_of_measurement": "W"})
+        hass.states.async_set("sensor.other", "10", {"unit_of_measurement": "W"})
+        await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/statistics/period/{start.isoformat()}?filter_entity_id=sensor.power"
+    )
+    assert response.status == 200
+    response_json = await response.json()
+    assert list(response_json) == ["sensor.power"]
+    assert response_json["sensor.power"][0]["start"] == start.isoformat()
+    assert response_json["sensor.power"][0]["mean"] == 10.0
+
+    response = await client.get("/api/history/statistics/period/invalid")
+    assert response.status == 400
+
+
+async def test_history_stream(hass, hass_ws_client):
+    """Test the history is sent once and followed by live changes."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("light.kitchen", "on", {"brightness": 1})
+    hass.states.async_set("light.other", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_ws_client()
+    # Not recorded yet when subscribing, sent from the state machine
+    hass.states.async_set("light.kitchen", "off", {"brightness": 2})
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/stream",
+            "start_time": start.isoformat(),
+            "entity_ids": ["light.kitchen"],
+            "minimal_response": True,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+
+    response = await client.receive_json()
+    assert response["id"] == 1
+    assert response["type"] == "event"
+    states = response["event"]["states"]
+    assert list(states) == ["light.kitchen"]
+    history = states["light.kitchen"]
+    if len(history) == 1:
+        response = await client.receive_json()
+        history += response["event"]["states"]["light.kitchen"]
+    assert [state["state"] for state in history] == ["on", "off"]
+
+    # Attribute changes are not significant, duplicate states are not sent
+    hass.states.async_set("light.kitchen", "off", {"brightness": 3})
+    hass.states.async_set("light.other", "off")
+    hass.states.async_set("light.kitchen", "on", {"brightness": 3})
+    await hass.async_block_till_done()
+    response = await client.receive_json()
+    states = response["event"]["states"]
+    assert list(states) == ["light.kitchen"]
+    assert states["light.kitchen"][0]["state"] == "on"
+    assert "attributes" not in states["light.kitchen"][0]
+
+    await client.send_json({"id": 2, "type": "unsubscribe_events", "subscription": 1})
+    response = await client.receive_json()
+    assert response["id"] == 2
+    assert response["success"]
+
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    await client.send_json({"id": 3, "type": "ping"})
+    response = await client.receive_json()
+    assert response["type"] == "pong"
+
+
+async def test_history_stream_end_time(hass, hass_ws_client):
+    """Test the history of a finished period is only sent once."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("light.kitchen", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    end = dt_util.utcnow()
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/stream",
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "entity_ids": ["light.kitchen"],
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    response = await client.receive_json()
+    states = response["event"]["states"]["light.kitchen"]
+    assert [state["state"] for state in states] == ["on"]
+
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    await client.send_json({"id": 2, "type": "ping"})
+    response = await client.receive_json()
+    assert response["type"] == "pong"
+
+    await client.send_json(
+        {
+            "id": 3,
+            "type": "history/stream",
+            "start_time": "not a time",
+            "entity_ids": ["light.kitchen"],
+        }
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_start_time"
+
+    await client.send_json(
+        {
+            "id": 4,
+            "type": "history/stream",
+            "start_time": start.isoformat(),
+            "entity_ids": ["light.kitchen"],
+            "max_points": 3,
+        }
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_format"
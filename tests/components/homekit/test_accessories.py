@@ -42,7 +42,6 @@ from homeassistant.const import (
     STATE_UNAVAILABLE,
     __version__,
 )
-from homeassistant.helpers.event import TRACK_STATE_CHANGE_CALLBACKS
 
 from tests.common import async_mock_service
 
@@ -58,9 +57,9 @@ async def test_accessory_cancels_track_state_change_on_stop(hass, hk_driver):
         "homeassistant.components.homekit.accessories.HomeAccessory.async_update_state"
     ):
         await acc.run()
-    assert len(hass.data[TRACK_STATE_CHANGE_CALLBACKS][entity_id]) == 1
+    assert hass.bus.async_entity_listeners()[entity_id] == 1
     acc.async_stop()
-    assert entity_id not in hass.data[TRACK_STATE_CHANGE_CALLBACKS]
+    assert entity_id not in hass.bus.async_entity_listeners()
 
 
 async def test_home_accessory(hass, hk_driver):
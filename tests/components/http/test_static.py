@@ -0,0 +1,141 @@
+"""Test static file handling."""
+import gzip
+from pathlib import Path
+
+from aiohttp import hdrs, web
+import pytest
+
+from homeassistant.components.http.static import CachingStaticResource, StaticFile
+
+
+@pytest.fixture
+async def static_client(aiohttp_client, tmp_path):
+    """Return a client for a caching static resource."""
+    (tmp_path / "app.js").write_text("console.log('hello');")
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(b"console.log('hello');"))
+    (tmp_path / "app.js.br").write_bytes(b"brotli")
+    (tmp_path / "plain.txt").write_text("plain")
+    (tmp_path / "sub").mkdir()
+
+    app = web.Application()
+    app.router.register_resource(CachingStaticResource("/static", str(tmp_path)))
+    return await aiohttp_client(app, auto_decompress=False)
+
+
+async def test_serve_plain_file(static_client):
+    """Test a file without variants is sent with a strong ETag."""
+    resp = await static_client.get(
+        "/static/plain.txt", headers={hdrs.ACCEPT_ENCODING: "gzip, br"}
+    )
+    assert resp.status == 200
+    assert await resp.text() == "plain"
+    assert resp.headers[hdrs.CONTENT_TYPE] == "text/plain"
+    assert resp.headers[hdrs.CACHE_CONTROL].startswith("public, max-age=")
+    assert hdrs.CONTENT_ENCODING not in resp.headers
+    assert hdrs.VARY not in resp.headers
+    etag = resp.headers[hdrs.ETAG]
+    assert etag.startswith('"')
+
+    resp = await static_client.get(
+        "/static/plain.txt", headers={hdrs.IF_NONE_MATCH: etag}
+    )
+    assert resp.status == 304
+    assert resp.headers[hdrs.ETAG] == etag
+
+    resp = await static_client.get(
+        "/static/plain.txt", headers={hdrs.IF_NONE_MATCH: '"other"'}
+    )
+    assert resp.status == 200
+
+
+async def test_serve_precompressed_variants(static_client):
+    """Test the pre-compressed variant the client accepts is sent."""
+    resp = await static_client.get(
+        "/static/app.js", headers={hdrs.ACCEPT_ENCODING: "gzip, deflate, br"}
+    )
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_ENCODING] == "br"
+    assert await resp.read() == b"brotli"
+    assert resp.headers[hdrs.VARY] == hdrs.ACCEPT_ENCODING
+    assert "javascript" in resp.headers[hdrs.CONTENT_TYPE]
+    br_etag = resp.headers[hdrs.ETAG]
+
+    resp = await static_client.get(
+        "/static/app.js", headers={hdrs.ACCEPT_ENCODING: "gzip"}
+    )
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_ENCODING] == "gzip"
+    assert gzip.decompress(await resp.read()) == b"console.log('hello');"
+    gzip_etag = resp.headers[hdrs.ETAG]
+
+    resp = await static_client.get(
+        "/static/app.js", headers={hdrs.ACCEPT_ENCODING: "identity"}
+    )
+    assert resp.status == 200
+    assert hdrs.CONTENT_ENCODING not in resp.headers
+    assert resp.headers[hdrs.VARY] == hdrs.ACCEPT_ENCODING
+    assert await resp.text() == "console.log('hello');"
+
+    assert len({br_etag, gzip_etag, resp.headers[hdrs.ETAG]}) == 3
+
+    resp = await static_client.get(
+        "/static/app.js",
+        headers={hdrs.ACCEPT_ENCODING: "gzip", hdrs.IF_NONE_MATCH: br_etag},
+    )
+    assert resp.status == 200
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        ("", None),
+        ("gzip, deflate, br", "br"),
+        ("GZIP", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("br; q=0.0, gzip;q=0", None),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("gzip;q=0.8, br;q=0.8", "br"),
+        ("*", "br"),
+        ("*;q=0.1, br;q=0", "gzip"),
+        ("identity, *;q=0", None),
+        ("br;q=invalid, gzip", "gzip"),
+        ("x-brotli", None),
+    ],
+)
+def test_select_variant(accept_encoding, expected):
+    """Test the variant is selected by the codings and their q-values."""
+    variants = (("br", Path("app.js.br")), ("gzip", Path("app.js.gz")))
+    static_file = StaticFile(Path("app.js"), "application/javascript", variants)
+    encoding, path = static_file.select(accept_encoding)
+    assert encoding == expected
+    assert path == dict(variants).get(expected, Path("app.js"))
+
+
+async def test_serve_refused_variant(static_client):
+    """Test a variant with q=0 is not sent."""
+    resp = await static_client.get(
+        "/static/app.js", headers={hdrs.ACCEPT_ENCODING: "br;q=0, gzip;q=0"}
+    )
+    assert resp.status == 200
+    assert hdrs.CONTENT_ENCODING not in resp.headers
+    assert await resp.text() == "console.log('hello');"
+
+
+async def test_removed_file(static_client, tmp_path):
+    """Test a file that was removed after it was served."""
+    resp = await static_client.get("/static/plain.txt")
+    assert resp.status == 200
+
+    (tmp_path / "plain.txt").unlink()
+
+    resp = await static_client.get("/static/plain.txt")
+    assert resp.status == 404
+
+
+async def test_not_found(static_client):
+    """Test missing files and directories."""
+    resp = await static_client.get("/static/missing.js")
+    assert resp.status == 404
+
+    resp = await static_client.get("/static/sub")
+    assert resp.status == 403
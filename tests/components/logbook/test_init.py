@@ -3,6 +3,7 @@
 import collections
 from datetime import datetime, timedelta
 import json
+import threading
 from unittest.mock import Mock, patch
 
 import pytest
@@ -11,7 +12,13 @@ import voluptuous as vol
 from homeassistant.components import logbook, recorder
 from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
-from homeassistant.components.recorder.models import process_timestamp_to_utc_isoformat
+from homeassistant.components.recorder import PurgeTask
+from homeassistant.components.recorder.models import (
+    LogbookEntries,
+    RecorderRuns,
+    process_timestamp_to_utc_isoformat,
+)
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.components.script import EVENT_SCRIPT_STARTED
 from homeassistant.const import (
     ATTR_DOMAIN,
@@ -38,7 +45,11 @@ from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.util.dt as dt_util
 
 from tests.common import get_test_home_assistant, init_recorder_component, mock_platform
-from tests.components.recorder.common import trigger_db_commit
+from tests.components.recorder.common import (
+    async_wait_recording_done,
+    trigger_db_commit,
+    wait_recording_done,
+)
 
 EMPTY_CONFIG = logbook.CONFIG_SCHEMA({logbook.DOMAIN: {}})
 
@@ -295,6 +306,7 @@ def create_state_changed_event_from_old_new(
     row.event_type = EVENT_STATE_CHANGED
     row.event_data = "{}"
     row.attributes = attributes_json
+    row.shared_attrs = None
     row.time_fired = event_time_fired
     row.state = new_state and new_state.get("state")
     row.entity_id = entity_id
@@ -1834,6 +1846,305 @@ async def test_context_filter(hass, hass_client):
     assert response.status == 400
 
 
+def _fire_indexed_events(hass):
+    """Fire events of each kind the logbook describes."""
+    context = ha.Context(
+        id="ac5bd62de45711eaaeb351041eec8dd9",
+        user_id="b400facee45711eaa9308bfd3d19e474",
+    )
+    hass.states.set(
+        "automation.alarm", STATE_ON, {ATTR_FRIENDLY_NAME: "Alarm Automation"}
+    )
+    hass.states.set("light.kitchen", STATE_OFF)
+    hass.states.set("sensor.temperature", "20", {"unit_of_measurement": "°C"})
+    hass.states.set("sensor.mode", "eco")
+    hass.block_till_done()
+
+    hass.bus.fire(
+        EVENT_AUTOMATION_TRIGGERED,
+        {ATTR_NAME: "Mock automation", ATTR_ENTITY_ID: "automation.alarm"},
+        context=context,
+    )
+    hass.bus.fire(
+        EVENT_SCRIPT_STARTED,
+        {ATTR_NAME: "Mock script", ATTR_ENTITY_ID: "script.mock_script"},
+        context=ha.Context(parent_id=context.id),
+    )
+    hass.states.set("light.kitchen", STATE_ON, {"icon": "mdi:lamp"}, context=context)
+    hass.states.set("sensor.temperature", "21", {"unit_of_measurement": "°C"})
+    hass.states.set("sensor.mode", "comfort")
+    hass.states.set("sensor.mode", "away")
+
+    service_context = ha.Context(user_id="9400facee45711eaa9308bfd3d19e474")
+    hass.bus.fire(
+        EVENT_CALL_SERVICE,
+        {ATTR_DOMAIN: "light", ATTR_SERVICE: "turn_off"},
+        context=service_context,
+    )
+    hass.states.set("light.kitchen", STATE_OFF, context=service_context)
+    hass.bus.fire(EVENT_HOMEASSISTANT_START)
+    logbook.log_entry(hass, "mock_name", "mock_message", "alarm_control_panel")
+    logbook.log_entry(
+        hass, "mock_name", "mock_message", entity_id="switch.test", context=context
+    )
+    wait_recording_done(hass)
+
+
+def test_logbook_index_matches_described_events(hass_):
+    """Test the entries read from the logbook index are the described events."""
+    assert setup_component(hass_, "automation", {})
+    assert setup_component(hass_, "script", {})
+    start = dt_util.utcnow()
+    _fire_indexed_events(hass_)
+    end = dt_util.utcnow() + timedelta(seconds=1)
+
+    with session_scope(hass=hass_) as session:
+        assert session.query(LogbookEntries).count() == 9
+        assert logbook._get_index_start(session, start) <= start
+
+    described = logbook._describe_events(hass_, start, end)
+    with patch.object(logbook, "_describe_events") as describe_events:
+        entries = logbook._get_events(hass_, start, end)
+    assert not describe_events.called
+    assert entries == described
+    assert [(entry["name"], entry.get("state")) for entry in entries] == [
+        ("Mock automation", None),
+        ("Mock script", None),
+        ("kitchen", STATE_ON),
+        ("mode", "away"),
+        ("kitchen", STATE_OFF),
+        ("Home Assistant", None),
+        ("mock_name", None),
+        ("mock_name", None),
+    ]
+    assert entries[1]["context_entity_id_name"] == "Alarm Automation"
+    assert entries[4]["context_service"] == "turn_off"
+
+    for kwargs in (
+        {"entity_ids": ["light.kitchen", "switch.test"]},
+        {"entity_ids": ["light.kitchen", "switch.test"], "entity_matches_only": True},
+        {"context_id": "ac5bd62de45711eaaeb351041eec8dd9"},
+    ):
+        assert logbook._get_events(
+            hass_, start, end, **kwargs
+        ) == logbook._describe_events(hass_, start, end, **kwargs)
+
+    # Only the events of the entities are the context of their entries
+    entries = logbook._get_events(hass_, start, end, ["light.kitchen"])
+    assert [entry.get("context_event_type") for entry in entries] == [
+        EVENT_AUTOMATION_TRIGGERED,
+        EVENT_CALL_SERVICE,
+    ]
+    entries = logbook._get_events(
+        hass_, start, end, ["light.kitchen"], entity_matches_only=True
+    )
+    assert [entry.get("context_event_type") for entry in entries] == [None, None]
+
+
+def test_logbook_index_partially_covers_period(hass_):
+    """Test the events from before the logbook index are described."""
+    assert setup_component(hass_, "automation", {})
+    assert setup_component(hass_, "script", {})
+    start = dt_util.utcnow()
+    _fire_indexed_events(hass_)
+    index_start = dt_util.utcnow()
+    _fire_indexed_events(hass_)
+    end = dt_util.utcnow() + timedelta(seconds=1)
+
+    # The logbook was set up after the first events were recorded
+    with session_scope(hass=hass_) as session:
+        session.query(LogbookEntries).filter(
+            LogbookEntries.time_fired < index_start
+        ).delete()
+        session.query(RecorderRuns).update(
+            {RecorderRuns.logbook_indexed_since: index_start}
+        )
+    with session_scope(hass=hass_) as session:
+        assert logbook._get_index_start(session, start) == index_start
+
+    # Sensors are grouped on each side of the start of the index
+    entries = logbook._get_events(hass_, start, end)
+    assert len(entries) == 16
+    assert entries == logbook._describe_events(
+        hass_, start, index_start
+    ) + logbook._describe_events(hass_, index_start, end)
+
+
+async def test_logbook_index_describes_on_event_loop(hass):
+    """Test events are described for the logbook index on the event loop."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    described_in = []
+
+    def _describe(event):
+        """Describe an event."""
+        described_in.append(threading.get_ident())
+        return {"name": "Test Name", "message": "tested a message"}
+
+    hass.config.components.add("fake_integration")
+    mock_platform(
+        hass,
+        "fake_integration.logbook",
+        Mock(
+            async_describe_events=lambda hass, async_describe_event: async_describe_event(
+                "test_domain", "some_event", _describe
+            )
+        ),
+    )
+    assert await async_setup_component(hass, "logbook", {})
+
+    hass.bus.async_fire("some_event")
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass, hass.data[recorder.DATA_INSTANCE])
+
+    assert described_in == [threading.get_ident()]
+
+    def _get_entries():
+        with session_scope(hass=hass) as session:
+            return [json.loads(entry.entry) for entry in session.query(LogbookEntries)]
+
+    entries = await hass.async_add_executor_job(_get_entries)
+    assert entries == [
+        {"name": "Test Name", "message": "tested a message", "domain": "test_domain"}
+    ]
+
+
+def test_logbook_index_is_purged(hass_):
+    """Test logbook entries are purged with their events."""
+    _fire_indexed_events(hass_)
+    with session_scope(hass=hass_) as session:
+        assert session.query(LogbookEntries).count() > 0
+
+    hass_.data[recorder.DATA_INSTANCE].queue.put(PurgeTask(0, False, False))
+    wait_recording_done(hass_)
+    with session_scope(hass=hass_) as session:
+        assert session.query(LogbookEntries).count() == 0
+
+
+async def test_logbook_event_stream(hass, hass_ws_client):
+    """Test the logbook is sent once and followed by new entries."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    assert await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("light.kitchen", STATE_ON)
+    hass.states.async_set("light.other", STATE_ON)
+    await hass.async_block_till_done()
+    # Not committed yet when subscribing
+    hass.states.async_set("light.kitchen", STATE_OFF)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "logbook/event_stream",
+            "start_time": start.isoformat(),
+            "entity_ids": ["light.kitchen"],
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+
+    response = await client.receive_json()
+    assert response["id"] == 1
+    assert response["type"] == "event"
+    entries = response["event"]["events"]
+    assert len(entries) == 1
+    _assert_entry(entries[0], name="kitchen", entity_id="light.kitchen", state="off")
+
+    service_context = ha.Context(user_id="9400facee45711eaa9308bfd3d19e474")
+    hass.bus.async_fire(
+        EVENT_CALL_SERVICE,
+        {ATTR_DOMAIN: "light", ATTR_SERVICE: "turn_on"},
+        context=service_context,
+    )
+    hass.states.async_set("light.other", STATE_OFF, context=service_context)
+    hass.states.async_set("light.kitchen", STATE_ON, context=service_context)
+    await hass.async_block_till_done()
+    response = await client.receive_json()
+    entries = response["event"]["events"]
+    assert len(entries) == 1
+    _assert_entry(entries[0], name="kitchen", entity_id="light.kitchen", state="on")
+    assert entries[0]["context_service"] == "turn_on"
+    assert entries[0]["context_user_id"] == "9400facee45711eaa9308bfd3d19e474"
+
+    await client.send_json({"id": 2, "type": "unsubscribe_events", "subscription": 1})
+    response = await client.receive_json()
+    assert response["id"] == 2
+    assert response["success"]
+
+    hass.states.async_set("light.kitchen", STATE_OFF)
+    await hass.async_block_till_done()
+    await client.send_json({"id": 3, "type": "ping"})
+    response = await client.receive_json()
+    assert response["type"] == "pong"
+
+
+async def test_logbook_event_stream_commit_timeout(hass, hass_ws_client, caplog):
+    """Test the logbook is still sent when the recorder does not commit."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    assert await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+
+    client = await hass_ws_client()
+    with patch.object(
+        hass.data[recorder.DATA_INSTANCE], "commit", return_value=False
+    ) as mock_commit:
+        await client.send_json(
+            {
+                "id": 1,
+                "type": "logbook/event_stream",
+                "start_time": start.isoformat(),
+                "end_time": dt_util.utcnow().isoformat(),
+            }
+        )
+        response = await client.receive_json()
+        assert response["success"]
+        response = await client.receive_json()
+        assert response["event"]["events"] == []
+
+    assert mock_commit.call_args[0] == (logbook.RECORDER_COMMIT_TIMEOUT,)
+    assert "The recorder did not commit within 10 seconds" in caplog.text
+
+
+async def test_logbook_event_stream_end_time(hass, hass_ws_client):
+    """Test the logbook of a period that ended is sent once."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    assert await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("light.kitchen", STATE_ON)
+    hass.states.async_set("light.kitchen", STATE_OFF)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+    end = dt_util.utcnow()
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "logbook/event_stream",
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    response = await client.receive_json()
+    entries = response["event"]["events"]
+    assert len(entries) == 2
+    _assert_entry(entries[0], entity_id="light.kitchen", state="off")
+    _assert_entry(entries[1], name="Home Assistant", message="started")
+
+    await client.send_json(
+        {"id": 2, "type": "logbook/event_stream", "start_time": "invalid"}
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_start_time"
+
+
 async def _async_fetch_logbook(client, params=None):
     if params is None:
         params = {}
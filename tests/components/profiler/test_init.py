@@ -5,16 +5,21 @@ from unittest.mock import patch
 
 from homeassistant import setup
 from homeassistant.components.profiler import (
+    CONF_LIMIT,
     CONF_SCAN_INTERVAL,
     CONF_SECONDS,
     CONF_TYPE,
     SERVICE_DUMP_LOG_OBJECTS,
+    SERVICE_DUMP_TEMPLATE_PROFILE,
     SERVICE_MEMORY,
     SERVICE_START,
     SERVICE_START_LOG_OBJECTS,
+    SERVICE_START_TEMPLATE_PROFILER,
     SERVICE_STOP_LOG_OBJECTS,
+    SERVICE_STOP_TEMPLATE_PROFILER,
 )
 from homeassistant.components.profiler.const import DOMAIN
+from homeassistant.helpers.template import Template, async_get_profiler
 import homeassistant.util.dt as dt_util
 
 from tests.common import MockConfigEntry, async_fire_time_changed
@@ -147,3 +152,66 @@ async def test_dump_log_object(hass, caplog):
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
+
+
+async def test_template_profiler(hass, hass_ws_client, caplog):
+    """Test the template profiler services and websocket command."""
+
+    await setup.async_setup_component(hass, "persistent_notification", {})
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 1, "type": "profiler/template_profile"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"] == {"running": False, "templates": []}
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_DUMP_TEMPLATE_PROFILE, {}, blocking=True
+    )
+    assert "not running" in caplog.text
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_START_TEMPLATE_PROFILER, {}, blocking=True
+    )
+    assert async_get_profiler(hass) is not None
+
+    Template("{{ 'slow' }}", hass).async_render()
+    Template("{{ 'slow' }}", hass).async_render()
+    Template("{{ 'fast' }}", hass).async_render()
+
+    await client.send_json(
+        {"id": 2, "type": "profiler/template_profile", CONF_LIMIT: 1}
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"]["running"]
+    assert [stats["template"] for stats in response["result"]["templates"]] == [
+        "{{ 'slow' }}"
+    ]
+    assert response["result"]["templates"][0]["count"] == 2
+
+    caplog.clear()
+    await hass.services.async_call(
+        DOMAIN, SERVICE_DUMP_TEMPLATE_PROFILE, {CONF_LIMIT: 5}, blocking=True
+    )
+    assert "{{ 'slow' }}" in caplog.text
+    assert "{{ 'fast' }}" in caplog.text
+
+    caplog.clear()
+    await hass.services.async_call(
+        DOMAIN, SERVICE_STOP_TEMPLATE_PROFILER, {}, blocking=True
+    )
+    assert "{{ 'slow' }}" in caplog.text
+    assert async_get_profiler(hass) is None
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_START_TEMPLATE_PROFILER, {}, blocking=True
+    )
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert async_get_profiler(hass) is None
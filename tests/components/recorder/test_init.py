@@ -19,7 +19,12 @@ from homeassistant.components.recorder import (
     run_information_from_instance,
     run_information_with_session,
 )
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
@@ -92,6 +97,40 @@ async def test_saving_state(
     assert state == _state_empty_context(hass, entity_id)
 
 
+async def test_saving_state_shares_attributes(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test states with the same attributes share a state attributes row."""
+    instance = await async_setup_recorder_instance(hass)
+    attributes = {"test_attr": 5, "test_attr_10": "nice"}
+
+    hass.states.async_set("test.one", "on", attributes)
+    hass.states.async_set("test.two", "on", attributes)
+    hass.states.async_set("test.one", "off", attributes)
+    await async_wait_recording_done(hass, instance)
+
+    # Forget the known ids so the attributes are looked up in the database
+    instance._state_attributes_ids.clear()
+    hass.states.async_set("test.two", "off", attributes)
+    hass.states.async_set("test.one", "on", {"test_attr": 6})
+    await async_wait_recording_done(hass, instance)
+
+    with session_scope(hass=hass) as session:
+        db_attributes = list(session.query(StateAttributes))
+        assert len(db_attributes) == 2
+        assert sorted(attrs.to_native()["test_attr"] for attrs in db_attributes) == [
+            5,
+            6,
+        ]
+
+        db_states = list(session.query(States))
+        assert len(db_states) == 5
+        assert all(db_state.attributes is None for db_state in db_states)
+        assert len({db_state.attributes_id for db_state in db_states}) == 2
+        assert db_states[3].to_native() == _state_empty_context(hass, "test.two")
+        assert db_states[4].to_native() == _state_empty_context(hass, "test.one")
+
+
 def test_saving_state_with_exception(hass, hass_recorder, caplog):
     """Test saving and restoring a state."""
     hass = hass_recorder()
@@ -100,17 +139,20 @@ def test_saving_state_with_exception(hass, hass_recorder, caplog):
     state = "restoring_from_db"
     attributes = {"test_attr": 5, "test_attr_10": "nice"}
 
-    def _throw_if_state_in_session(*args, **kwargs):
-        for obj in hass.data[DATA_INSTANCE].event_session:
-            if isinstance(obj, States):
-                raise OperationalError(
-                    "insert the state", "fake params", "forced to fail"
-                )
+    instance = hass.data[DATA_INSTANCE]
+    insert_pending_rows = instance._insert_pending_rows
+    failed = []
+
+    def _throw_once_if_state_pending():
+        if instance._pending_states and not failed:
+            failed.append(True)
+            raise OperationalError("insert the state", "fake params", "forced to fail")
+        return insert_pending_rows()
 
     with patch("time.sleep"), patch.object(
-        hass.data[DATA_INSTANCE].event_session,
-        "flush",
-        side_effect=_throw_if_state_in_session,
+        instance,
+        "_insert_pending_rows",
+        side_effect=_throw_once_if_state_pending,
     ):
         hass.states.set(entity_id, "fail", attributes)
         wait_recording_done(hass)
@@ -124,7 +166,8 @@ def test_saving_state_with_exception(hass, hass_recorder, caplog):
 
     with session_scope(hass=hass) as session:
         db_states = list(session.query(States))
-        assert len(db_states) >= 1
+        assert len(db_states) == 2
+        assert db_states[1].old_state_id == db_states[0].state_id
 
     assert "Error executing query" not in caplog.text
     assert "Error saving events" not in caplog.text
@@ -477,6 +520,59 @@ def test_saving_sets_old_state(hass_recorder):
         assert states[3].old_state_id == states[1].state_id
 
 
+def test_saving_sets_old_state_in_one_commit(hass_recorder):
+    """Test saving sets old state for states written in the same commit."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    assert instance.commit_latency is None
+
+    hass.states.set("test.one", "on", {})
+    hass.states.set("test.one", "off", {})
+    hass.states.remove("test.one")
+    hass.states.set("test.one", "on", {})
+    wait_recording_done(hass)
+
+    assert instance.commit_latency is not None
+    assert instance.backlog == 0
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States))
+        assert len(states) == 4
+        assert [state.state for state in states] == ["on", "off", None, "on"]
+
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id == states[0].state_id
+        assert states[2].old_state_id == states[1].state_id
+        assert states[3].old_state_id is None
+        assert all(state.event_id is not None for state in states)
+
+
+def test_saving_inserts_rows_one_by_one(hass_recorder):
+    """Test rows get the ids the database assigned when inserted one by one."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    hass.states.set("test.one", "on", {"a": 1})
+    wait_recording_done(hass)
+
+    with patch.object(instance.engine.dialect, "name", "mysql"):
+        hass.states.set("test.one", "off", {"a": 2})
+        hass.states.set("test.two", "on", {"a": 2})
+        hass.states.set("test.one", "on", {"a": 1})
+        wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States))
+        assert [state.state for state in states] == ["on", "off", "on", "on"]
+        assert len({state.state_id for state in states}) == 4
+        assert states[1].old_state_id == states[0].state_id
+        assert states[2].old_state_id is None
+        assert states[3].old_state_id == states[1].state_id
+        assert states[1].attributes_id == states[2].attributes_id
+        assert states[3].attributes_id == states[0].attributes_id
+        for state in states:
+            assert session.query(Events).get(state.event_id) is not None
+
+
 def test_saving_state_with_serializable_data(hass_recorder, caplog):
     """Test saving data that cannot be serialized does not crash."""
     hass = hass_recorder()
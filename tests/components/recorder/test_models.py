@@ -10,6 +10,7 @@ from homeassistant.components.recorder.models import (
     Base,
     Events,
     RecorderRuns,
+    StateAttributes,
     States,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
@@ -41,6 +42,26 @@ def test_from_event_to_db_state():
     assert state == States.from_event(event).to_native()
 
 
+def test_from_event_to_shared_state_attributes():
+    """Test converting a state with shared attributes back to a state."""
+    state = ha.State("sensor.temperature", "18", {"unit_of_measurement": "°C"})
+    event = ha.Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": "sensor.temperature", "old_state": None, "new_state": state},
+        context=state.context,
+    )
+    state.context = ha.Context(id=None)
+    db_state = States.from_event(event)
+    db_state.state_attributes = StateAttributes.from_shared_attrs(db_state.attributes)
+    db_state.attributes = None
+
+    assert db_state.state_attributes.hash == StateAttributes.hash_shared_attrs(
+        db_state.state_attributes.shared_attrs
+    )
+    assert db_state.state_attributes.to_native() == dict(state.attributes)
+    assert state == db_state.to_native()
+
+
 def test_from_event_to_delete_state():
     """Test converting deleting state event to db state."""
     event = ha.Event(
@@ -1,11 +1,20 @@
 """Test data purging."""
 from datetime import datetime, timedelta
 import json
+import queue
+from unittest.mock import patch
 
 from sqlalchemy.orm.session import Session
 
 from homeassistant.components import recorder
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.const import EVENT_RECORDER_PURGE_PROGRESS
+from homeassistant.components.recorder.models import (
+    Events,
+    PurgeRuns,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import EVENT_STATE_CHANGED
@@ -19,6 +28,8 @@ from .common import (
 )
 from .conftest import SetupRecorderInstanceT
 
+from tests.common import async_capture_events
+
 
 async def test_purge_old_states(
     hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
@@ -52,6 +63,153 @@ async def test_purge_old_states(
         assert states.count() == 2
 
 
+async def test_purge_old_states_removes_unused_attributes(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test purging states removes the state attributes no state refers to."""
+    instance = await async_setup_recorder_instance(hass)
+    utcnow = dt_util.utcnow()
+    eleven_days_ago = utcnow - timedelta(days=11)
+
+    await async_wait_recording_done(hass, instance)
+
+    with recorder.session_scope(hass=hass) as session:
+        shared = StateAttributes.from_shared_attrs('{"shared":true}')
+        purged = StateAttributes.from_shared_attrs('{"shared":false}')
+        session.add_all([shared, purged])
+        for timestamp, state_attributes in (
+            (eleven_days_ago, shared),
+            (eleven_days_ago, purged),
+            (utcnow, shared),
+        ):
+            event = Events(
+                event_type="state_changed",
+                event_data="{}",
+                origin="LOCAL",
+                created=timestamp,
+                time_fired=timestamp,
+            )
+            session.add(
+                States(
+                    entity_id="test.recorder2",
+                    domain="sensor",
+                    state="on",
+                    last_changed=timestamp,
+                    last_updated=timestamp,
+                    created=timestamp,
+                    event=event,
+                    state_attributes=state_attributes,
+                )
+            )
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StateAttributes).count() == 2
+
+        finished = purge_old_data(instance, 4, repack=False)
+        assert not finished
+
+        assert session.query(States).count() == 1
+        remaining = session.query(StateAttributes).all()
+        assert len(remaining) == 1
+        assert remaining[0].shared_attrs == '{"shared":true}'
+
+
+async def test_purge_in_chunks_is_resumed(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test a purge is done in chunks that report and persist their progress."""
+    instance = await async_setup_recorder_instance(hass)
+    progress_events = async_capture_events(hass, EVENT_RECORDER_PURGE_PROGRESS)
+
+    await _add_test_states(hass, instance)
+
+    instance.purge_chunk_size = 1
+    with patch("homeassistant.components.recorder.purge.PURGE_CHUNK_SECONDS", 60):
+        assert not await hass.async_add_executor_job(purge_old_data, instance, 4, False)
+    # Fast chunks grow
+    assert instance.purge_chunk_size == 2
+    await hass.async_block_till_done()
+
+    assert len(progress_events) == 1
+    progress = progress_events[0].data
+    assert progress["keep_days"] == 4
+    assert progress["chunks"] == 1
+    assert progress["states_purged"] == 1
+    assert progress["events_purged"] == 1
+    assert progress["rows_per_second"] > 0
+    assert not progress["finished"]
+
+    with session_scope(hass=hass) as session:
+        purge_run = session.query(PurgeRuns).one()
+        assert purge_run.end is None
+        assert purge_run.states_purged == 1
+        purge_before = purge_run.purge_before
+
+    # A restart picks up the unfinished purge with the same target
+    await hass.async_add_executor_job(instance._resume_purge)
+    await async_wait_purge_done(hass, instance)
+
+    with session_scope(hass=hass) as session:
+        purge_run = session.query(PurgeRuns).one()
+        assert purge_run.end is not None
+        assert purge_run.purge_before == purge_before
+        assert purge_run.states_purged == 4
+        assert purge_run.events_purged == 4
+        assert session.query(States).count() == 2
+
+    assert progress_events[-1].data["finished"]
+    assert progress_events[-1].data["states_purged"] == 4
+
+
+async def test_purge_waits_for_the_backlog(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test a purge chunk is put back behind waiting events."""
+    instance = await async_setup_recorder_instance(hass)
+    task = recorder.PurgeTask(10, False, False)
+
+    with patch(
+        "homeassistant.components.recorder.purge.purge_old_data", return_value=True
+    ) as purge_old_data_mock, patch.object(
+        instance, "queue", queue.SimpleQueue()
+    ), patch.object(
+        recorder.Recorder, "backlog", recorder.PURGE_DEFER_BACKLOG + 1
+    ):
+        await hass.async_add_executor_job(instance._process_one_event, task)
+        assert instance.queue.get_nowait() == task._replace(deferrals=1)
+
+    assert not purge_old_data_mock.called
+
+
+async def test_purge_runs_after_max_deferrals(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test a purge is not starved by a backlog that never shrinks."""
+    instance = await async_setup_recorder_instance(hass)
+    purge_queue = queue.SimpleQueue()
+    purge_queue.put(recorder.PurgeTask(10, False, False))
+
+    with patch(
+        "homeassistant.components.recorder.purge.purge_old_data", return_value=True
+    ) as purge_old_data_mock, patch.object(
+        instance, "queue", purge_queue
+    ), patch.object(
+        recorder.Recorder, "backlog", recorder.PURGE_DEFER_BACKLOG + 1
+    ):
+        for _ in range(recorder.PURGE_MAX_DEFERRALS):
+            await hass.async_add_executor_job(
+                instance._process_one_event, purge_queue.get_nowait()
+            )
+            assert not purge_old_data_mock.called
+
+        await hass.async_add_executor_job(
+            instance._process_one_event, purge_queue.get_nowait()
+        )
+
+    assert purge_queue.empty()
+    purge_old_data_mock.assert_called_once_with(instance, 10, False, False)
+
+
 async def test_purge_old_events(
     hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
 ):
@@ -0,0 +1,211 @@
+"""Test spilling the recorder queue to disk."""
+# pylint: disable=protected-access
+import os
+import threading
+from unittest.mock import patch
+
+from homeassistant.components.recorder import PurgeTask
+from homeassistant.components.recorder.models import LogbookEntries, States
+from homeassistant.components.recorder.spill import SPILL_DIR
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.core import Context, Event, State, callback
+from homeassistant.helpers.json import json_dumps
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.util import dt as dt_util
+
+from .common import async_wait_recording_done
+from .conftest import SetupRecorderInstanceT
+
+
+def _recorded_states(hass):
+    """Return the recorded test states in the order they were written."""
+    with session_scope(hass=hass) as session:
+        return [
+            (db_state.entity_id, db_state.state, db_state.old_state_id)
+            for db_state in session.query(States)
+            .filter(States.entity_id.like("test.%"))
+            .order_by(States.state_id)
+        ]
+
+
+async def test_spill_and_replay_in_order(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+    tmp_path,
+):
+    """Test events over the backlog limit are spilled and replayed in order."""
+    hass.config.config_dir = str(tmp_path)
+    instance = await async_setup_recorder_instance(hass, {"max_backlog": 2})
+    spill_dir = os.path.join(str(tmp_path), SPILL_DIR)
+    # Record the startup events so only the test states are spilled
+    await async_wait_recording_done(hass, instance)
+
+    purge_started = threading.Event()
+    release_recorder = threading.Event()
+
+    def _blocking_purge(*args):
+        purge_started.set()
+        release_recorder.wait()
+        return True
+
+    with patch(
+        "homeassistant.components.recorder.purge.purge_old_data",
+        side_effect=_blocking_purge,
+    ):
+        instance.queue.put(PurgeTask(10, False, False))
+        try:
+            assert await hass.async_add_executor_job(purge_started.wait, 10)
+
+            for value in range(10):
+                hass.states.async_set("test.one", str(value))
+            await hass.async_block_till_done()
+
+            assert instance._spill.spilled == 8
+            assert instance.backlog >= 10
+            assert len(os.listdir(spill_dir)) == 1
+        finally:
+            release_recorder.set()
+        await async_wait_recording_done(hass, instance)
+
+    states = await hass.async_add_executor_job(_recorded_states, hass)
+    assert [state for _, state, _ in states] == [str(value) for value in range(10)]
+    assert states[0][2] is None
+    assert all(old_state_id is not None for _, _, old_state_id in states[1:])
+    assert os.listdir(spill_dir) == []
+    assert instance.backlog == 0
+
+    # The queue is used again once the spilled events are drained
+    hass.states.async_set("test.one", "done")
+    await async_wait_recording_done(hass, instance)
+    states = await hass.async_add_executor_job(_recorded_states, hass)
+    assert states[-1][1] == "done"
+    assert os.listdir(spill_dir) == []
+
+
+async def test_spill_keeps_logbook_entries(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+    tmp_path,
+):
+    """Test the logbook entries described on the event loop are spilled too."""
+    hass.config.config_dir = str(tmp_path)
+    instance = await async_setup_recorder_instance(hass, {"max_backlog": 2})
+
+    @callback
+    def _describe(event):
+        if event.event_type != "state_changed":
+            return None
+        return {
+            "event_type": event.event_type,
+            "time_fired": event.time_fired,
+            "entity_id": event.data["entity_id"],
+            "domain": "test",
+            "context_id": event.context.id,
+            "entry": json_dumps({"state": event.data["new_state"].state}),
+        }
+
+    instance.set_logbook_indexer(_describe)
+    await async_wait_recording_done(hass, instance)
+    purge_started = threading.Event()
+    release_recorder = threading.Event()
+
+    def _blocking_purge(*args):
+        purge_started.set()
+        release_recorder.wait()
+        return True
+
+    with patch(
+        "homeassistant.components.recorder.purge.purge_old_data",
+        side_effect=_blocking_purge,
+    ):
+        instance.queue.put(PurgeTask(10, False, False))
+        try:
+            assert await hass.async_add_executor_job(purge_started.wait, 10)
+
+            for value in range(5):
+                hass.states.async_set("test.one", str(value))
+            await hass.async_block_till_done()
+            assert instance._spill.spilled > 0
+        finally:
+            release_recorder.set()
+        await async_wait_recording_done(hass, instance)
+
+    def _recorded_entries():
+        with session_scope(hass=hass) as session:
+            return [
+                (entry.entry, entry.time_fired, entry.event_id is not None)
+                for entry in session.query(LogbookEntries).order_by(
+                    LogbookEntries.entry_id
+                )
+            ]
+
+    entries = await hass.async_add_executor_job(_recorded_entries)
+    assert [entry for entry, _, _ in entries] == [
+        json_dumps({"state": str(value)}) for value in range(5)
+    ]
+    assert all(time_fired is not None and linked for _, time_fired, linked in entries)
+
+
+async def test_replay_leftover_segments(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+    tmp_path,
+):
+    """Test events spilled before a restart are recorded on startup."""
+    hass.config.config_dir = str(tmp_path)
+    spill_dir = os.path.join(str(tmp_path), SPILL_DIR)
+    os.makedirs(spill_dir)
+
+    now = dt_util.utcnow()
+    old_state = State("test.one", "on", {"attr": 1}, now, now)
+    new_state = State("test.one", "off", {"attr": 1}, now, now)
+    event = Event(
+        "state_changed",
+        {"entity_id": "test.one", "old_state": old_state, "new_state": new_state},
+        time_fired=now,
+        context=Context(),
+    )
+    with open(os.path.join(spill_dir, "1.jsonl"), "w") as segment_file:
+        segment_file.write(f"{json_dumps(event.as_dict())}\n")
+        segment_file.write("not json\n")
+
+    instance = await async_setup_recorder_instance(hass, {"max_backlog": 100})
+    await async_wait_recording_done(hass, instance)
+
+    states = await hass.async_add_executor_job(_recorded_states, hass)
+    assert states == [("test.one", "off", None)]
+    assert os.listdir(spill_dir) == []
+
+
+async def test_backlog_sensor(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+    tmp_path,
+):
+    """Test the backlog sensor is only set up in bounded queue mode."""
+    hass.config.config_dir = str(tmp_path)
+    instance = await async_setup_recorder_instance(hass, {"max_backlog": 100})
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.recorder_backlog")
+    assert state is not None
+    assert int(state.state) >= 0
+
+    with patch.object(type(instance), "backlog", 42):
+        await hass.helpers.entity_component.async_update_entity(
+            "sensor.recorder_backlog"
+        )
+    state = hass.states.get("sensor.recorder_backlog")
+    assert state.state == "42"
+    assert state.attributes["unit_of_measurement"] == "events"
+
+
+async def test_no_backlog_sensor_by_default(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test the queue is not bounded unless configured."""
+    instance = await async_setup_recorder_instance(hass)
+    await hass.async_block_till_done()
+
+    assert instance._spill is None
+    assert hass.states.get("sensor.recorder_backlog") is None
@@ -0,0 +1,344 @@
+"""The tests for the long-term statistics of the recorder."""
+# pylint: disable=protected-access
+from datetime import datetime, timedelta
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.recorder import PurgeTask
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import Statistics
+from homeassistant.components.recorder.statistics import (
+    StatisticsCompiler,
+    last_statistic,
+    statistics_during_period,
+)
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.const import EVENT_TIME_CHANGED
+from homeassistant.core import State
+import homeassistant.util.dt as dt_util
+
+from .common import wait_recording_done
+
+START = datetime(2021, 5, 1, 12, 0, tzinfo=dt_util.UTC)
+POWER_ATTRIBUTES = {"unit_of_measurement": "W"}
+ENERGY_ATTRIBUTES = {"unit_of_measurement": "kWh", "state_class": "total_increasing"}
+
+
+def _state(entity_id, state, attributes=POWER_ATTRIBUTES):
+    """Return a state of a numeric sensor."""
+    return State(entity_id, state, attributes)
+
+
+def test_compile_time_weighted_mean():
+    """Test the mean is weighted by how long each value was kept."""
+    compiler = StatisticsCompiler(lambda statistic_id: None)
+
+    rows = compiler.state_changed("sensor.power", _state("sensor.power", "10"), START)
+    assert rows == []
+    compiler.state_changed(
+        "sensor.power", _state("sensor.power", "40"), START + timedelta(minutes=45)
+    )
+    compiler.state_changed(
+        "sensor.power",
+        _state("sensor.power", "unavailable"),
+        START + timedelta(minutes=50),
+    )
+    rows = compiler.compile(START + timedelta(hours=1, seconds=1))
+
+    assert rows == [
+        {
+            "statistic_id": "sensor.power",
+            "start": START,
+            # 45 minutes at 10 and 5 minutes at 40
+            "mean": pytest.approx((45 * 10 + 5 * 40) / 50),
+            "min": 10.0,
+            "max": 40.0,
+            "state": 40.0,
+            "sum": None,
+        }
+    ]
+    # The same period is not compiled twice
+    assert compiler.compile(START + timedelta(hours=1, seconds=2)) == []
+
+
+def test_compile_carries_the_value_into_quiet_periods():
+    """Test periods without changes keep the last value."""
+    compiler = StatisticsCompiler(lambda statistic_id: None)
+
+    compiler.state_changed(
+        "sensor.power", _state("sensor.power", "10"), START + timedelta(minutes=30)
+    )
+    rows = compiler.compile(START + timedelta(hours=1))
+    rows += compiler.compile(START + timedelta(hours=2))
+    # The clock jumped, the periods in between are skipped
+    rows += compiler.state_changed(
+        "sensor.power", _state("sensor.power", "20"), START + timedelta(hours=5)
+    )
+    rows += compiler.compile(START + timedelta(hours=6))
+
+    assert [(row["start"], row["mean"], row["min"]) for row in rows] == [
+        (START, 10.0, 10.0),
+        (START + timedelta(hours=1), 10.0, 10.0),
+        (START + timedelta(hours=2), 10.0, 10.0),
+        (START + timedelta(hours=5), 20.0, 10.0),
+    ]
+
+
+def test_compile_ignores_other_states():
+    """Test only numeric sensors are compiled."""
+    compiler = StatisticsCompiler(lambda statistic_id: None)
+
+    compiler.state_changed("light.kitchen", State("light.kitchen", "5"), START)
+    compiler.state_changed("sensor.mode", State("sensor.mode", "eco"), START)
+    compiler.state_changed("sensor.count", State("sensor.count", "5"), START)
+
+    assert compiler.compile(START + timedelta(hours=1)) == []
+
+
+def test_compile_sum_of_counters():
+    """Test counters keep a sum that survives resets and restarts."""
+    compiler = StatisticsCompiler(lambda statistic_id: (100.0, 7.0))
+
+    for minutes, value in ((0, "102"), (10, "105"), (20, "1"), (30, "3")):
+        compiler.state_changed(
+            "sensor.energy",
+            _state("sensor.energy", value, ENERGY_ATTRIBUTES),
+            START + timedelta(minutes=minutes),
+        )
+    rows = compiler.compile(START + timedelta(hours=1))
+
+    assert len(rows) == 1
+    # 7 before the restart, 2 and 3 before the reset and 1 and 2 after it
+    assert rows[0]["sum"] == 15.0
+    assert rows[0]["state"] == 3.0
+
+
+def test_compile_unit_change_mid_period():
+    """Test values in different units are not combined."""
+    compiler = StatisticsCompiler(lambda statistic_id: None)
+
+    compiler.state_changed("sensor.power", _state("sensor.power", "1000"), START)
+    compiler.state_changed(
+        "sensor.power",
+        _state("sensor.power", "2", {"unit_of_measurement": "kW"}),
+        START + timedelta(minutes=30),
+    )
+    compiler.state_changed(
+        "sensor.energy", _state("sensor.energy", "5", ENERGY_ATTRIBUTES), START
+    )
+    compiler.state_changed(
+        "sensor.energy", _state("sensor.energy", "7", ENERGY_ATTRIBUTES), START
+    )
+    compiler.state_changed(
+        "sensor.energy",
+        _state(
+            "sensor.energy",
+            "7500",
+            {**ENERGY_ATTRIBUTES, "unit_of_measurement": "Wh"},
+        ),
+        START + timedelta(minutes=30),
+    )
+    rows = compiler.compile(START + timedelta(hours=1))
+
+    assert {row["statistic_id"]: row for row in rows} == {
+        "sensor.power": {
+            "statistic_id": "sensor.power",
+            "start": START,
+            "mean": 2.0,
+            "min": 2.0,
+            "max": 2.0,
+            "state": 2.0,
+            "sum": None,
+        },
+        # The change of unit is not counted as an increase
+        "sensor.energy": {
+            "statistic_id": "sensor.energy",
+            "start": START,
+            "mean": 7500.0,
+            "min": 7500.0,
+            "max": 7500.0,
+            "state": 7500.0,
+            "sum": 2.0,
+        },
+    }
+
+
+def test_compile_sensor_restart_mid_period():
+    """Test a sensor that is unavailable while it restarts."""
+    compiler = StatisticsCompiler(lambda statistic_id: None)
+
+    for minutes, value in ((0, "10"), (10, "unavailable"), (40, "30")):
+        compiler.state_changed(
+            "sensor.power",
+            _state("sensor.power", value),
+            START + timedelta(minutes=minutes),
+        )
+    for minutes, value in ((0, "10"), (10, "unavailable"), (40, "12")):
+        compiler.state_changed(
+            "sensor.energy",
+            _state("sensor.energy", value, ENERGY_ATTRIBUTES),
+            START + timedelta(minutes=minutes),
+        )
+    rows = compiler.compile(START + timedelta(hours=1))
+
+    assert {row["statistic_id"]: row for row in rows} == {
+        # The time the sensor was unavailable is not part of the mean
+        "sensor.power": {
+            "statistic_id": "sensor.power",
+            "start": START,
+            "mean": pytest.approx((10 * 10 + 20 * 30) / 30),
+            "min": 10.0,
+            "max": 30.0,
+            "state": 30.0,
+            "sum": None,
+        },
+        "sensor.energy": {
+            "statistic_id": "sensor.energy",
+            "start": START,
+            "mean": pytest.approx((10 * 10 + 20 * 12) / 30),
+            "min": 10.0,
+            "max": 12.0,
+            "state": 12.0,
+            "sum": 2.0,
+        },
+    }
+
+
+def test_statistics_are_recorded_and_not_purged(hass_recorder):
+    """Test hourly statistics are written and kept when states are purged."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    with patch("homeassistant.core.dt_util.utcnow", return_value=START):
+        hass.states.set("sensor.power", "10", POWER_ATTRIBUTES)
+        hass.states.set("sensor.energy", "1", ENERGY_ATTRIBUTES)
+    with patch(
+        "homeassistant.core.dt_util.utcnow",
+        return_value=START + timedelta(minutes=30),
+    ):
+        hass.states.set("sensor.power", "20", POWER_ATTRIBUTES)
+        hass.states.set("sensor.energy", "4", ENERGY_ATTRIBUTES)
+    with patch(
+        "homeassistant.core.dt_util.utcnow",
+        return_value=START + timedelta(hours=1, seconds=1),
+    ):
+        hass.bus.fire(EVENT_TIME_CHANGED, {})
+    wait_recording_done(hass)
+
+    end = START + timedelta(hours=1)
+    statistics = statistics_during_period(hass, START - timedelta(hours=1), end)
+    assert statistics == {
+        "sensor.energy": [
+            {
+                "start": START,
+                "mean": 2.5,
+                "min": 1.0,
+                "max": 4.0,
+                "state": 4.0,
+                "sum": 3.0,
+            }
+        ],
+        "sensor.power": [
+            {
+                "start": START,
+                "mean": 15.0,
+                "min": 10.0,
+                "max": 20.0,
+                "state": 20.0,
+                "sum": None,
+            }
+        ],
+    }
+    assert statistics_during_period(
+        hass, START, START + timedelta(hours=1), ["sensor.power"]
+    ) == {"sensor.power": statistics["sensor.power"]}
+    assert statistics_during_period(hass, START - timedelta(hours=1), START) == {}
+
+    # A counter continues from the last recorded sum
+    with session_scope(hass=hass) as session:
+        assert last_statistic(session, "sensor.energy") == (4.0, 3.0)
+        assert last_statistic(session, "sensor.power") is None
+
+    instance.queue.put(PurgeTask(0, False, False))
+    wait_recording_done(hass)
+
+    assert statistics_during_period(hass, START, end) == statistics
+    with session_scope(hass=hass) as session:
+        assert session.query(Statistics).count() >= 2
+
+
+def test_statistics_after_restart_and_unit_change(hass_recorder):
+    """Test recorded statistics when a sensor restarts or changes its unit."""
+    hass = hass_recorder()
+
+    def set_states(time, states):
+        with patch("homeassistant.core.dt_util.utcnow", return_value=time):
+            for entity_id, state, attributes in states:
+                hass.states.set(entity_id, state, attributes)
+
+    kilowatt = {"unit_of_measurement": "kW"}
+    set_states(
+        START,
+        [
+            ("sensor.power", "1000", POWER_ATTRIBUTES),
+            ("sensor.energy", "10", ENERGY_ATTRIBUTES),
+        ],
+    )
+    set_states(
+        START + timedelta(minutes=10),
+        [
+            ("sensor.power", "unavailable", POWER_ATTRIBUTES),
+            ("sensor.energy", "unavailable", ENERGY_ATTRIBUTES),
+        ],
+    )
+    set_states(
+        START + timedelta(minutes=40),
+        [
+            ("sensor.power", "2", kilowatt),
+            ("sensor.energy", "12", ENERGY_ATTRIBUTES),
+        ],
+    )
+    with patch(
+        "homeassistant.core.dt_util.utcnow",
+        return_value=START + timedelta(hours=1, seconds=1),
+    ):
+        hass.bus.fire(EVENT_TIME_CHANGED, {})
+    wait_recording_done(hass)
+
+    statistics = statistics_during_period(hass, START, START + timedelta(hours=1))
+    assert statistics == {
+        "sensor.energy": [
+            {
+                "start": START,
+                "mean": pytest.approx((10 * 10 + 20 * 12) / 30),
+                "min": 10.0,
+                "max": 12.0,
+                "state": 12.0,
+                "sum": 2.0,
+            }
+        ],
+        "sensor.power": [
+            {
+                "start": START,
+                "mean": 2.0,
+                "min": 2.0,
+                "max": 2.0,
+                "state": 2.0,
+                "sum": None,
+            }
+        ],
+    }
+    with session_scope(hass=hass) as session:
+        assert last_statistic(session, "sensor.energy") == (12.0, 2.0)
+
+        # After a restart of Home Assistant the counter continues from the last sum
+        compiler = StatisticsCompiler(partial(last_statistic, session))
+        compiler.state_changed(
+            "sensor.energy",
+            _state("sensor.energy", "15", ENERGY_ATTRIBUTES),
+            START + timedelta(hours=1, minutes=5),
+        )
+    rows = compiler.compile(START + timedelta(hours=2))
+    assert rows[0]["sum"] == 5.0
@@ -0,0 +1,23 @@
+"""Test recorder system health."""
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.setup import async_setup_component
+
+from .common import async_wait_recording_done
+from .conftest import SetupRecorderInstanceT
+
+from tests.common import get_system_health_info
+
+
+async def test_recorder_system_health(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test the backlog and commit latency are reported."""
+    instance = await async_setup_recorder_instance(hass)
+    assert await async_setup_component(hass, "system_health", {})
+
+    hass.states.async_set("test.one", "on")
+    await async_wait_recording_done(hass, instance)
+
+    info = await get_system_health_info(hass, "recorder")
+    assert info["backlog"] == 0
+    assert info["commit_latency"].endswith(" ms")
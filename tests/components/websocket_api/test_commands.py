@@ -1,4 +1,5 @@
 """Tests for WebSocket API commands."""
+from datetime import timedelta
 from unittest.mock import ANY, patch
 
 from async_timeout import timeout
@@ -18,8 +19,14 @@ from homeassistant.helpers import entity
 from homeassistant.helpers.typing import HomeAssistantType
 from homeassistant.loader import async_get_integration
 from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
 
-from tests.common import MockEntity, MockEntityPlatform, async_mock_service
+from tests.common import (
+    MockEntity,
+    MockEntityPlatform,
+    async_fire_time_changed,
+    async_mock_service,
+)
 
 
 async def test_call_service(hass, websocket_client):
@@ -391,6 +398,192 @@ async def test_subscribe_unsubscribe_events(hass, websocket_client):
     assert sum(hass.bus.async_listeners().values()) == init_count
 
 
+async def test_subscribe_events_coalesce_window(hass, websocket_client):
+    """Test state changes of an entity are merged within the coalesce window."""
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "subscribe_events",
+            "event_type": "state_changed",
+            "coalesce_window": 1,
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["success"]
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.kitchen", "off", {"brightness": 10})
+    hass.states.async_set("light.kitchen", "on", {"brightness": 20})
+    hass.states.async_set("light.hall", "on")
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+
+    events = {}
+    with timeout(3):
+        for _ in range(2):
+            msg = await websocket_client.receive_json()
+            assert msg["id"] == 5
+            assert msg["type"] == "event"
+            event = msg["event"]["data"]
+            events[event["entity_id"]] = event
+
+    assert events["light.kitchen"]["old_state"]["state"] == "off"
+    assert events["light.kitchen"]["old_state"]["attributes"] == {}
+    assert events["light.kitchen"]["new_state"]["state"] == "on"
+    assert events["light.kitchen"]["new_state"]["attributes"] == {"brightness": 20}
+    assert events["light.hall"]["old_state"] is None
+    assert events["light.hall"]["new_state"]["state"] == "on"
+
+    await websocket_client.send_json({"id": 6, "type": "connection_stats"})
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 6
+    assert msg["success"]
+    assert msg["result"]["coalesced_events"] == 2
+
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "unsubscribe_events", "subscription": 5}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["success"]
+
+    # The pending change is dropped with the subscription
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=4))
+    await hass.async_block_till_done()
+
+    await websocket_client.send_json({"id": 8, "type": "ping"})
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 8
+    assert msg["type"] == "pong"
+
+
+async def test_subscribe_events_coalesce_window_invalid(hass, websocket_client):
+    """Test the coalesce window is bounded."""
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "subscribe_events",
+            "event_type": "state_changed",
+            "coalesce_window": const.MAX_COALESCE_WINDOW + 1,
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert not msg["success"]
+    assert msg["error"]["code"] == const.ERR_INVALID_FORMAT
+
+
+async def test_subscribe_entities(hass, websocket_client, hass_admin_user):
+    """Test subscribe_entities sends compressed states and diffs."""
+    hass.states.async_set("light.permitted", "off", {"color": "red"})
+    hass.states.async_set("light.not_permitted", "off")
+    hass.states.async_set("switch.other", "off")
+    original_state = hass.states.get("light.permitted")
+    hass_admin_user.groups = []
+    hass_admin_user.mock_policy({"entities": {"entity_ids": {"light.permitted": True}}})
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "domains": ["light"]}
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == "event"
+    assert msg["event"] == {
+        "a": {
+            "light.permitted": {
+                "a": {"color": "red"},
+                "c": original_state.context.id,
+                "lc": original_state.last_changed.timestamp(),
+                "s": "off",
+            }
+        }
+    }
+
+    hass.states.async_set("light.not_permitted", "on")
+    hass.states.async_set("switch.other", "on")
+    hass.states.async_set("light.permitted", "on", {"effect": "help"})
+    new_state = hass.states.get("light.permitted")
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == "event"
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "a": {"effect": "help"},
+                    "c": new_state.context.id,
+                    "lc": new_state.last_changed.timestamp(),
+                    "s": "on",
+                },
+                "-": {"a": ["color"]},
+            }
+        }
+    }
+
+    hass.states.async_set("light.permitted", "on", {"effect": "help", "x": 1})
+    msg = await websocket_client.receive_json()
+    new_state = hass.states.get("light.permitted")
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "a": {"x": 1},
+                    "c": new_state.context.id,
+                    "lu": new_state.last_updated.timestamp(),
+                }
+            }
+        }
+    }
+
+    hass.states.async_remove("light.permitted")
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {"r": ["light.permitted"]}
+
+
+async def test_subscribe_entities_by_entity_id(hass, websocket_client):
+    """Test subscribe_entities only sends the requested entities."""
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.hall", "off")
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "entity_ids": ["light.hall"]}
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["a"]) == ["light.hall"]
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.hall", "on")
+
+    msg = await websocket_client.receive_json()
+    assert msg["event"]["c"]["light.hall"]["+"]["s"] == "on"
+
+    await websocket_client.send_json(
+        {"id": 8, "type": "unsubscribe_events", "subscription": 7}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 8
+    assert msg["success"]
+
+
 async def test_get_states(hass, websocket_client):
     """Test get_states command."""
     hass.states.async_set("greeting.hello", "world")
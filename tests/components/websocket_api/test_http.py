@@ -6,6 +6,12 @@ from aiohttp import WSMsgType
 import pytest
 
 from homeassistant.components.websocket_api import const, http
+from homeassistant.components.websocket_api.auth import (
+    TYPE_AUTH,
+    TYPE_AUTH_OK,
+    TYPE_AUTH_REQUIRED,
+)
+from homeassistant.setup import async_setup_component
 from homeassistant.util.dt import utcnow
 
 from tests.common import async_fire_time_changed
@@ -80,3 +86,68 @@ async def test_non_json_message(hass, websocket_client, caplog):
         f"Unable to serialize to JSON. Bad data found at $.result[0](State: test_domain.entity).attributes.bad={bad_data}(<class 'object'>"
         in caplog.text
     )
+
+
+async def test_coalesce_messages(hass, websocket_client):
+    """Test waiting messages are written in one frame when supported."""
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "supported_features",
+            "features": {const.FEATURE_COALESCE_MESSAGES: 1},
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["success"]
+
+    await websocket_client.send_json(
+        {"id": 6, "type": "subscribe_events", "event_type": "test_event"}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 6
+    assert msg["success"]
+
+    for idx in range(3):
+        hass.bus.async_fire("test_event", {"idx": idx})
+
+    received = []
+    while len(received) < 3:
+        msg = await websocket_client.receive_json()
+        if isinstance(msg, list):
+            received.extend(msg)
+        else:
+            received.append(msg)
+
+    assert [msg["event"]["data"]["idx"] for msg in received] == [0, 1, 2]
+
+    await websocket_client.send_json({"id": 7, "type": "connection_stats"})
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    stats = msg["result"]
+    # auth_required, auth_ok, two results and three events
+    assert stats["messages"] == 7
+    assert stats["frames"] < stats["messages"]
+    assert stats["pending_peak"] >= 3
+
+
+async def test_compression_negotiated(hass, aiohttp_client, hass_access_token):
+    """Test permessage-deflate is used when the client offers it."""
+    assert await async_setup_component(hass, "websocket_api", {})
+    await hass.async_block_till_done()
+
+    client = await aiohttp_client(hass.http.app)
+
+    async with client.ws_connect(const.URL, compress=15) as ws:
+        assert ws.compress == 15
+
+        auth_msg = await ws.receive_json()
+        assert auth_msg["type"] == TYPE_AUTH_REQUIRED
+
+        await ws.send_json({"type": TYPE_AUTH, "access_token": hass_access_token})
+        auth_msg = await ws.receive_json()
+        assert auth_msg["type"] == TYPE_AUTH_OK
+
+        await ws.send_json({"id": 5, "type": "ping"})
+        msg = await ws.receive_json()
+        assert msg == {"id": 5, "type": "pong"}
@@ -15,6 +15,7 @@ from homeassistant.core import callback
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
 from homeassistant.helpers.event import (
+    TEMPLATE_RENDER_SCHEDULER,
     TrackStates,
     TrackTemplate,
     TrackTemplateResult,
@@ -897,15 +898,299 @@ async def test_track_template_error_can_recover(hass, caplog):
     await hass.async_block_till_done()
     assert not error_calls
 
-    hass.states.async_remove("switch.data_system")
+    hass.states.async_set("sensor.data_system", "on", {"opmode": "0"})
+    await hass.async_block_till_done()
+    assert len(error_calls) == 1
 
-    assert "UndefinedError" in caplog.text
+    hass.states.async_remove("sensor.data_system")
+    await hass.async_block_till_done()
 
-    hass.states.async_set("switch.data_system", "cow", {"opmode": 0})
+    assert "UndefinedError" in caplog.text
 
     caplog.clear()
 
+    hass.states.async_set("sensor.data_system", "on", {"opmode": "0"})
+    await hass.async_block_till_done()
+
     assert "UndefinedError" not in caplog.text
+    assert len(error_calls) == 2
+
+
+async def test_track_template_result_static_dependencies(hass):
+    """Test templates that only read known states are not rendered to set up."""
+    template_complex = Template(
+        "{{ states('sensor.a') | float + state_attr('sensor.b', 'x') | float"
+        " + states.sensor.c.state | float }} {{ states.light | count }}",
+        hass,
+    )
+    template_error = Template("{{ states.sensor.missing.attributes.x }}", hass)
+    template_dynamic = Template("{{ states('sensor.' ~ name) }}", hass)
+    specific_runs = []
+
+    @ha.callback
+    def specific_run_callback(event, updates):
+        specific_runs.append(updates)
+
+    with patch.object(
+        Template, "async_render_to_info", wraps=Template.async_render_to_info
+    ) as render_mock:
+        info = async_track_template_result(
+            hass,
+            [
+                TrackTemplate(template_complex, None),
+                TrackTemplate(template_error, None),
+            ],
+            specific_run_callback,
+        )
+    assert not render_mock.called
+    assert info.listeners == {
+        "all": False,
+        "domains": {"light"},
+        "entities": {"sensor.a", "sensor.b", "sensor.c", "sensor.missing"},
+        "time": False,
+    }
+
+    # The failed render keeps listening to the states the template reads
+    info.async_refresh()
+    await hass.async_block_till_done()
+    assert info.listeners == {
+        "all": False,
+        "domains": {"light"},
+        "entities": {"sensor.a", "sensor.b", "sensor.c", "sensor.missing"},
+        "time": False,
+    }
+
+    hass.states.async_set("sensor.missing", "on", {"x": 1})
+    await hass.async_block_till_done()
+    assert specific_runs[-1][0].template is template_error
+    assert specific_runs[-1][0].result == 1
+
+    info.async_remove()
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(template_dynamic, {"name": "a"})], specific_run_callback
+    )
+    assert info.listeners["entities"] == {"sensor.a"}
+    info.async_remove()
+
+
+async def test_track_template_result_attribute_changes(hass):
+    """Test templates are not re-rendered when the attributes read did not change."""
+    hass.states.async_set("climate.a", "heat", {"temperature": 20, "mode": "eco"})
+    template_attr = Template("{{ state_attr('climate.a', 'temperature') }}", hass)
+    specific_runs = []
+
+    @ha.callback
+    def specific_run_callback(event, updates):
+        specific_runs.append(updates.pop().result)
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(template_attr, None)], specific_run_callback
+    )
+    info.async_refresh()
+    assert specific_runs == [20]
+
+    hass.states.async_set("climate.a", "cool", {"temperature": 20, "mode": "eco"})
+    hass.states.async_set("climate.a", "cool", {"temperature": 20, "mode": "away"})
+    await hass.async_block_till_done()
+    assert specific_runs == [20]
+    assert info.renders_avoided == 2
+
+    hass.states.async_set("climate.a", "cool", {"temperature": 22, "mode": "away"})
+    await hass.async_block_till_done()
+    assert specific_runs == [20, 22]
+
+    hass.states.async_remove("climate.a")
+    await hass.async_block_till_done()
+    assert specific_runs == [20, 22, None]
+    assert info.renders_avoided == 2
+
+
+async def test_track_template_result_static_setup_logs_errors(hass, caplog):
+    """Test errors of templates set up without rendering them are logged."""
+    template_error = Template("{{ (states('sensor.a') | float) / 0 }}", hass)
+    assert template_error.async_static_render_info() is not None
+    specific_runs = []
+
+    @ha.callback
+    def specific_run_callback(event, updates):
+        specific_runs.append(updates.pop().result)
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(template_error, None)], specific_run_callback
+    )
+    assert info.listeners["entities"] == {"sensor.a"}
+    assert "Error while processing template" not in caplog.text
+
+    info.async_refresh()
+    assert isinstance(specific_runs[-1], TemplateError)
+    assert "Error while processing template" in caplog.text
+    assert "division by zero" in caplog.text
+
+    # Only the first render is logged like the setup
+    caplog.clear()
+    hass.states.async_set("sensor.a", "1")
+    await hass.async_block_till_done()
+    assert "Error while processing template" not in caplog.text
+
+
+async def test_track_template_result_renders_avoided_counted_once(hass):
+    """Test a state change that needs no render is counted once."""
+    hass.states.async_set("climate.a", "heat", {"temperature": 20, "mode": "eco"})
+    template_attr = Template("{{ state_attr('climate.a', 'temperature') }}", hass)
+    specific_runs = []
+
+    @ha.callback
+    def specific_run_callback(event, updates):
+        specific_runs.append(updates.pop().result)
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(template_attr, None)], specific_run_callback
+    )
+    info.async_refresh()
+    assert specific_runs == [20]
+
+    hass.states.async_set("climate.a", "heat", {"temperature": 20, "mode": "away"})
+    await hass.async_block_till_done()
+    assert info.renders_avoided == 1
+
+    # The render checks the state change again without counting it
+    with patch(
+        "homeassistant.helpers.event._event_changes_read_attributes",
+        side_effect=[True, False],
+    ):
+        hass.states.async_set("climate.a", "cool", {"temperature": 20, "mode": "away"})
+        await hass.async_block_till_done()
+    hass.states.async_set("climate.a", "cool", {"temperature": 21, "mode": "away"})
+    await hass.async_block_till_done()
+    info.async_refresh()
+    assert specific_runs == [20, 21]
+    assert info.renders_avoided == 1
+
+
+async def test_track_template_result_batched_renders(hass):
+    """Test the templates a state change made dirty are rendered in one pass."""
+    hass.states.async_set("sensor.a", "1")
+    hass.states.async_set("sensor.b", "1")
+    runs = []
+    infos = []
+
+    for name in ("one", "two", "three"):
+
+        @ha.callback
+        def run_callback(event, updates, name=name):
+            result = updates.pop().result
+            runs.append((name, result))
+            if (name, result) == ("one", "2-1"):
+                hass.states.async_set("sensor.b", "x")
+
+        info = async_track_template_result(
+            hass,
+            [
+                TrackTemplate(
+                    Template("{{ states('sensor.a') }}-{{ states('sensor.b') }}", hass),
+                    None,
+                )
+            ],
+            run_callback,
+        )
+        info.async_refresh()
+        infos.append(info)
+
+    runs.clear()
+
+    hass.states.async_set("sensor.a", "2")
+    await hass.async_block_till_done()
+    scheduler = hass.data[TEMPLATE_RENDER_SCHEDULER]
+    # The actions are called after all templates of a pass rendered
+    assert runs == [
+        ("one", "2-1"),
+        ("two", "2-1"),
+        ("three", "2-1"),
+        ("one", "2-x"),
+        ("two", "2-x"),
+        ("three", "2-x"),
+    ]
+    assert scheduler.passes == 2
+    assert scheduler.renders == 6
+    assert scheduler.deferred == 0
+    assert all(info.render_costs for info in infos)
+
+    runs.clear()
+    hass.states.async_set("sensor.a", "3")
+    infos[1].async_remove()
+    await hass.async_block_till_done()
+    assert runs == [("one", "3-x"), ("three", "3-x")]
+
+
+async def test_track_template_result_render_budget(hass):
+    """Test templates over the time budget are deferred in order."""
+    hass.states.async_set("sensor.a", "1")
+    runs = []
+
+    @ha.callback
+    def run_callback(event, updates):
+        runs.extend(update.template.template for update in updates)
+
+    templates = [
+        Template(f"{{{{ states('sensor.a') }}}} {index}", hass) for index in range(3)
+    ]
+    for template in templates:
+        async_track_template_result(
+            hass, [TrackTemplate(template, None)], run_callback
+        ).async_refresh()
+    runs.clear()
+
+    with patch("homeassistant.helpers.event.TEMPLATE_RENDER_BUDGET", 0):
+        hass.states.async_set("sensor.a", "2")
+        await hass.async_block_till_done()
+
+    assert runs == [template.template for template in templates]
+    scheduler = hass.data[TEMPLATE_RENDER_SCHEDULER]
+    assert scheduler.passes == 3
+    assert scheduler.deferred == 3
+
+
+async def test_track_template_result_batched_errors(hass, caplog):
+    """Test an error in one tracker does not stop the other trackers."""
+    hass.states.async_set("light.a", "off")
+    runs = []
+
+    @ha.callback
+    def failing_callback(event, updates):
+        raise ValueError("Boom")
+
+    @ha.callback
+    def run_callback(event, updates):
+        runs.extend(update.result for update in updates)
+
+    template = Template("{{ states('light.a') }}", hass)
+    async_track_template_result(hass, [TrackTemplate(template, None)], failing_callback)
+    async_track_template_result(hass, [TrackTemplate(template, None)], run_callback)
+
+    hass.states.async_set("light.a", "on")
+    await hass.async_block_till_done()
+
+    assert runs == ["on"]
+    assert "Boom" in caplog.text
+
+    broken = Template("{{ states('light.a') }} broken", hass)
+    info = async_track_template_result(
+        hass, [TrackTemplate(broken, None)], run_callback
+    )
+    runs.clear()
+    caplog.clear()
+
+    with patch.object(
+        info, "_render_template_if_ready", side_effect=ValueError("Broken")
+    ):
+        hass.states.async_set("light.a", "off")
+        await hass.async_block_till_done()
+
+    assert runs == ["off"]
+    assert "Error while rendering template" in caplog.text
+    assert "Broken" in caplog.text
+    assert not hass.data[TEMPLATE_RENDER_SCHEDULER]._dirty
 
 
 async def test_track_template_time_change(hass, caplog):
@@ -1307,21 +1592,29 @@ async def test_track_template_result_and_conditional(hass):
         hass, [TrackTemplate(template, None)], specific_run_callback
     )
     await hass.async_block_till_done()
+    # Both entities are found without rendering the template
     assert info.listeners == {
         "all": False,
         "domains": set(),
-        "entities": {"light.a"},
+        "entities": {"light.a", "light.b"},
         "time": False,
     }
 
     hass.states.async_set("light.b", "on")
     await hass.async_block_till_done()
-    assert len(specific_runs) == 0
+    assert len(specific_runs) == 1
+    assert specific_runs[0] == "off"
+    assert info.listeners == {
+        "all": False,
+        "domains": set(),
+        "entities": {"light.a"},
+        "time": False,
+    }
 
     hass.states.async_set("light.a", "on")
     await hass.async_block_till_done()
-    assert len(specific_runs) == 1
-    assert specific_runs[0] == "on"
+    assert len(specific_runs) == 2
+    assert specific_runs[1] == "on"
     assert info.listeners == {
         "all": False,
         "domains": set(),
@@ -1331,8 +1624,8 @@ async def test_track_template_result_and_conditional(hass):
 
     hass.states.async_set("light.b", "off")
     await hass.async_block_till_done()
-    assert len(specific_runs) == 2
-    assert specific_runs[1] == "off"
+    assert len(specific_runs) == 3
+    assert specific_runs[2] == "off"
     assert info.listeners == {
         "all": False,
         "domains": set(),
@@ -1342,16 +1635,16 @@ async def test_track_template_result_and_conditional(hass):
 
     hass.states.async_set("light.a", "off")
     await hass.async_block_till_done()
-    assert len(specific_runs) == 2
+    assert len(specific_runs) == 3
 
     hass.states.async_set("light.b", "on")
     await hass.async_block_till_done()
-    assert len(specific_runs) == 2
+    assert len(specific_runs) == 3
 
     hass.states.async_set("light.a", "on")
     await hass.async_block_till_done()
-    assert len(specific_runs) == 3
-    assert specific_runs[2] == "on"
+    assert len(specific_runs) == 4
+    assert specific_runs[3] == "on"
 
 
 async def test_track_template_result_iterator(hass):
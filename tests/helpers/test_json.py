@@ -1,8 +1,20 @@
 """Test Home Assistant remote methods and classes."""
+from enum import Enum
+import json
+import math
+from unittest.mock import patch
+from uuid import UUID
+
 import pytest
 
 from homeassistant import core
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import (
+    JSONEncoder,
+    json_dumps,
+    json_dumps_list,
+    json_dumps_list_chunks,
+    json_loads,
+)
 from homeassistant.util import dt as dt_util
 
 
@@ -25,3 +37,107 @@ def test_json_encoder(hass):
     # Default method raises TypeError if non HA object
     with pytest.raises(TypeError):
         ha_json_enc.default(1)
+
+
+def test_json_dumps_list():
+    """Test serializing a list that contains states."""
+    now = dt_util.utcnow()
+    state = core.State("test.test", "hello", {"happy": True})
+    data = [state, [state, {"time": now}], {"milk", "beer"}]
+
+    assert json.loads(json_dumps_list(data)) == json.loads(
+        json.dumps(data, cls=JSONEncoder)
+    )
+
+    with pytest.raises(ValueError):
+        json_dumps_list([core.State("test.test", "hello", {"nan": float("NaN")})])
+
+
+def test_json_dumps_list_chunks():
+    """Test serializing a list in pieces."""
+    state = core.State("test.test", "hello", {"happy": True})
+    data = [state, {"milk"}, 1, "two", None]
+
+    pieces = list(json_dumps_list_chunks(iter(data), 2))
+    assert len(pieces) == 5
+    assert "".join(pieces) == json_dumps_list(data)
+    assert "".join(json_dumps_list_chunks([], 2)) == json_dumps_list([])
+
+
+def test_json_dumps():
+    """Test serializing Home Assistant objects with the fast backend."""
+    now = dt_util.utcnow()
+    state = core.State("test.test", "hello", {"happy": True})
+    data = {"time": now, "set": {"milk"}, "state": state, 1: "one", "big": 2 ** 70}
+
+    assert json.loads(json_dumps(data)) == json.loads(json.dumps(data, cls=JSONEncoder))
+    # Pretty output is written like the files under .storage
+    assert json_dumps(data, pretty=True) == json.dumps(data, cls=JSONEncoder, indent=4)
+
+    with pytest.raises(TypeError):
+        json_dumps({"bad": object()})
+
+    with pytest.raises(ValueError):
+        json_dumps({"nan": float("NaN")}, allow_nan=False)
+    with pytest.raises(ValueError):
+        json_dumps({"list": [None, {"inf": float("inf")}]}, allow_nan=False)
+    with pytest.raises(ValueError):
+        json_dumps(
+            core.State("test.test", "on", {"nan": float("NaN")}), allow_nan=False
+        )
+    assert json_dumps({"nan": float("NaN")}) == '{"nan":NaN}'
+    assert json_dumps({"none": None, "inf": [float("inf")]}) == (
+        '{"none":null,"inf":[Infinity]}'
+    )
+    state = core.State("test.test", "on", {"inf": float("-inf")})
+    assert json_dumps(state) == json.dumps(
+        state, cls=JSONEncoder, separators=(",", ":")
+    )
+
+    with pytest.raises(TypeError):
+        json_dumps({"set": {"milk"}}, default=None)
+
+
+def test_json_dumps_null_uses_orjson():
+    """Test data with null but without NaN is not encoded again."""
+    state = core.State("test.test", "on", {"none": None, "list": [1.5, "null"]})
+    event = core.Event("test", {"none": None})
+    expected = [
+        json.dumps(data, cls=JSONEncoder, separators=(",", ":"))
+        for data in (state, event)
+    ]
+    with patch("homeassistant.util.json.json.dumps") as mock_dumps:
+        assert (
+            json_dumps({"none": None, "list": [1.5, "null"]}, allow_nan=False)
+            == '{"none":null,"list":[1.5,"null"]}'
+        )
+        assert json_dumps(state, allow_nan=False) == expected[0]
+        assert json_dumps(event) == expected[1]
+    assert not mock_dumps.called
+
+
+def test_json_dumps_orjson_types():
+    """Test the types orjson serializes that the standard library rejects."""
+
+    class Color(Enum):
+        """A plain enum."""
+
+        RED = 1
+
+    uuid = UUID("12345678123456781234567812345678")
+    assert json_dumps({"color": Color.RED, "uuid": uuid}) == (
+        '{"color":1,"uuid":"12345678-1234-5678-1234-567812345678"}'
+    )
+    with pytest.raises(TypeError):
+        json.dumps({"color": Color.RED}, cls=JSONEncoder)
+
+
+def test_json_loads():
+    """Test parsing JSON with the fast backend."""
+    assert json_loads('{"hello": [1, 2.5, "world"]}') == {"hello": [1, 2.5, "world"]}
+    assert json_loads(b'{"hello": null}') == {"hello": None}
+    # Data written by the standard library encoder can contain NaN
+    assert math.isnan(json_loads('{"nan": NaN}')["nan"])
+
+    with pytest.raises(ValueError):
+        json_loads("{not json")
@@ -1,5 +1,5 @@
 """Test Home Assistant template helper methods."""
-from datetime import datetime
+from datetime import datetime, timedelta
 import math
 import random
 from unittest.mock import patch
@@ -20,11 +20,17 @@ from homeassistant.const import (
 )
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import template
+from homeassistant.helpers.event import TrackTemplate, async_track_template_result
 from homeassistant.setup import async_setup_component
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import UnitSystem
 
-from tests.common import MockConfigEntry, mock_device_registry, mock_registry
+from tests.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    mock_device_registry,
+    mock_registry,
+)
 
 
 def _set_up_units(hass):
@@ -2504,3 +2510,187 @@ async def test_undefined_variable(hass, caplog):
     tpl = template.Template("{{ no_such_variable }}", hass)
     assert tpl.async_render() == ""
     assert "Template variable warning: no_such_variable is undefined" in caplog.text
+
+
+async def test_bytecode_cache(hass, hass_storage):
+    """Test compiled code is stored and loaded on the next run."""
+    await template.async_load_bytecode_cache(hass)
+
+    tpl = template.Template("{{ 1 + states('sensor.missing') | length }}", hass)
+    assert tpl.async_render() == 8
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(
+        hass,
+        dt_util.utcnow() + timedelta(seconds=template.BYTECODE_CACHE_SAVE_DELAY + 1),
+    )
+    await hass.async_block_till_done()
+
+    data = hass_storage[template.BYTECODE_CACHE_STORAGE_KEY]["data"]
+    assert data["versions"] == template.BYTECODE_CACHE_VERSIONS
+    assert len(data["templates"]) == 1
+
+    # Restart with the stored code
+    hass.data.pop(template._BYTECODE_CACHE)
+    hass.data.pop(template._ENVIRONMENT)
+    await template.async_load_bytecode_cache(hass)
+
+    with patch("jinja2.Environment.compile", side_effect=AssertionError("compiled")):
+        tpl = template.Template("{{ 1 + states('sensor.missing') | length }}", hass)
+        assert tpl.async_render() == 8
+
+    # Limited templates are stored for their own environment
+    template.TemplateEnvironment(hass, limited=True).compile("{{ 1 + 2 }}")
+    assert template._bytecode_key("limited", "{{ 1 + 2 }}") in (
+        hass.data[template._BYTECODE_CACHE]._used
+    )
+
+
+async def test_bytecode_cache_invalidated(hass, hass_storage):
+    """Test stored code of other versions and invalid code is discarded."""
+    source = "{{ 1 + 2 }}"
+    hass_storage[template.BYTECODE_CACHE_STORAGE_KEY] = {
+        "version": template.BYTECODE_CACHE_STORAGE_VERSION,
+        "key": template.BYTECODE_CACHE_STORAGE_KEY,
+        "data": {
+            "versions": "0.1:2.0:0000",
+            "templates": {template._bytecode_key("full", source): "invalid"},
+        },
+    }
+    await template.async_load_bytecode_cache(hass)
+    assert hass.data[template._BYTECODE_CACHE]._stored == {}
+    assert template.Template(source, hass).async_render() == 3
+
+    hass_storage[template.BYTECODE_CACHE_STORAGE_KEY]["data"] = {
+        "versions": template.BYTECODE_CACHE_VERSIONS,
+        "templates": {template._bytecode_key("full", "{{ 2 + 2 }}"): "aW52YWxpZA=="},
+    }
+    hass.data.pop(template._BYTECODE_CACHE)
+    await template.async_load_bytecode_cache(hass)
+    assert template.Template("{{ 2 + 2 }}", hass).async_render() == 4
+
+
+async def test_static_render_info(hass):
+    """Test the states a template reads are found without rendering."""
+
+    def static_info(template_str):
+        info = template.Template(template_str, hass).async_static_render_info()
+        if info is None:
+            return None
+        return info.entities, info.domains
+
+    assert static_info("{{ states('Sensor.A') }}") == ({"sensor.a"}, set())
+    assert static_info(
+        "{% if is_state('light.a', 'on') %}{{ state_attr('light.b', 'x') }}"
+        "{% else %}{{ is_state_attr('light.c', 'y', 1) }}{% endif %}"
+    ) == ({"light.a", "light.b", "light.c"}, set())
+    assert static_info(
+        "{% set x = states.sensor.temp.state | float %}"
+        "{{ states.light | selectattr('state', 'eq', 'on') | list | count + x }}"
+    ) == ({"sensor.temp"}, {"light"})
+    assert static_info("{{ expand('light.a', 'light.b') | count }}") == (
+        {"light.a", "light.b"},
+        set(),
+    )
+
+    hass.states.async_set("group.lights", "on", {"entity_id": ["light.a"]})
+    assert static_info("{{ expand('group.lights') | count }}") is None
+    assert static_info("plain text") is None
+    assert static_info("{{ states | count }}") is None
+    assert static_info("{{ states(entity) }}") is None
+    assert static_info("{{ states('sensor.' ~ name) }}") is None
+    assert static_info("{{ now() }}") is None
+    assert static_info("{{ ['light.a'] | expand }}") is None
+    assert static_info("{% set states = 1 %}{{ states }}") is None
+    assert static_info("{{ states('sensor.a' }}") is None
+
+
+async def test_render_info_entity_attributes(hass):
+    """Test reading single attributes only collects those attributes."""
+    hass.states.async_set("climate.a", "heat", {"temperature": 20, "mode": "eco"})
+    hass.states.async_set("climate.b", "heat", {"temperature": 21})
+
+    info = render_to_info(
+        hass,
+        "{{ state_attr('climate.a', 'temperature') }}"
+        " {{ states.climate.b.attributes.temperature }}"
+        " {{ is_state_attr('climate.b', 'mode', 'eco') }}"
+        " {{ 'mode' in states.climate.a.attributes }}",
+    )
+    assert_result_info(info, "20 21 False True", ["climate.a", "climate.b"])
+    assert info.entity_attributes == {
+        "climate.a": {"temperature", "mode"},
+        "climate.b": {"temperature", "mode"},
+    }
+
+    # Reading the state or all attributes collects the whole state
+    info = render_to_info(
+        hass,
+        "{{ state_attr('climate.a', 'temperature') }}"
+        " {{ states.climate.a.state }}"
+        " {{ state_attr('climate.b', 'temperature') }}"
+        " {{ states.climate.b.attributes | length }}",
+    )
+    assert_result_info(info, "20 heat 21 1", ["climate.a", "climate.b"])
+    assert info.entity_attributes == {}
+
+    info = render_to_info(
+        hass,
+        "{{ state_attr('climate.a', 'temperature') }}"
+        " {{ states.climate | map(attribute='state') | join(',') }}",
+    )
+    assert info.result() == "20 heat,heat"
+    assert info.entity_attributes == {}
+
+    # Attributes are not wrapped outside of collecting render info
+    assert (
+        template.Template(
+            "{{ states.climate.a.attributes.items() | list | count }}", hass
+        ).async_render()
+        == 2
+    )
+
+
+async def test_profiler(hass):
+    """Test the profiler records renders per template source."""
+    hass.states.async_set("sensor.a", "1")
+    slow = template.Template("{{ states('sensor.a') }}", hass)
+    fast = template.Template("{{ 1 }}", hass)
+
+    slow.async_render()
+    assert template.async_get_profiler(hass) is None
+
+    profiler = template.async_enable_profiler(hass)
+    assert template.async_enable_profiler(hass) is profiler
+    assert template.async_get_profiler(hass) is profiler
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(slow, None)], lambda event, updates: None
+    )
+    info.async_refresh()
+    hass.states.async_set("sensor.a", "2")
+    await hass.async_block_till_done()
+    fast.async_render()
+
+    with patch("homeassistant.helpers.template.time.perf_counter", side_effect=[0, 10]):
+        template.Template("{{ states('sensor.a') }}", hass).async_render()
+
+    report = profiler.async_report()
+    assert [stats["template"] for stats in report] == [slow.template, fast.template]
+    assert report[0]["count"] == 3
+    assert report[0]["p99"] == 10
+    assert report[0]["total"] >= 10
+    assert report[0]["average"] == report[0]["total"] / 3
+    assert report[0]["triggers"] == {
+        "refresh": 1,
+        "sensor.a": 1,
+        template.PROFILER_TRIGGER_DIRECT: 1,
+    }
+    assert report[1]["count"] == 1
+    assert profiler.async_report(1) == report[:1]
+
+    assert template.async_disable_profiler(hass) is profiler
+    assert template.async_disable_profiler(hass) is None
+    fast.async_render()
+    assert profiler.stats[fast.template].count == 1
+    info.async_remove()
@@ -3,6 +3,7 @@
 import asyncio
 from datetime import datetime, timedelta
 import functools
+import json
 import logging
 import os
 from tempfile import TemporaryDirectory
@@ -38,6 +39,7 @@ from homeassistant.exceptions import (
     InvalidStateError,
     ServiceNotFound,
 )
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
@@ -330,6 +332,7 @@ def test_event_as_dict():
     assert event.as_dict() == expected
     # 2nd time to verify cache
     assert event.as_dict() == expected
+    assert event.as_dict() is event.as_dict()
 
 
 def test_state_as_dict():
@@ -360,6 +363,16 @@ def test_state_as_dict():
     assert state.as_dict() is state.as_dict()
 
 
+def test_state_as_json():
+    """Test a State as JSON."""
+    state = ha.State("happy.happy", "on", {"pig": "dog"})
+    assert json.loads(state.as_json()) == json.loads(
+        json.dumps(state.as_dict(), cls=JSONEncoder)
+    )
+    # 2nd time to verify cache
+    assert state.as_json() is state.as_json()
+
+
 async def test_eventbus_add_remove_listener(hass):
     """Test remove_listener method."""
     old_count = len(hass.bus.async_listeners())
@@ -408,6 +421,76 @@ async def test_eventbus_filtered_listener(hass):
     unsub()
 
 
+async def test_eventbus_entity_listener(hass):
+    """Test we can listen to state changes of specific entities."""
+    calls = []
+    other_calls = []
+
+    @ha.callback
+    def listener(event):
+        """Mock listener."""
+        calls.append(event)
+
+    @ha.callback
+    def other_listener(event):
+        """Mock listener."""
+        other_calls.append(event)
+
+    old_count = hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0)
+    unsub = hass.bus.async_listen_entity(["light.kitchen", "light.bowl"], listener)
+    unsub_other = hass.bus.async_listen_entity(["light.bowl"], other_listener)
+
+    assert hass.bus.async_entity_listeners() == {"light.kitchen": 1, "light.bowl": 2}
+    # The entity listeners are dispatched by one state changed listener
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == old_count + 1
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.bowl", "on")
+    hass.states.async_set("light.other", "on")
+    await hass.async_block_till_done()
+
+    assert [event.data["entity_id"] for event in calls] == [
+        "light.kitchen",
+        "light.bowl",
+    ]
+    assert [event.data["entity_id"] for event in other_calls] == ["light.bowl"]
+
+    unsub()
+    assert hass.bus.async_entity_listeners() == {"light.bowl": 1}
+
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.bowl", "off")
+    await hass.async_block_till_done()
+
+    assert len(calls) == 2
+    assert len(other_calls) == 2
+
+    unsub_other()
+    assert hass.bus.async_entity_listeners() == {}
+    assert hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0) == old_count
+
+    # Should do nothing now
+    unsub_other()
+
+
+async def test_eventbus_entity_listener_removed_before_dispatch(hass):
+    """Test an entity listener removed after firing is not called."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        """Mock listener."""
+        calls.append(event)
+
+    unsub = hass.bus.async_listen_entity(["light.kitchen"], listener)
+
+    hass.states.async_set("light.kitchen", "on")
+    unsub()
+    await hass.async_block_till_done()
+
+    assert len(calls) == 0
+
+
 async def test_eventbus_unsubscribe_listener(hass):
     """Test unsubscribe listener from returned function."""
     calls = []
@@ -676,6 +759,22 @@ async def test_statemachine_last_changed_not_updated_on_same_state(hass):
     assert state.last_changed == state2.last_changed
 
 
+async def test_statemachine_shares_unchanged_attributes(hass):
+    """Test states share unchanged attributes and the domain string."""
+    hass.states.async_set("light.bowl", "on", {"brightness": 100})
+    state = hass.states.get("light.bowl")
+
+    hass.states.async_set("light.bowl", "off", {"brightness": 100})
+    state2 = hass.states.get("light.bowl")
+    assert state2.attributes is state.attributes
+    assert state2.domain is state.domain
+
+    hass.states.async_set("light.bowl", "off", {"brightness": 50})
+    state3 = hass.states.get("light.bowl")
+    assert state3.attributes == {"brightness": 50}
+    assert state3.last_changed == state2.last_changed
+
+
 async def test_statemachine_force_update(hass):
     """Test force update option."""
     hass.states.async_set("light.bowl", "on", {})
@@ -690,6 +789,141 @@ async def test_statemachine_force_update(hass):
     assert len(events) == 1
 
 
+async def test_statemachine_set_many(hass):
+    """Test setting multiple states at once."""
+    hass.states.async_set("light.bowl", "on", {})
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    batches = []
+
+    @ha.callback
+    def batch_listener(events):
+        """Mock batch listener."""
+        batches.append(events)
+
+    hass.bus.async_listen_batch(EVENT_STATE_CHANGED, batch_listener)
+    context = ha.Context()
+
+    hass.states.async_set_many(
+        [
+            ("light.Bowl", "on", None),
+            ("light.kitchen", "on", {"brightness": 100}),
+            ("light.hallway", "off", None),
+        ],
+        context=context,
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get("light.kitchen").attributes == {"brightness": 100}
+    assert hass.states.is_state("light.hallway", "off")
+
+    # light.bowl did not change
+    assert [event.data["entity_id"] for event in events] == [
+        "light.kitchen",
+        "light.hallway",
+    ]
+    assert len(batches) == 1
+    assert batches[0] == events
+
+    kitchen = hass.states.get("light.kitchen")
+    hallway = hass.states.get("light.hallway")
+    assert kitchen.last_updated == hallway.last_updated
+    assert kitchen.context is hallway.context is context
+    assert events[0].time_fired == kitchen.last_updated
+
+    # Batch listeners also get single state changes
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    assert len(batches) == 2
+    assert len(batches[1]) == 1
+
+    # Nothing changed, nothing fired
+    hass.states.async_set_many([("light.kitchen", "off", None)])
+    await hass.async_block_till_done()
+    assert len(events) == 3
+    assert len(batches) == 2
+
+
+async def test_statemachine_set_many_invalid_entity(hass):
+    """Test states set before an invalid entity id are still fired."""
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+
+    with pytest.raises(InvalidEntityFormatError):
+        hass.states.async_set_many(
+            [("light.kitchen", "on", None), ("invalid_entity", "on", None)]
+        )
+    await hass.async_block_till_done()
+
+    assert hass.states.is_state("light.kitchen", "on")
+    assert len(events) == 1
+
+
+async def test_statemachine_set_unchanged(hass):
+    """Test setting an unchanged state creates no context or timestamp."""
+    hass.states.async_set("light.kitchen", "on", {"brightness": 100})
+
+    with patch("homeassistant.core.Context") as mock_context, patch(
+        "homeassistant.core.dt_util.utcnow"
+    ) as mock_utcnow:
+        hass.states.async_set("light.kitchen", "on", {"brightness": 100})
+        hass.states.async_set_many([("light.kitchen", "on", {"brightness": 100})])
+
+    assert not mock_context.called
+    assert not mock_utcnow.called
+
+
+async def test_statemachine_set_many_event_hashes(hass):
+    """Test the events of a batch do not share their hash."""
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    hass.states.async_set_many(
+        [("light.kitchen", "on", None), ("light.hallway", "on", None)]
+    )
+    await hass.async_block_till_done()
+
+    assert events[0].context is events[1].context
+    assert events[0].time_fired == events[1].time_fired
+    assert hash(events[0]) != hash(events[1])
+    assert hash(events[0]) == hash(
+        ha.Event(
+            EVENT_STATE_CHANGED,
+            dict(events[0].data),
+            time_fired=events[0].time_fired,
+            context=events[0].context,
+        )
+    )
+
+
+async def test_eventbus_batch_listener(hass):
+    """Test adding and removing batch listeners."""
+    old_count = hass.bus.async_listeners().get("test", 0)
+    batches = []
+
+    @ha.callback
+    def listener(events):
+        """Mock batch listener."""
+        batches.append(events)
+
+    unsub = hass.bus.async_listen_batch("test", listener)
+    assert hass.bus.async_batch_listeners() == {"test": 1}
+    assert hass.bus.async_listeners().get("test", 0) == old_count
+
+    hass.bus.async_fire_many("test", [{"idx": 1}, {"idx": 2}])
+    await hass.async_block_till_done()
+
+    assert len(batches) == 1
+    assert [event.data["idx"] for event in batches[0]] == [1, 2]
+    assert batches[0][0].context is batches[0][1].context
+
+    unsub()
+    hass.bus.async_fire("test")
+    await hass.async_block_till_done()
+
+    assert len(batches) == 1
+    assert hass.bus.async_batch_listeners() == {}
+
+    # Should do nothing now
+    unsub()
+
+
 def test_service_call_repr():
     """Test ServiceCall repr."""
     call = ha.ServiceCall("homeassistant", "start")
@@ -1231,6 +1465,17 @@ def test_context():
     assert c.id is not None
 
 
+def test_context_as_dict():
+    """Test context as dictionary is cached and ignored for equality."""
+    c = ha.Context(23, 100)
+    assert c.as_dict() == {"id": c.id, "parent_id": 100, "user_id": 23}
+    assert c.as_dict() is c.as_dict()
+
+    c2 = ha.Context(23, 100, c.id)
+    assert c == c2
+    assert hash(c) == hash(c2)
+
+
 async def test_async_functions_with_callback(hass):
     """Test we deal with async functions accidentally marked as callback."""
     runs = []
@@ -13,6 +13,7 @@ import pytest
 
 from homeassistant.core import Event, State
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.json import JSONEncoder as HAJSONEncoder
 from homeassistant.util.json import (
     SerializationError,
     find_paths_unserializable_data,
@@ -51,6 +52,8 @@ def test_save_and_load():
     save_json(fname, TEST_JSON_A)
     data = load_json(fname)
     assert data == TEST_JSON_A
+    with open(fname, encoding="utf-8") as fdesc:
+        assert fdesc.read() == dumps(TEST_JSON_A, indent=4)
 
 
 # Skipped on Windows
@@ -112,6 +115,19 @@ def test_custom_encoder():
     assert data == "9"
 
 
+def test_home_assistant_encoder():
+    """Test saving Home Assistant objects with the Home Assistant encoder."""
+    fname = _path_for("test7")
+    save_json(
+        fname, {"set": {"milk"}, "state": State("a.b", "on")}, encoder=HAJSONEncoder
+    )
+    data = load_json(fname)
+    assert data["set"] == ["milk"]
+    assert data["state"]["entity_id"] == "a.b"
+    with open(fname, encoding="utf-8") as fdesc:
+        assert fdesc.read().startswith('{\n    "set": [\n        "milk"\n    ],')
+
+
 def test_find_unserializable_data():
     """Find unserializeable data."""
     assert find_paths_unserializable_data(1) == {}